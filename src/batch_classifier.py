@@ -0,0 +1,182 @@
+"""
+Vectorized trade classification for large histories
+Columnar twin of Strategy.classify_trade: the same INVENTORY / CERTAINTY / skip
+rules and Config thresholds, applied to whole NumPy arrays at once. Used for
+offline analysis over millions of trades; the live bot keeps the scalar path.
+
+    python -m src.batch_classifier --verify 200000
+
+checks it against the scalar path on randomized inputs and times both.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+import numpy as np
+
+from .config import Config
+from .models import TradeEvent, MarketInfo
+from .strategy import Strategy
+
+# Classification codes
+CLASS_SKIP = 0
+CLASS_INVENTORY = 1
+CLASS_CERTAINTY = 2
+CLASSIFICATIONS = (None, "INVENTORY", "CERTAINTY") # code -> Strategy.classify_trade label
+
+# Reason codes: 0 = matched; skips are a bitmask of every failed rule
+REASON_MATCHED = 0
+REASON_BELOW_MIN_NOTIONAL = 1
+REASON_PRICE_NOT_INVENTORY = 2
+REASON_ALLOC_NOT_INVENTORY = 4
+REASON_NOT_CERTAIN = 8
+REASON_NEAR_RESOLUTION = 16
+
+CERTAINTY_MIN_SECONDS_TO_RESOLUTION = 60 * 60
+
+
+def classify_batch(price, size_usd, trader_alloc, seconds_to_resolution=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Classify N trades at once.
+    price, size_usd, trader_alloc: array-likes of length N
+    seconds_to_resolution: market end minus trade time; NaN (or None for all) = no end date
+    Returns (classification codes int8[N], reason codes uint8[N])
+    """
+    price = np.asarray(price, dtype=np.float64)
+    size_usd = np.asarray(size_usd, dtype=np.float64)
+    trader_alloc = np.asarray(trader_alloc, dtype=np.float64)
+    if seconds_to_resolution is None:
+        seconds_to_resolution = np.full(price.shape, np.nan)
+    else:
+        seconds_to_resolution = np.asarray(seconds_to_resolution, dtype=np.float64)
+
+    # Same expressions as the scalar path so threshold boundaries round identically
+    below_min = size_usd < Config.IGNORE_MIN_NOTIONAL_USD
+    price_inventory = ((Config.NORMAL_PRICE_MIN_CENTS / 100.0) <= price) & (price <= (Config.NORMAL_PRICE_MAX_CENTS / 100.0))
+    alloc_inventory = trader_alloc <= Config.NORMAL_MAX_PORTFOLIO_ALLOCATION
+    price_extreme = ((price >= (Config.CERTAINTY_PRICE_MAX_CENTS / 100.0)) |
+                     (price <= (Config.CERTAINTY_PRICE_MIN_CENTS / 100.0)))
+    huge_size = trader_alloc >= Config.CERTAINTY_PORTFOLIO_ALLOCATION_THRESHOLD
+    # NaN compares False: no end date means no near-resolution veto, as in the scalar path
+    near_resolution = seconds_to_resolution < CERTAINTY_MIN_SECONDS_TO_RESOLUTION
+
+    eligible = ~below_min
+    inventory = eligible & price_inventory & alloc_inventory
+    certain = eligible & ~inventory & price_extreme & huge_size
+    certainty = certain & ~near_resolution
+    unmatched = eligible & ~(inventory | certain)
+
+    # Bool arrays reinterpreted as 0/1 bytes - no per-element branching or temporaries
+    classes = inventory.view(np.int8) + (certainty.view(np.int8) << 1)
+    reasons = (below_min.view(np.uint8) |
+               ((certain & near_resolution).view(np.uint8) << 4) |
+               ((unmatched & ~price_inventory).view(np.uint8) << 1) |
+               ((unmatched & ~alloc_inventory).view(np.uint8) << 2) |
+               (unmatched.view(np.uint8) << 3))
+    return classes, reasons
+
+
+def describe(classification: int, reason: int, price: float, size_usd: float, trader_alloc: float) -> str:
+    """Reason code -> the exact reason string Strategy.classify_trade returns"""
+    if classification == CLASS_INVENTORY:
+        return "Matches Inventory criteria"
+    if classification == CLASS_CERTAINTY:
+        return "Matches Certainty criteria (Extreme Price + Huge Size)"
+    if reason & REASON_BELOW_MIN_NOTIONAL:
+        return f"Size ${size_usd:.2f} < ${Config.IGNORE_MIN_NOTIONAL_USD} min"
+    if reason & REASON_NEAR_RESOLUTION:
+        return "Certainty candidate but < 60 mins to resolution"
+    parts = []
+    if reason & REASON_PRICE_NOT_INVENTORY:
+        parts.append(f"Price {price:.2f} not in Inventory range {Config.NORMAL_PRICE_MIN_CENTS/100:.2f}-{Config.NORMAL_PRICE_MAX_CENTS/100:.2f}")
+    if reason & REASON_ALLOC_NOT_INVENTORY:
+        parts.append(f"Alloc {trader_alloc*100:.2f}% > {Config.NORMAL_MAX_PORTFOLIO_ALLOCATION*100:g}% limit")
+    if reason & REASON_NOT_CERTAIN:
+        parts.append("Not certain (Price/Size mismatch)")
+    return "; ".join(parts)
+
+
+def _random_inputs(n: int, seed: int):
+    """Random trades with extra mass on every threshold boundary"""
+    rng = np.random.default_rng(seed)
+    price_edges = np.array([Config.NORMAL_PRICE_MIN_CENTS, Config.NORMAL_PRICE_MAX_CENTS,
+                            Config.CERTAINTY_PRICE_MIN_CENTS, Config.CERTAINTY_PRICE_MAX_CENTS]) / 100.0
+    alloc_edges = np.array([Config.NORMAL_MAX_PORTFOLIO_ALLOCATION, Config.CERTAINTY_PORTFOLIO_ALLOCATION_THRESHOLD])
+    size_edges = np.array([Config.IGNORE_MIN_NOTIONAL_USD])
+    ttr_edges = np.array([CERTAINTY_MIN_SECONDS_TO_RESOLUTION, np.nan])
+
+    def mix(values, edges):
+        pick = rng.random(n) < 0.2
+        values[pick] = rng.choice(edges, pick.sum())
+        return values
+
+    price = mix(np.round(rng.uniform(0.0, 1.0, n), 3), price_edges)
+    size_usd = mix(rng.exponential(50.0, n), size_edges)
+    trader_alloc = mix(rng.exponential(0.05, n), alloc_edges)
+    seconds_to_resolution = mix(rng.integers(-3600, 7 * 24 * 3600, n).astype(np.float64), ttr_edges)
+    return price, size_usd, trader_alloc, seconds_to_resolution
+
+
+def verify_against_scalar(n: int = 100_000, seed: int = 0) -> dict:
+    """
+    Run both paths on the same randomized inputs.
+    Returns mismatch count plus timings; mismatches compare label AND reason text.
+    """
+    price, size_usd, trader_alloc, ttr = _random_inputs(n, seed)
+    now = datetime(2025, 1, 1)
+    now_ts = now.replace(tzinfo=timezone.utc).timestamp()
+
+    trades = []
+    for i in range(n):
+        market = {}
+        if not np.isnan(ttr[i]):
+            market["end_date_iso"] = (now + timedelta(seconds=float(ttr[i]))).isoformat()
+        trade = TradeEvent(trader="", proxy_wallet="", condition_id=None, asset=None, outcome=None, side="BUY",
+                           price=float(price[i]), size=0.0, size_usd=float(size_usd[i]), timestamp=0, tx=None)
+        trades.append((trade, MarketInfo(market), float(trader_alloc[i])))
+
+    started = time.perf_counter()
+    scalar = [Strategy.classify_trade(trade, market, alloc, now=now_ts) for trade, market, alloc in trades]
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    classes, reasons = classify_batch(price, size_usd, trader_alloc, ttr)
+    batch_seconds = time.perf_counter() - started
+
+    mismatches = []
+    for i, (label, reason) in enumerate(scalar):
+        batch_label = CLASSIFICATIONS[classes[i]]
+        batch_reason = describe(int(classes[i]), int(reasons[i]), float(price[i]), float(size_usd[i]), float(trader_alloc[i]))
+        if batch_label != label or batch_reason != reason:
+            mismatches.append((i, (label, reason), (batch_label, batch_reason)))
+
+    return {
+        "n": n,
+        "mismatches": len(mismatches),
+        "examples": mismatches[:5],
+        "scalar_seconds": scalar_seconds,
+        "batch_seconds": batch_seconds,
+        "speedup": scalar_seconds / batch_seconds if batch_seconds > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the vectorized classifier against Strategy.classify_trade")
+    parser.add_argument("--verify", type=int, default=100_000, metavar="N", help="Randomized trades to compare")
+    parser.add_argument("--seed", type=int, default=random.randrange(2**32))
+    args = parser.parse_args()
+
+    result = verify_against_scalar(args.verify, args.seed)
+    print(f"{result['n']} trades (seed {args.seed}): {result['mismatches']} mismatches")
+    for example in result['examples']:
+        print(f"  #{example[0]}: scalar={example[1]} batch={example[2]}")
+    print(f"scalar {result['scalar_seconds']:.3f}s, batch {result['batch_seconds']:.4f}s "
+          f"({result['speedup']:.0f}x)")
+    if result['mismatches']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+End-to-end detect -> order latency benchmark
+Runs the real bot (main(): TradeMonitor -> TradePipeline -> ExecutionService)
+against local stand-ins for data-api, gamma-api, the CLOB and a JSON-RPC node
+(src/bench/mock_apis.py) with injected latency, publishes trades one by one
+and measures, per trade, from the moment the fill appears on the Activity API
+to the moment post_order returns.
+
+    python -m src.bench.latency --trades 50 --latency data=40,gamma=60,clob=80,rpc=30
+    python -m src.bench.latency --baseline latency-previous.json   # flag regressions
+
+Stages: poll (appear -> detected), queue, fetch_market (Gamma lookup for
+markets missing from the index), balance, create_order, post_order, total. Results (percentiles + raw samples) are saved as
+JSON so runs can be compared between versions. State files live in a temp dir.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from eth_account import Account
+
+from ..config import Config
+from ..main import main as bot_main
+from ..sweep import cast_config_value
+from ..utils.balance_service import balance_service
+from ..utils.logger import add_event_listener, remove_event_listener, configure_logging
+from .mock_apis import MockPolymarket, SERVICES
+
+STAGES = ["poll", "queue", "fetch_market", "balance", "create_order", "post_order", "total"]
+PERCENTILES = [50, 95, 99]
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, dict]:
+    """stage -> count/mean/max and p50/p95/p99, in milliseconds"""
+    summary = {}
+    for stage in STAGES:
+        values = sorted(v * 1000 for v in samples.get(stage, []))
+        if not values:
+            continue
+        stats = {"count": len(values), "mean": sum(values) / len(values), "max": values[-1]}
+        for p in PERCENTILES:
+            stats[f"p{p}"] = percentile(values, p)
+        summary[stage] = stats
+    return summary
+
+
+def _bench_market(index: int) -> dict:
+    condition_id = f"0x{uuid.uuid4().hex}{index:032x}"
+    tokens = [str(random.getrandbits(160)), str(random.getrandbits(160))]
+    day = datetime.utcnow() + timedelta(days=2)
+    return {
+        "condition_id": condition_id,
+        "conditionId": condition_id,
+        "question": f"{Config.MARKET_TYPE_FILTER} in {Config.CITY_FILTER} on {day:%B %d} (bench {index})?",
+        "category": Config.CATEGORY_FILTER,
+        "description": f"Resolves to the reading at {Config.RESOLUTION_SOURCE.title()}.",
+        "clobTokenIds": json.dumps(tokens),
+        "outcomes": json.dumps(["Yes", "No"]),
+        "end_date_iso": day.isoformat(),
+        "minimum_tick_size": 0.01,
+        "neg_risk": False,
+        "active": True,
+        "closed": False,
+    }
+
+
+def _bench_trade(whale: str, market: dict) -> dict:
+    token = json.loads(market["clobTokenIds"])[0]
+    return {
+        "type": "TRADE",
+        "proxyWallet": whale,
+        "timestamp": int(time.time()),
+        "conditionId": market["condition_id"],
+        "asset": token,
+        "outcome": "Yes",
+        "side": "BUY",
+        "price": 0.5,
+        "size": 40.0,
+        "usdcSize": 20.0, # 2% of the mocked trader portfolio -> INVENTORY
+        "title": market["question"],
+        "slug": f"bench-{market['condition_id'][-8:]}",
+        "transactionHash": f"0x{uuid.uuid4().hex}{uuid.uuid4().hex}",
+    }
+
+
+async def _wait_for(predicate, timeout: float, interval: float = 0.05) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(interval)
+    return predicate()
+
+
+async def run_benchmark(trades: int, interval: float, latency: Dict[str, float], jitter: float = 0.2,
+                        cold_ratio: float = 0.5, warmup: int = 1, settle_timeout: float = 30.0) -> dict:
+    """
+    Drive main() against the mocks and collect per-trade stage timings.
+    cold_ratio: share of markets left out of the index listing, so their trades
+    take the per-trade Gamma lookup path instead of the prefetched index.
+    warmup: unmeasured trades published first - they pull the poller out of its
+    idle backoff into the hot window. 0 measures detection from idle instead.
+    """
+    mock = MockPolymarket(latency, jitter)
+    urls = mock.start()
+
+    whale = Account.create().address
+    Config.PRIVATE_KEY = Account.create().key.hex()
+    Config.TRADER_ADDRESS = whale
+    Config.TRADER_ADDRESSES = None
+    Config.PROXY_WALLET_ADDRESS = Account.create().address
+    Config.INGEST_MODE = "poll"
+    Config.METRICS_PORT = 0
+    Config.RPC_URL = urls["rpc"]
+    Config.DATA_API_URL = urls["data"]
+    Config.GAMMA_API_URL = urls["gamma"]
+    Config.CLOB_API_URL = urls["clob"]
+    balance_service.rpc_url = urls["rpc"] # singleton built at import time
+
+    markets = [_bench_market(i) for i in range(trades)]
+    cold = set(random.sample(range(trades), int(trades * cold_ratio)))
+    for i, market in enumerate(markets):
+        mock.add_market(market, listed=i not in cold)
+    warmup_markets = [_bench_market(trades + i) for i in range(warmup)]
+    for market in warmup_markets:
+        mock.add_market(market)
+
+    outcomes: Dict[str, tuple] = {} # tx -> (event record, received at)
+
+    def on_event(record: dict):
+        if record.get('event') in ("order_placed", "order_failed", "trade_skipped") and record.get('tx') in mock.appeared_at:
+            outcomes.setdefault(record['tx'], (record, time.time()))
+
+    original_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="latency-bench-")
+    os.chdir(workdir) # bot_state.db, poller cursor and market cache stay out of the real working dir
+    add_event_listener(on_event)
+    bot = asyncio.create_task(bot_main())
+    try:
+        # Past the cold-start snapshot = the poller is tailing with start/ASC
+        if not await _wait_for(lambda: mock.requests["activity_asc"] > 0 or bot.done(), 60):
+            raise RuntimeError("Bot did not start polling within 60s")
+        if bot.done():
+            raise RuntimeError("Bot exited during startup (see --verbose)")
+
+        warmup_txs = []
+        for market in warmup_markets:
+            trade = _bench_trade(whale, market)
+            mock.publish_trade(trade)
+            warmup_txs.append(trade["transactionHash"])
+        await _wait_for(lambda: all(tx in outcomes for tx in warmup_txs), settle_timeout)
+
+        published = []
+        for market in markets:
+            trade = _bench_trade(whale, market)
+            mock.publish_trade(trade)
+            published.append(trade["transactionHash"])
+            await asyncio.sleep(interval)
+        await _wait_for(lambda: all(tx in outcomes for tx in published), settle_timeout)
+    finally:
+        remove_event_listener(on_event)
+        bot.cancel()
+        try:
+            await bot
+        except (asyncio.CancelledError, Exception):
+            pass
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        mock.stop()
+
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    counts = Counter()
+    for tx in published:
+        if tx not in outcomes:
+            counts["timed_out"] += 1
+            continue
+        record, received_at = outcomes[tx]
+        counts[record['event'] if record['event'] != "trade_skipped" else f"skipped:{record.get('stage')}"] += 1
+        if record['event'] != "order_placed":
+            continue
+        appeared_at = mock.appeared_at[tx]
+        samples["poll"].append(record['detected_at'] - appeared_at)
+        for stage, seconds in (record.get('timings') or {}).items():
+            if stage in samples:
+                samples[stage].append(seconds)
+        samples["total"].append(received_at - appeared_at)
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "settings": {
+            "trades": trades, "interval": interval, "latency_ms": {s: latency.get(s, 0.0) * 1000 for s in SERVICES},
+            "jitter": jitter, "cold_ratio": cold_ratio, "warmup": warmup,
+            "poll_min_interval": Config.POLL_MIN_INTERVAL_SECONDS, "pipeline_workers": Config.PIPELINE_WORKERS,
+        },
+        "outcomes": dict(counts),
+        "requests": dict(mock.requests),
+        "stages": summarize(samples),
+        "samples": samples,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def print_summary(result: dict):
+    print(f"Outcomes: {result['outcomes']}")
+    print(f"{'stage':<14}" + "".join(f"{name:>10}" for name in ["count", "p50", "p95", "p99", "max"]) + "   (ms)")
+    for stage in STAGES:
+        stats = result['stages'].get(stage)
+        if not stats:
+            continue
+        print(f"{stage:<14}{stats['count']:>10}" + "".join(f"{stats[k]:>10.1f}" for k in ["p50", "p95", "p99", "max"]))
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Stages/percentiles that got slower than baseline by more than tolerance (fraction)"""
+    regressions = []
+    print(f"\nvs baseline {baseline.get('revision') or '?'} ({baseline.get('created')}):")
+    for stage in STAGES:
+        now, before = result['stages'].get(stage), baseline.get('stages', {}).get(stage)
+        if not now or not before:
+            continue
+        cells = []
+        for p in PERCENTILES:
+            key = f"p{p}"
+            old, new = before[key], now[key]
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if change > tolerance:
+                flag = " !"
+                regressions.append(f"{stage} {key}: {old:.1f} -> {new:.1f} ms ({change:+.0%})")
+            cells.append(f"{key} {change:+7.1%}{flag}")
+        print(f"  {stage:<14}" + "   ".join(cells))
+    return regressions
+
+
+def _parse_latency(raw: str) -> Dict[str, float]:
+    latency = {}
+    for item in (raw or "").split(","):
+        if not item.strip():
+            continue
+        service, _, ms = item.partition("=")
+        if service.strip() not in SERVICES:
+            raise SystemExit(f"Unknown service {service!r} (one of {', '.join(SERVICES)})")
+        latency[service.strip()] = float(ms) / 1000.0
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect -> order latency benchmark against local API stand-ins")
+    parser.add_argument("--trades", type=int, default=30)
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between published trades")
+    parser.add_argument("--latency", default="data=40,gamma=60,clob=80,rpc=30",
+                        help="Injected per-request latency in ms, per service (data, gamma, clob, rpc)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency jitter as a fraction (+/-)")
+    parser.add_argument("--cold-ratio", type=float, default=0.5, help="Share of markets missing from the prefetched index")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured trades first (0 = measure detection from idle)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="Override a Config value for the run")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", default=None, help="Results JSON (default: latency-<timestamp>.json)")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline before failing")
+    parser.add_argument("--verbose", action="store_true", help="Show the bot's console output")
+    args = parser.parse_args()
+
+    for item in args.set:
+        name, _, raw = item.partition("=")
+        if not name.isupper() or not hasattr(Config, name):
+            raise SystemExit(f"Unknown Config parameter: {name}")
+        setattr(Config, name, cast_config_value(name, raw))
+    random.seed(args.seed)
+    configure_logging(console=args.verbose, files=False)
+
+    result = asyncio.run(run_benchmark(args.trades, args.interval, _parse_latency(args.latency),
+                                       args.jitter, args.cold_ratio, args.warmup))
+    print_summary(result)
+
+    out = args.out or f"latency-{datetime.now():%Y%m%d-%H%M%S}.json"
+    with open(out, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved {out}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Local stand-ins for the Polymarket data-api, gamma-api, CLOB and a Polygon JSON-RPC node
+Just enough of each API for the bot's startup and trade path, served on
+127.0.0.1 from a background thread (the CLOB client and web3 startup calls
+are synchronous, so the servers must not share the bot's event loop).
+Every response is delayed by the service's configured latency (+/- jitter).
+"""
+import asyncio
+import base64
+import json
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from ..utils.market_cache import market_condition_id, market_token_ids
+
+SERVICES = ("data", "gamma", "clob", "rpc")
+
+
+class MockPolymarket:
+    def __init__(self, latency: Optional[Dict[str, float]] = None, jitter: float = 0.2,
+                 usdc_balance: float = 1000.0, positions_value: float = 0.0):
+        self.latency = {s: (latency or {}).get(s, 0.0) for s in SERVICES}
+        self.jitter = jitter
+        self.usdc_balance = usdc_balance
+        self.positions_value = positions_value
+
+        self.activity: List[dict] = []
+        self.appeared_at: Dict[str, float] = {} # transactionHash -> wall time it became visible
+        self.markets: Dict[str, dict] = {}      # condition_id -> market
+        self.tokens: Dict[str, str] = {}        # token -> condition_id
+        self.listed: List[str] = []             # condition_ids served by the listing endpoint
+        self.orders: List[dict] = []
+        self.requests = Counter()
+        self.urls: Dict[str, str] = {}
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._runners: List[web.AppRunner] = []
+        self._api_secret = base64.urlsafe_b64encode(b"bench-secret-0123456789abcdef012").decode()
+
+    # --- Scenario setup (any thread) --------------------------------------
+
+    def add_market(self, market: dict, listed: bool = True):
+        """listed=False: reachable by token/condition lookups but absent from the index listing"""
+        condition_id = market_condition_id(market)
+        with self._lock:
+            self.markets[condition_id] = market
+            for token in market_token_ids(market):
+                self.tokens[token] = condition_id
+            if listed:
+                self.listed.append(condition_id)
+
+    def publish_trade(self, activity: dict) -> float:
+        """Make a trade visible on the Activity API; returns the wall time it appeared"""
+        with self._lock:
+            appeared_at = time.time()
+            self.activity.append(activity)
+            self.appeared_at[activity['transactionHash']] = appeared_at
+        return appeared_at
+
+    # --- Lifecycle ----------------------------------------------------------
+
+    def start(self, timeout: float = 10.0) -> Dict[str, str]:
+        """Serve every API from a daemon thread; returns service -> base URL"""
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._start_servers())
+            except Exception as e:
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="mock-polymarket", daemon=True)
+        self._thread.start()
+        if not ready.wait(timeout) or errors:
+            raise RuntimeError(f"Mock servers failed to start: {errors[0] if errors else 'timeout'}")
+        return self.urls
+
+    async def _start_servers(self):
+        apps = {
+            "data": self._data_app(),
+            "gamma": self._gamma_app(),
+            "clob": self._clob_app(),
+            "rpc": self._rpc_app(),
+        }
+        for service, app in apps.items():
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            host, port = runner.addresses[0][:2]
+            self.urls[service] = f"http://{host}:{port}"
+            self._runners.append(runner)
+
+    def stop(self, timeout: float = 5.0):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            for runner in self._runners:
+                await runner.cleanup()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop = None
+
+    async def _delay(self, service: str):
+        base = self.latency[service]
+        if base > 0:
+            await asyncio.sleep(base * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    # --- data-api -----------------------------------------------------------
+
+    def _data_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/activity", self._activity)
+        app.router.add_get("/positions", self._positions)
+        return app
+
+    async def _activity(self, request: web.Request) -> web.Response:
+        await self._delay("data")
+        q = request.query
+        user = q.get("user", "").lower()
+        start = int(q.get("start", 0) or 0)
+        limit = int(q.get("limit", 100) or 100)
+        offset = int(q.get("offset", 0) or 0)
+        ascending = q.get("sortDirection", "DESC").upper() == "ASC"
+        self.requests["activity_asc" if ascending else "activity"] += 1
+
+        with self._lock:
+            rows = [a for a in self.activity
+                    if a['proxyWallet'].lower() == user and int(a['timestamp']) >= start]
+        rows.sort(key=lambda a: int(a['timestamp']), reverse=not ascending)
+        return web.json_response(rows[offset:offset + limit])
+
+    async def _positions(self, request: web.Request) -> web.Response:
+        await self._delay("data")
+        self.requests["positions"] += 1
+        if int(request.query.get("offset", 0) or 0) > 0 or not self.positions_value:
+            return web.json_response([])
+        return web.json_response([{"currentValue": self.positions_value}])
+
+    # --- gamma-api ----------------------------------------------------------
+
+    def _gamma_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/markets", self._markets)
+        app.router.add_get("/public-profile", self._public_profile)
+        return app
+
+    async def _markets(self, request: web.Request) -> web.Response:
+        await self._delay("gamma")
+        q = request.query
+        with self._lock:
+            if q.get("clob_token_ids"):
+                self.requests["gamma_token"] += 1
+                condition_id = self.tokens.get(q["clob_token_ids"])
+                return web.json_response([self.markets[condition_id]] if condition_id else [])
+            if q.get("condition_id"):
+                self.requests["gamma_condition"] += 1
+                market = self.markets.get(q["condition_id"].lower())
+                return web.json_response([market] if market else [])
+
+            self.requests["gamma_listing"] += 1
+            offset = int(q.get("offset", 0) or 0)
+            limit = int(q.get("limit", 500) or 500)
+            page = [self.markets[cid] for cid in self.listed[offset:offset + limit]]
+        return web.json_response(page)
+
+    async def _public_profile(self, request: web.Request) -> web.Response:
+        await self._delay("gamma")
+        return web.json_response({"error": "not found"}, status=404)
+
+    # --- CLOB ---------------------------------------------------------------
+
+    def _clob_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/auth/api-key", self._api_key)
+        app.router.add_get("/auth/derive-api-key", self._api_key)
+        app.router.add_get("/tick-size", self._clob_static({"minimum_tick_size": 0.01}))
+        app.router.add_get("/neg-risk", self._clob_static({"neg_risk": False}))
+        app.router.add_get("/fee-rate", self._clob_static({"base_fee": 0}))
+        app.router.add_get("/time", self._clob_time)
+        app.router.add_post("/order", self._post_order)
+        return app
+
+    async def _api_key(self, request: web.Request) -> web.Response:
+        await self._delay("clob")
+        return web.json_response({"apiKey": "bench-key", "secret": self._api_secret, "passphrase": "bench"})
+
+    def _clob_static(self, payload: dict):
+        async def handler(request: web.Request) -> web.Response:
+            await self._delay("clob")
+            self.requests[f"clob{request.path}"] += 1
+            return web.json_response(payload)
+        return handler
+
+    async def _clob_time(self, request: web.Request) -> web.Response:
+        await self._delay("clob")
+        return web.json_response(int(time.time()))
+
+    async def _post_order(self, request: web.Request) -> web.Response:
+        await self._delay("clob")
+        body = await request.json()
+        with self._lock:
+            self.orders.append(body)
+            order_id = f"0x{len(self.orders):064x}"
+        self.requests["clob/order"] += 1
+        return web.json_response({"success": True, "orderID": order_id, "status": "matched", "errorMsg": ""})
+
+    # --- JSON-RPC -----------------------------------------------------------
+
+    def _rpc_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/", self._rpc)
+        return app
+
+    def _rpc_result(self, call: dict) -> dict:
+        method = call.get("method")
+        self.requests[f"rpc:{method}"] += 1
+        results = {
+            "eth_chainId": "0x89",
+            "net_version": "137",
+            "eth_blockNumber": "0x1000000",
+            "eth_getCode": "0x",
+            "eth_getBalance": "0x0",
+            # Only balanceOf is ever called: answer every eth_call with the USDC balance (6 decimals)
+            "eth_call": "0x" + format(int(self.usdc_balance * 10**6), "064x"),
+        }
+        response = {"jsonrpc": "2.0", "id": call.get("id")}
+        if method in results:
+            response["result"] = results[method]
+        else:
+            response["error"] = {"code": -32601, "message": f"method {method} not mocked"}
+        return response
+
+    async def _rpc(self, request: web.Request) -> web.Response:
+        await self._delay("rpc")
+        payload = json.loads(await request.read())
+        if isinstance(payload, list):
+            return web.json_response([self._rpc_result(call) for call in payload])
+        return web.json_response(self._rpc_result(payload))
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from ..config import Config
+from ..utils.logger import info, warning
+from ..utils import outbound
+from py_clob_client.clob_types import OrderType
+
+
+class ExecutionService:
+    """
+    Runs the synchronous py-clob-client signing/posting calls on a dedicated,
+    bounded thread pool so the event loop (poller, enrichment) keeps running
+    while orders are in flight.
+    """
+    def __init__(self, clob_client, max_workers: int = None, max_pending: int = None):
+        self.clob_client = clob_client
+        self.max_workers = max_workers or Config.EXECUTION_WORKERS
+        self.max_pending = max_pending or Config.EXECUTION_MAX_PENDING
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="clob-exec")
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0   # accepted, not yet finished (loop thread only)
+        self._in_flight = 0 # currently running on a worker thread
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for a slot or a worker thread"""
+        return max(0, self._pending - self._in_flight)
+
+    def stats(self) -> dict:
+        return {"queue_depth": self.queue_depth, "in_flight": self.in_flight, "workers": self.max_workers}
+
+    def _tracked(self, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    async def _submit(self, name: str, timeout: float, fn: Callable, *args, **kwargs) -> Any:
+        self._pending += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._executor, lambda: self._tracked(fn, *args, **kwargs))
+                try:
+                    # shield: a timed-out call keeps running in its thread, we just stop waiting
+                    return await asyncio.wait_for(asyncio.shield(future), timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"{name} did not complete within {timeout}s")
+        finally:
+            self._pending -= 1
+
+    async def sign(self, order_args, options):
+        """clob_client.create_order off-loop (may look up tick size / fee rate on the CLOB)"""
+        async with outbound.call("clob", outbound.ORDER, "create_order"):
+            return await self._submit("create_order", Config.EXECUTION_SIGN_TIMEOUT_SECONDS,
+                                      self.clob_client.create_order, order_args, options=options)
+
+    async def post(self, signed_order, order_type=OrderType.GTC):
+        """clob_client.post_order off-loop. On timeout the order state is UNKNOWN"""
+        try:
+            async with outbound.call("clob", outbound.ORDER, "post_order"):
+                return await self._submit("post_order", Config.EXECUTION_POST_TIMEOUT_SECONDS,
+                                          self.clob_client.post_order, signed_order, order_type)
+        except TimeoutError:
+            warning("post_order timed out - order may still have been accepted by the CLOB")
+            raise
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        info("Execution service stopped.")
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+from ..config import Config
+from ..strategy import Strategy
+from ..utils.logger import info, error, warning
+from ..utils.http_client import get_session
+from ..utils.json_codec import loads
+from ..utils import outbound
+from ..models import MarketInfo
+from ..utils.market_cache import market_cache, market_token_ids
+
+
+# Fields Strategy.is_valid_market reads; the listing endpoint can return thin objects without them
+FILTER_FIELDS = ("category", "question", "description")
+
+
+class MarketIndex:
+    """
+    Pre-validated token_id -> market index over the active market universe.
+    Built at startup and refreshed periodically so enrichment + market filtering
+    of a detected trade is a dict lookup. Tokens not found here fall back to
+    fetch_market_by_token. A rejection is only indexed when the listing carried
+    every field the filter reads: a thin listing could be a valid market, so
+    its tokens are left to the full fetch.
+    """
+    def __init__(self):
+        self.tokens: Dict[str, Tuple[MarketInfo, bool]] = {} # token_id -> (market, is_valid)
+        self.last_refresh = 0
+        self.is_running = False
+
+    def lookup(self, token_id: str) -> Optional[Tuple[MarketInfo, bool]]:
+        """Returns (market_data, is_valid_market) or None if the token is not indexed"""
+        if not token_id:
+            return None
+        return self.tokens.get(str(token_id))
+
+    @staticmethod
+    def _prefilter(market: dict) -> bool:
+        """Cheap text match before running the full Strategy filter"""
+        question = market.get('question', '') or ''
+        if Config.CITY_FILTER not in question or Config.MARKET_TYPE_FILTER not in question:
+            return False
+        category = market.get('category')
+        return not category or category == Config.CATEGORY_FILTER
+
+    async def _fetch_page(self, offset: int) -> Optional[list]:
+        params = {
+            "active": "true",
+            "closed": "false",
+            "limit": str(Config.MARKET_INDEX_PAGE_SIZE),
+            "offset": str(offset)
+        }
+        session = await get_session()
+        async with outbound.call("gamma", outbound.BACKGROUND, "market_index") as call:
+            async with session.get(f"{Config.GAMMA_API_URL}/markets", params=params) as resp:
+                call.record(resp.status, resp.headers.get('Retry-After'))
+                if resp.status != 200:
+                    warning(f"Gamma API error {resp.status} while indexing markets (offset {offset})")
+                    return None
+                data = loads(await resp.read())
+                return data if isinstance(data, list) else []
+
+    async def refresh(self) -> int:
+        """Page through all active markets and rebuild the index. Returns indexed token count"""
+        started = time.time()
+        new_tokens: Dict[str, Tuple[MarketInfo, bool]] = {}
+        scanned = 0
+        valid_markets = 0
+
+        for page in range(Config.MARKET_INDEX_MAX_PAGES):
+            markets = await self._fetch_page(page * Config.MARKET_INDEX_PAGE_SIZE)
+            if markets is None:
+                # Keep serving the previous index rather than a partial one
+                return len(self.tokens)
+
+            for m in markets:
+                scanned += 1
+                if not self._prefilter(m):
+                    continue
+                # Listing endpoint uses camelCase; downstream expects condition_id
+                if not m.get('condition_id') and m.get('conditionId'):
+                    m['condition_id'] = m['conditionId']
+
+                is_valid = Strategy.is_valid_market(m)
+                if is_valid:
+                    valid_markets += 1
+                    market_cache.put(m)
+                elif not all(m.get(field) for field in FILTER_FIELDS):
+                    continue
+                entry = (MarketInfo(m), is_valid) # Parsed once per refresh, shared by every lookup
+                for token_id in market_token_ids(m):
+                    new_tokens[token_id] = entry
+
+            if len(markets) < Config.MARKET_INDEX_PAGE_SIZE:
+                break
+        else:
+            warning(f"Market index hit page limit ({Config.MARKET_INDEX_MAX_PAGES}); universe may be truncated")
+
+        self.tokens = new_tokens
+        self.last_refresh = time.time()
+        info(f"Market index refreshed: {valid_markets} valid markets / {len(new_tokens)} tokens "
+             f"(scanned {scanned}) in {time.time() - started:.1f}s")
+        return len(new_tokens)
+
+    async def start(self):
+        """Refresh on a fixed schedule until stopped"""
+        self.is_running = True
+        while self.is_running:
+            await asyncio.sleep(Config.MARKET_INDEX_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except Exception as e:
+                error(f"Market index refresh failed: {e}")
+
+    async def stop(self):
+        self.is_running = False
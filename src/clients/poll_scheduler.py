@@ -0,0 +1,117 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Optional
+from ..config import Config
+
+
+class AdaptivePollScheduler:
+    """
+    Decides how long the poller sleeps between polls.
+
+    - Right after a trade is detected: poll at the floor (sub-second) for a hot window
+    - While the trader is idle: relax the interval exponentially up to a ceiling
+    - On 429/5xx/network errors: exponential backoff with full jitter
+    - Never exceeds the per-minute request budget, whatever the interval says
+    """
+    def __init__(self):
+        self.base_interval = Config.POLL_INTERVAL_SECONDS
+        self.min_interval = Config.POLL_MIN_INTERVAL_SECONDS
+        self.max_interval = Config.POLL_MAX_INTERVAL_SECONDS
+        self.hot_window = Config.POLL_HOT_WINDOW_SECONDS
+        self.idle_factor = Config.POLL_IDLE_BACKOFF_FACTOR
+        self.budget_per_minute = Config.POLL_REQUEST_BUDGET_PER_MINUTE
+
+        self.interval = self.base_interval
+        self.last_trade_at = 0.0
+        self.error_streak = 0
+        self._backoff_delay: Optional[float] = None
+        self._requests = deque() # request timestamps within the last 60s
+
+        # Exported for tuning reaction time vs API cost
+        self.last_detection_lag: Optional[float] = None
+        self.avg_detection_lag: Optional[float] = None # EWMA
+        self.detections = 0
+
+    def record_request(self):
+        self._requests.append(time.time())
+
+    def _budget_wait(self, now: float) -> float:
+        while self._requests and now - self._requests[0] >= 60:
+            self._requests.popleft()
+        if len(self._requests) < self.budget_per_minute:
+            return 0.0
+        return 60 - (now - self._requests[0])
+
+    def on_trades(self, newest_trade_ts: Optional[float]):
+        """New trades detected: tighten to the floor and record detection lag"""
+        now = time.time()
+        self.last_trade_at = now
+        self.error_streak = 0
+        self._backoff_delay = None
+        self.interval = self.min_interval
+
+        if newest_trade_ts:
+            lag = max(0.0, now - float(newest_trade_ts))
+            self.last_detection_lag = lag
+            self.avg_detection_lag = lag if self.avg_detection_lag is None else (0.8 * self.avg_detection_lag + 0.2 * lag)
+            self.detections += 1
+
+    def on_idle(self):
+        """Successful poll with nothing new"""
+        self.error_streak = 0
+        self._backoff_delay = None
+        if time.time() - self.last_trade_at < self.hot_window:
+            # Trader is mid-accumulation - stay tight
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, max(self.base_interval, self.interval * self.idle_factor))
+
+    def on_error(self, status: Optional[int] = None, retry_after: Optional[float] = None):
+        """Failed poll (429/5xx/network): full-jitter exponential backoff"""
+        self.error_streak += 1
+        cap = min(Config.POLL_ERROR_BACKOFF_MAX_SECONDS,
+                  Config.POLL_ERROR_BACKOFF_BASE_SECONDS * (2 ** self.error_streak))
+        delay = random.uniform(self.min_interval, max(self.min_interval, cap))
+        if retry_after:
+            delay = max(delay, retry_after)
+        self._backoff_delay = delay
+
+    def next_delay(self) -> float:
+        now = time.time()
+        delay = self._backoff_delay if self._backoff_delay is not None else self.interval
+        return max(delay, self._budget_wait(now))
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "error_streak": self.error_streak,
+            "requests_last_minute": len(self._requests),
+            "last_detection_lag": self.last_detection_lag,
+            "avg_detection_lag": self.avg_detection_lag,
+        }
+
+
+class RequestBudget:
+    """Token bucket shared by every poller so adding targets never exceeds a global request rate"""
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.waits = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            self.waits += 1
+            await asyncio.sleep((1 - self.tokens) / self.rate)
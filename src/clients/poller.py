@@ -1,111 +1,292 @@
 import asyncio
-import aiohttp
 import time
-import ssl
-import certifi
 import json
-from typing import List, Dict, Optional
+import os
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 from ..config import Config
-from ..utils.logger import info, error, debug, trade_detect
+from ..utils.logger import info, error, debug, warning, trade_detect
+from ..utils.http_client import get_session
+from ..utils.json_codec import loads
+from ..utils import outbound
+from ..utils.metrics import STAGE_SECONDS, TRADES_SEEN, ACTIVITY_POLLS
+from .poll_scheduler import AdaptivePollScheduler, RequestBudget
+from ..targets import TraderTarget
+from ..models import TradeEvent
+
+
+
+class BoundedSeenSet:
+    """Insertion-ordered dedupe set that forgets the OLDEST keys first"""
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._items: "OrderedDict[str, None]" = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, key: str):
+        if key in self._items:
+            return
+        self._items[key] = None
+        while len(self._items) > self.maxlen:
+            self._items.popitem(last=False)
+
+
+def trade_key(activity: dict) -> str:
+    """One tx can fill several buckets, so the hash alone is not unique per trade"""
+    if activity.get('id'):
+        return str(activity['id'])
+    return f"{activity.get('transactionHash')}:{activity.get('asset')}"
+
+
+def load_cursor(address: str) -> Optional[dict]:
+    if not Config.POLL_CURSOR_FILE or not os.path.exists(Config.POLL_CURSOR_FILE):
+        return None
+    try:
+        with open(Config.POLL_CURSOR_FILE, 'r') as f:
+            return json.load(f).get(address.lower())
+    except Exception as e:
+        warning(f"Poll cursor file unreadable, starting from latest activity: {e}")
+        return None
+
+
+def save_cursor(address: str, cursor: dict):
+    """Atomic write (tmp + rename) so a crash never leaves a torn cursor file"""
+    if not Config.POLL_CURSOR_FILE:
+        return
+    try:
+        data = {}
+        if os.path.exists(Config.POLL_CURSOR_FILE):
+            with open(Config.POLL_CURSOR_FILE, 'r') as f:
+                data = json.load(f)
+        data[address.lower()] = cursor
+        tmp_path = f"{Config.POLL_CURSOR_FILE}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, Config.POLL_CURSOR_FILE)
+    except Exception as e:
+        error(f"Failed to persist poll cursor: {e}")
 
-ACTIVITY_API_URL = "https://data-api.polymarket.com/activity"
 
 class TradePoller:
-    def __init__(self, queue: asyncio.Queue):
+    """Polls the Activity API for ONE tracked trader; several run concurrently under TradeMonitor"""
+    def __init__(self, queue: asyncio.Queue, target: TraderTarget, budget: Optional[RequestBudget] = None):
         self.queue = queue
+        self.target = target
+        self.budget = budget
         self.is_running = False
-        self.seen_ids = set()
-        self.POLL_INTERVAL = 3
+        self.seen_ids = BoundedSeenSet(Config.POLL_SEEN_MAX)
+        self.scheduler = AdaptivePollScheduler()
+        self.last_status: Optional[int] = None
+        self.last_retry_after: Optional[float] = None
+        # High-water mark: newest trade timestamp seen + keys of trades AT that timestamp
+        # (the `start` filter is inclusive, so same-second trades come back on the next poll)
+        self.cursor_ts = 0
+        self.cursor_keys: List[str] = []
+        # Stream-delivered trades the cursor has not reached yet (key -> timestamp); persisted with
+        # the cursor so a restart's catch-up poll does not queue them again
+        self.streamed: Dict[str, int] = {}
+        self.primed = False # False until we have a cursor (persisted or from a cold-start snapshot)
+        # Set by TradeMonitor while a push stream covers this trader; polling becomes a slow backstop
+        self.stream_active = False
+        self._wake = asyncio.Event()
 
     async def start(self):
         self.is_running = True
-        info(f"Starting Trade Poller for {Config.TRADER_ADDRESS}...")
-        
-        await self._poll(initial=True)
-        
+        info(f"Starting Trade Poller for {self.target.proxy}...")
+
+        cursor = load_cursor(self.target.proxy)
+        if cursor:
+            # Resume: trades made while we were down are emitted, nothing is replayed
+            self.cursor_ts = int(cursor.get('timestamp', 0))
+            self.cursor_keys = list(cursor.get('keys', []))
+            self.streamed = {k: int(ts) for k, ts in cursor.get('streamed', {}).items()}
+            for key in self.cursor_keys + list(self.streamed):
+                self.seen_ids.add(key)
+            info(f"Resuming activity for {self.target.label} from cursor {self.cursor_ts}")
+            self.primed = True
+            await self._poll()
+        else:
+            await self._poll(initial=True)
+
         while self.is_running:
             try:
-                await self._poll()
-                await asyncio.sleep(self.POLL_INTERVAL)
+                # Never poll "after 0" - that would replay the trader's whole history
+                new_count = await self._poll(initial=not self.primed)
+                if new_count is None:
+                    self.scheduler.on_error(self.last_status, self.last_retry_after)
+                elif new_count:
+                    self.scheduler.on_trades(self.cursor_ts)
+                    debug(f"Detection lag {self.scheduler.last_detection_lag:.1f}s "
+                          f"(next poll in {self.scheduler.interval:.2f}s)")
+                else:
+                    self.scheduler.on_idle()
             except Exception as e:
                 error(f"Polling error: {e}")
-                await asyncio.sleep(5)
+                self.scheduler.on_error()
+
+            delay = self.scheduler.next_delay()
+            if self.stream_active:
+                delay = max(delay, Config.STREAM_BACKSTOP_POLL_SECONDS)
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def wake(self):
+        """Poll now (e.g. stream reconnected - catch up from the cursor)"""
+        self._wake.set()
+
+    async def ingest(self, activity: dict) -> bool:
+        """
+        Push path (stream): dedupe against everything polled/streamed so far and
+        queue if new. The persisted cursor is only advanced by polling, so trades
+        the stream drops while reconnecting are still caught by the backstop poll;
+        the streamed key is persisted alongside it so that poll never re-queues it.
+        """
+        key = trade_key(activity)
+        ts = int(activity.get('timestamp', 0) or 0)
+        if key in self.seen_ids or key in self.streamed:
+            return False
+        if self.primed and (ts < self.cursor_ts or (ts == self.cursor_ts and key in self.cursor_keys)):
+            return False # Already confirmed (and queued, if new) by a poll
+        self.seen_ids.add(key)
+        self.scheduler.on_trades(activity.get('timestamp'))
+        await self.queue.put(self._build_event(activity))
+        self.streamed[key] = ts
+        self._save_cursor()
+        return True
+
+    def _save_cursor(self):
+        self.streamed = {k: ts for k, ts in self.streamed.items() if ts >= self.cursor_ts and k not in self.cursor_keys}
+        save_cursor(self.target.proxy, {"timestamp": self.cursor_ts, "keys": self.cursor_keys, "streamed": self.streamed})
 
     async def stop(self):
         self.is_running = False
-        info("Trade Poller stopped.")
+        self.wake()
+        info(f"Trade Poller stopped for {self.target.label}.")
 
-    async def _poll(self, initial: bool = False):
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        
-        params = {
-            "user": Config.TRADER_ADDRESS.lower(),
-            "limit": "50"
-        }
-        
+    async def _fetch_page(self, params: dict) -> Optional[list]:
+        if self.budget:
+            await self.budget.acquire()
+        session = await get_session()
+        self.last_status, self.last_retry_after = None, None
         try:
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.get(ACTIVITY_API_URL, params=params) as resp:
+            async with outbound.call("data", outbound.TRADE, "activity_poll") as call:
+                self.scheduler.record_request()
+                async with session.get(f"{Config.DATA_API_URL}/activity", params=params) as resp:
+                    self.last_status = resp.status
+                    retry_after = resp.headers.get('Retry-After', '')
+                    call.record(resp.status, retry_after or None)
                     if resp.status != 200:
                         debug(f"API Error {resp.status}")
-                        return
-                    
-                    activities = await resp.json()
-                    
-                    if not activities:
-                        return
-                    
-                    # Filter for trades only
-                    trades = []
-                    for a in activities:
-                        if a.get('type') == 'TRADE' or a.get('side') in ['BUY', 'SELL']:
-                            trades.append(a)
-                    
-                    if not initial and trades:
-                        # Find new ones for debug
-                        new_trades = [t for t in trades if (t.get('id') or t.get('transactionHash')) not in self.seen_ids]
-                        if new_trades:
-                            debug(f"Found {len(new_trades)} new trades for target")
-                    
-                    # Sort by timestamp ascending to process oldest first
-                    trades.sort(key=lambda x: x.get('timestamp', 0))
-
-                    for trade in trades:
-                        trade_id = trade.get('id') or trade.get('transactionHash')
-                        
-                        if trade_id in self.seen_ids:
-                            continue
-                        
-                        self.seen_ids.add(trade_id)
-                        
-                        if not initial:
-                            # Map activity fields to trade payload
-                            # Activity data has 'side': 'BUY'/'SELL'
-                            side_val = trade.get('side') or trade.get('type', '')
-                            
-                            payload = {
-                                'conditionId': trade.get('conditionId'), 
-                                'outcome': trade.get('outcome'),
-                                'side': side_val.upper(),
-                                'price': float(trade.get('price', 0)),
-                                'size': float(trade.get('size', 0)),
-                                'size_usd': float(trade.get('usdcSize', 0)), # Activity API uses usdcSize
-                                'asset': trade.get('asset'),
-                                'token_id': trade.get('asset'), 
-                                'timestamp': trade.get('timestamp'),
-                                'transactionHash': trade.get('transactionHash'),
-                                'title': trade.get('title', ''),
-                                'slug': trade.get('slug', ''),
-                                'proxyWallet': Config.TRADER_ADDRESS # We know it's them
-                            }
-                            
-                            trade_detect(f"New Trade: {payload['title'][:40]} | {payload['outcome']} @ {payload['price']}")
-                            await self.queue.put(payload)
-                    
-                    # Keep set size manageable
-                    if len(self.seen_ids) > 500:
-                        self.seen_ids = set(list(self.seen_ids)[-250:])
-                        
+                        if retry_after.isdigit():
+                            self.last_retry_after = float(retry_after)
+                        return None
+                    activities = loads(await resp.read())
+                    return activities if isinstance(activities, list) else []
+        except outbound.CircuitOpenError as e:
+            # data-api is failing for every subsystem: wait for the breaker's next probe
+            debug(str(e))
+            self.last_retry_after = e.retry_in
+            return None
+
+    async def _fetch_new(self, initial: bool) -> Optional[list]:
+        """Latest page on a cold start; otherwise everything after the cursor, oldest first"""
+        params = {
+            "user": self.target.proxy.lower(),
+            "type": "TRADE",
+            "limit": str(Config.POLL_PAGE_SIZE)
+        }
+        if initial:
+            params["sortDirection"] = "DESC"
+            return await self._fetch_page(params)
+
+        params.update({
+            "start": str(self.cursor_ts),
+            "sortBy": "TIMESTAMP",
+            "sortDirection": "ASC"
+        })
+        activities = []
+        for page in range(Config.POLL_MAX_PAGES):
+            params["offset"] = str(page * Config.POLL_PAGE_SIZE)
+            batch = await self._fetch_page(params)
+            if batch is None:
+                # Keep what we got; the cursor only advances past delivered trades
+                break
+            activities.extend(batch)
+            if len(batch) < Config.POLL_PAGE_SIZE:
+                break
+        else:
+            warning(f"Activity burst exceeded {Config.POLL_MAX_PAGES} pages; remainder picked up next poll")
+        return activities
+
+    async def _poll(self, initial: bool = False) -> Optional[int]:
+        """Returns the number of new trades queued, or None if the fetch failed"""
+        try:
+            try:
+                with STAGE_SECONDS.time(stage='activity_fetch'):
+                    activities = await self._fetch_new(initial)
+            except Exception:
+                ACTIVITY_POLLS.inc(trader=self.target.label, result="error")
+                raise
+            ACTIVITY_POLLS.inc(trader=self.target.label, result="error" if activities is None else "ok")
+            if activities is None:
+                return None
+            if initial:
+                self.primed = True
+            if not activities:
+                return 0
+
+            # Filter for trades only
+            trades = [a for a in activities if a.get('type') == 'TRADE' or a.get('side') in ['BUY', 'SELL']]
+
+            # Sort by timestamp ascending to process oldest first
+            trades.sort(key=lambda x: int(x.get('timestamp', 0) or 0))
+
+            new_count = 0
+            advanced = False
+            for trade in trades:
+                key = trade_key(trade)
+                ts = int(trade.get('timestamp', 0) or 0)
+
+                if ts < self.cursor_ts or (ts == self.cursor_ts and key in self.cursor_keys):
+                    continue
+
+                # Confirmed by the poll: the cursor moves past it even if the stream already queued it
+                if ts > self.cursor_ts:
+                    self.cursor_ts = ts
+                    self.cursor_keys = []
+                self.cursor_keys.append(key)
+                advanced = True
+
+                if key in self.seen_ids or self.streamed.pop(key, None) is not None:
+                    continue
+                self.seen_ids.add(key)
+
+                if not initial:
+                    new_count += 1
+                    await self.queue.put(self._build_event(trade))
+
+            if new_count:
+                debug(f"Found {new_count} new trades for {self.target.label}")
+            if initial or advanced:
+                self._save_cursor()
+            return new_count
+
         except Exception as e:
             error(f"Fetch error: {e}")
+            return None
+
+    def _build_event(self, trade: dict) -> TradeEvent:
+        # Only trades that passed dedupe are parsed; detected_at is wall clock, comparable with the trade's timestamp
+        payload = TradeEvent.from_activity(trade, self.target, detected_at=time.time())
+        TRADES_SEEN.inc(trader=self.target.label)
+        trade_detect(f"New Trade [{self.target.label}]: {payload.title[:40]} | {payload.outcome} @ {payload.price}")
+        return payload
+
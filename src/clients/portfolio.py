@@ -0,0 +1,53 @@
+import asyncio
+import time
+from typing import List
+from ..config import Config
+from ..manager import AccountManager
+from ..targets import TraderTarget
+from ..utils.logger import info, warning
+from ..utils.api_helper import get_trader_portfolio_value
+
+
+class PortfolioRefresher:
+    """
+    Keeps every tracked trader's portfolio value fresh in the background so the
+    classifier's sizing input is always a cached read, never a network call.
+    A failed refresh keeps the last good value; its age is visible through
+    AccountManager.get_portfolio_age (and is_portfolio_fallback until the first success).
+    """
+    def __init__(self, targets: List[TraderTarget], account_manager: AccountManager):
+        self.targets = targets
+        self.account_manager = account_manager
+        self.is_running = False
+
+    async def refresh_target(self, target: TraderTarget) -> bool:
+        value = await get_trader_portfolio_value(target.proxy)
+        if value is None:
+            age = self.account_manager.get_portfolio_age(target.key)
+            if age is None:
+                # Never had a good value - seed the fallback so allocation math has a denominator
+                self.account_manager.set_trader_portfolio_value(target.key, Config.TRADER_PORTFOLIO_FALLBACK_USD, fallback=True)
+                warning(f"Portfolio value for {target.label} unavailable; using fallback ${Config.TRADER_PORTFOLIO_FALLBACK_USD:.2f}")
+            elif self.account_manager.is_portfolio_fallback(target.key):
+                warning(f"Portfolio value for {target.label} still unavailable; using fallback "
+                        f"${Config.TRADER_PORTFOLIO_FALLBACK_USD:.2f} ({age / 60:.0f} min)")
+            elif age > Config.PORTFOLIO_STALE_SECONDS:
+                warning(f"Portfolio value for {target.label} is stale ({age / 60:.0f} min old)")
+            return False
+
+        # Single assignment of (value, timestamp) - readers never see a torn update
+        self.account_manager.set_trader_portfolio_value(target.key, value)
+        info(f"Trader Portfolio Value [{target.label}]: ${value:.2f}")
+        return True
+
+    async def refresh_all(self):
+        await asyncio.gather(*(self.refresh_target(t) for t in self.targets))
+
+    async def start(self):
+        self.is_running = True
+        while self.is_running:
+            await asyncio.sleep(Config.PORTFOLIO_REFRESH_SECONDS)
+            await self.refresh_all()
+
+    async def stop(self):
+        self.is_running = False
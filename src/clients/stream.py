@@ -0,0 +1,137 @@
+import asyncio
+import json
+import random
+from typing import Awaitable, Callable, Optional
+import websockets
+from ..config import Config
+from ..utils.logger import info, error, debug, warning
+from ..utils.json_codec import loads
+
+SUBSCRIBE_MESSAGE = {
+    "action": "subscribe",
+    "subscriptions": [{"topic": "activity", "type": "trades"}]
+}
+
+
+def normalize_activity(message: dict) -> Optional[dict]:
+    """
+    RTDS trade message -> Activity API shaped dict (what TradePoller consumes).
+    Returns None for anything that is not a trade.
+    """
+    if message.get("topic") != "activity" or message.get("type") not in ("trades", "TRADE"):
+        return None
+    payload = message.get("payload")
+    if not isinstance(payload, dict) or not payload.get("proxyWallet"):
+        return None
+
+    activity = dict(payload)
+    activity["type"] = "TRADE"
+    ts = activity.get("timestamp") or message.get("timestamp") or 0
+    ts = int(float(ts))
+    # RTDS may stamp in milliseconds; the Activity API uses seconds
+    activity["timestamp"] = ts // 1000 if ts > 10**12 else ts
+    if not activity.get("usdcSize") and activity.get("size") and activity.get("price"):
+        activity["usdcSize"] = float(activity["size"]) * float(activity["price"])
+    return activity
+
+
+class TradeStream:
+    """
+    Push-based trade ingestion over the real-time data WebSocket.
+
+    Every trade message is normalized and handed to on_activity; on_state(True/False)
+    reports connectivity so the monitor can flip pollers between backstop and
+    primary mode. Reconnects with jittered backoff; on each (re)connect the
+    monitor triggers a catch-up poll from the persisted cursor (resume).
+
+    Config.RTDS_URL can point at a local stand-in server (e.g. ws://127.0.0.1:8765).
+    """
+    def __init__(self, on_activity: Callable[[dict], Awaitable[None]], on_state: Callable[[bool], None], url: str = None):
+        self.url = url or Config.RTDS_URL
+        self.on_activity = on_activity
+        self.on_state = on_state
+        self.is_running = False
+        self.connected = False
+        self.reconnects = 0
+        self._ws = None
+        self._stop = asyncio.Event() # Cuts the reconnect backoff short
+
+    def _set_connected(self, connected: bool):
+        if connected != self.connected:
+            self.connected = connected
+            self.on_state(connected)
+
+    async def start(self):
+        self.is_running = True
+        self._stop.clear()
+        attempt = 0
+        while self.is_running:
+            try:
+                async with websockets.connect(self.url, ping_interval=None, open_timeout=10) as ws:
+                    self._ws = ws
+                    await ws.send(json.dumps(SUBSCRIBE_MESSAGE))
+                    info(f"Trade stream connected: {self.url}")
+                    attempt = 0
+                    self._set_connected(True)
+                    await self._consume(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.is_running:
+                    warning(f"Trade stream disconnected: {e}")
+            finally:
+                self._ws = None
+                self._set_connected(False)
+
+            if not self.is_running:
+                break
+            attempt += 1
+            self.reconnects += 1
+            delay = random.uniform(0, min(Config.STREAM_RECONNECT_MAX_SECONDS, 2 ** attempt))
+            debug(f"Trade stream reconnecting in {delay:.1f}s (polling is primary meanwhile)")
+            try:
+                await asyncio.wait_for(self._stop.wait(), delay)
+                break
+            except asyncio.TimeoutError:
+                pass
+
+    async def _consume(self, ws):
+        ping_task = asyncio.create_task(self._ping(ws))
+        try:
+            while self.is_running:
+                # A silent socket is treated as dead - fall back to polling and reconnect
+                raw = await asyncio.wait_for(ws.recv(), Config.STREAM_STALE_SECONDS)
+                if not raw or raw in ("pong", b"pong"):
+                    continue
+                try:
+                    data = loads(raw)
+                except ValueError:
+                    continue
+                for message in data if isinstance(data, list) else [data]:
+                    if not isinstance(message, dict):
+                        continue
+                    activity = normalize_activity(message)
+                    if activity:
+                        await self.on_activity(activity)
+        except asyncio.TimeoutError:
+            warning(f"Trade stream silent for {Config.STREAM_STALE_SECONDS}s")
+        finally:
+            ping_task.cancel()
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(Config.STREAM_PING_SECONDS)
+            try:
+                await ws.send("ping")
+            except Exception:
+                return
+
+    async def stop(self):
+        self.is_running = False
+        self._stop.set()
+        if self._ws is not None:
+            try:
+                await self._ws.close()
+            except Exception as e:
+                error(f"Trade stream close failed: {e}")
+        info("Trade stream stopped.")
@@ -31,9 +31,16 @@ class Config:
     # Normal Bet Criteria (Now INVENTORY Mode A)
     NORMAL_PRICE_MIN_CENTS = 5
     NORMAL_PRICE_MAX_CENTS = 85 # Cap Inventory building at 85 cents (avoid late convex)
+    NORMAL_MAX_PORTFOLIO_ALLOCATION = 0.05 # Trader size <= 5% of HIS portfolio (Raised from 1% to catch larger drips)
     NORMAL_MIN_ADJACENT_BUCKETS = 2
     NORMAL_MIN_TRADE_SIZE_USD = 5.0 # This matches the Trader's size, not ours. Ours is dynamic.
     NORMAL_MIN_HOURS_BEFORE_RESOLUTION = 3
+
+    # Strategy mode: "INVENTORY" mirrors each qualifying trade immediately (Mode A drip);
+    # "CLUSTER" waits until the trader has spread exposure across several buckets
+    STRATEGY_MODE = os.getenv("STRATEGY_MODE", "INVENTORY")
+    CLUSTER_WINDOW_MINUTES = 60
+    CLUSTER_MIN_EXPOSURE_RATIO = 0.04 # Of the trader's portfolio, summed across the window
     
     # 4️⃣ CERTAINTY BET EXECUTION
     CERTAINTY_MAX_PER_BET_RATIO = 0.10 # 10% of Total Capital (capped at pool limits too)
@@ -61,16 +68,127 @@ class Config:
     RPC_URL = os.getenv("RPC_URL")
     PROXY_WALLET_ADDRESS = os.getenv("PROXY_WALLET_ADDRESS")
     TRADER_ADDRESS = os.getenv("TRADER_ADDRESS")
+    TRADER_ADDRESSES = os.getenv("TRADER_ADDRESSES") # Comma-separated, optional ":scale" per entry (overrides TRADER_ADDRESS)
 
     # 8️⃣ RELAY / BUILDER CONFIG
     RELAYER_URL = "https://relayer-v2.polymarket.com"
     POLY_BUILDER_API_KEY = os.getenv("POLY_BUILDER_API_KEY")
     POLY_BUILDER_SECRET = os.getenv("POLY_BUILDER_SECRET")
     POLY_BUILDER_PASSPHRASE = os.getenv("POLY_BUILDER_PASSPHRASE")
+
+    # 9️⃣ HTTP CLIENT (shared keep-alive pool)
+    HTTP_POOL_LIMIT = 100
+    HTTP_POOL_LIMIT_PER_HOST = 20
+    HTTP_DNS_CACHE_TTL_SECONDS = 300
+    HTTP_KEEPALIVE_TIMEOUT_SECONDS = 60 # Keep sockets warm between 3s polls
+    HTTP_DEFAULT_TIMEOUT_SECONDS = 10
+
+    # 🔟 MARKET METADATA CACHE
+    MARKET_CACHE_TTL_SECONDS = 6 * 3600 # Entries also expire at the market's end_date_iso
+    MARKET_CACHE_MAX_ENTRIES = 2000
+    MARKET_CACHE_FILE = os.getenv("MARKET_CACHE_FILE", "market_cache.json") # Empty string disables persistence
+    MARKET_CACHE_SAVE_INTERVAL_SECONDS = 60
+    MARKET_LOOKUP_NEGATIVE_TTL_SECONDS = 2.0 # A failed/empty Gamma lookup is replayed to other callers this long
+
+    # 1️⃣1️⃣ MARKET UNIVERSE PREFETCH
+    MARKET_INDEX_REFRESH_SECONDS = 15 * 60 # New daily markets get listed ahead of time
+    MARKET_INDEX_PAGE_SIZE = 500
+    MARKET_INDEX_MAX_PAGES = 100
+
+    # 1️⃣2️⃣ TRADE PIPELINE
+    PIPELINE_WORKERS = 8 # Markets processed concurrently (same market is always sequential)
+
+    # 1️⃣3️⃣ ORDER EXECUTION (CLOB signing/posting thread pool)
+    EXECUTION_WORKERS = 4
+    EXECUTION_MAX_PENDING = 16
+    EXECUTION_SIGN_TIMEOUT_SECONDS = 5
+    EXECUTION_POST_TIMEOUT_SECONDS = 10
+
+    # 1️⃣4️⃣ BALANCE SERVICE
+    BALANCE_CACHE_TTL_SECONDS = 2.0 # ~1 Polygon block; invalidated locally after each order
+    BALANCE_ERROR_TTL_SECONDS = 1.0 # A failed RPC read is replayed to other callers this long
+
+    # 1️⃣5️⃣ ACTIVITY POLLING
+    POLL_CURSOR_FILE = os.getenv("POLL_CURSOR_FILE", "poller_cursor.json") # Empty string disables persistence
+    POLL_PAGE_SIZE = 100
+    POLL_MAX_PAGES = 10 # Per poll; a bigger burst continues on the next poll
+    POLL_SEEN_MAX = 2000
+    POLL_INTERVAL_SECONDS = 3           # Baseline interval
+    POLL_MIN_INTERVAL_SECONDS = 0.5     # Floor right after a detected trade
+    POLL_MAX_INTERVAL_SECONDS = 30      # Ceiling while the trader is idle
+    POLL_HOT_WINDOW_SECONDS = 120       # Stay at the floor this long after the last trade
+    POLL_IDLE_BACKOFF_FACTOR = 1.5
+    POLL_REQUEST_BUDGET_PER_MINUTE = 120
+    POLL_ERROR_BACKOFF_BASE_SECONDS = 1
+    POLL_ERROR_BACKOFF_MAX_SECONDS = 60
+    POLL_GLOBAL_REQUESTS_PER_SECOND = 8 # Shared by all tracked traders
+    POLL_GLOBAL_BURST = 8
+
+    # 1️⃣6️⃣ STREAMING INGESTION (WebSocket, falls back to polling)
+    INGEST_MODE = os.getenv("INGEST_MODE", "poll") # "poll" | "stream"
+    RTDS_URL = os.getenv("RTDS_URL", "wss://ws-live-data.polymarket.com")
+    STREAM_PING_SECONDS = 5
+    STREAM_STALE_SECONDS = 30 # No message for this long -> reconnect
+    STREAM_RECONNECT_MAX_SECONDS = 30
+    STREAM_BACKSTOP_POLL_SECONDS = 15 # Poll interval while the stream is healthy
+
+    # 1️⃣7️⃣ LOGGING (background writer)
+    LOG_QUEUE_MAX = 10000 # Lines buffered before new ones are dropped
+    LOG_BATCH_SIZE = 256
+    LOG_FLUSH_INTERVAL_SECONDS = 0.5
+    LOG_MAX_BYTES = 50 * 1024 * 1024 # Rotate within a day past this size
+    LOG_BACKUP_COUNT = 5
+
+    # 1️⃣8️⃣ TRADER PORTFOLIO VALUATION (background refresh)
+    PORTFOLIO_REFRESH_SECONDS = 3600
+    PORTFOLIO_STALE_SECONDS = 3 * 3600 # Warn when the last good value is older than this
+    PORTFOLIO_POSITIONS_PAGE_SIZE = 500
+    PORTFOLIO_POSITIONS_CONCURRENCY = 4 # Pages fetched in parallel per batch
+    PORTFOLIO_POSITIONS_MAX_PAGES = 40
+    TRADER_PORTFOLIO_FALLBACK_USD = 1600.0 # Used only until the first successful refresh (approx value of a small whale)
+
+    # 1️⃣9️⃣ API ENDPOINTS (overridable to point at local stand-ins, e.g. the latency benchmark)
+    DATA_API_URL = os.getenv("DATA_API_URL", "https://data-api.polymarket.com")
+    GAMMA_API_URL = os.getenv("GAMMA_API_URL", "https://gamma-api.polymarket.com")
+    CLOB_API_URL = os.getenv("CLOB_API_URL", "https://clob.polymarket.com")
+
+    # 2️⃣0️⃣ METRICS (Prometheus text format on GET /metrics)
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9464")) # 0 disables the endpoint
+
+    # 2️⃣1️⃣ EVENT LOOP MONITOR & PROFILER
+    LOOP_MONITOR_INTERVAL_SECONDS = 0.05
+    LOOP_STALL_THRESHOLD_SECONDS = 0.1 # Heartbeat this late = stall; the loop thread's stack is logged
+    PROFILE_SAMPLE_INTERVAL_SECONDS = 0.01 # ~100 Hz
+    PROFILE_DEFAULT_SECONDS = 30 # SIGUSR1, or GET /debug/profile without ?seconds=
+    PROFILE_MAX_SECONDS = 300
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+    # 2️⃣2️⃣ HEDGED GAMMA LOOKUPS (second request once the first is slower than the observed p95)
+    GAMMA_CONDITION_BUDGET_SECONDS = 2.0 # Whole lookup incl. hedge (was a flat 5s timeout)
+    GAMMA_TOKEN_BUDGET_SECONDS = 2.0     # The chained full-market fetch has its own budget
+    HEDGE_QUANTILE = 0.95
+    HEDGE_WINDOW = 200 # Latency samples kept per endpoint
+    HEDGE_MIN_SAMPLES = 20 # Below this the default delay is used
+    HEDGE_DEFAULT_DELAY_SECONDS = 0.5
+    HEDGE_MIN_DELAY_SECONDS = 0.05
+    HEDGE_MAX_DELAY_SECONDS = 1.0
+    HEDGE_BUDGET_RATIO = 0.05 # Hedges earned per primary request (<= ~5% extra Gamma load)
+    HEDGE_BUDGET_BURST = 5
+
+    # 2️⃣3️⃣ OUTBOUND RATE LIMITS & CIRCUIT BREAKERS (per Polymarket host, shared by every client)
+    OUTBOUND_RATE_LIMITS = {"data": (15, 30), "gamma": (15, 30), "clob": (10, 20)} # host -> (requests/s, burst)
+    OUTBOUND_BACKGROUND_RESERVE_RATIO = 0.25 # Share of each bucket background calls leave for orders/enrichment
+    OUTBOUND_THROTTLE_PAUSE_SECONDS = 2.0    # Host-wide pause on a 429 without Retry-After
+    OUTBOUND_MIN_RATE_RATIO = 0.1            # 429s halve the rate down to this share of the configured one
+    OUTBOUND_RATE_RECOVERY_STEP = 0.02       # Share of the configured rate restored per successful request
+    CIRCUIT_FAILURE_THRESHOLD = 5 # Consecutive 429/5xx/network failures that open a host's circuit
+    CIRCUIT_OPEN_SECONDS = 5
+    CIRCUIT_MAX_OPEN_SECONDS = 60 # Cooldown doubles after each failed half-open probe
     
     @classmethod
     def validate(cls):
         if not cls.PRIVATE_KEY:
             raise ValueError("PRIVATE_KEY not set in .env")
-        if not cls.TRADER_ADDRESS:
-            raise ValueError("TRADER_ADDRESS not set in .env")
+        if not cls.TRADER_ADDRESS and not cls.TRADER_ADDRESSES:
+            raise ValueError("TRADER_ADDRESS (or TRADER_ADDRESSES) not set in .env")
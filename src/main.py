@@ -1,29 +1,45 @@
 import asyncio
-import time
+from datetime import datetime
 from .config import Config
 from .manager import AccountManager
-from .strategy import Strategy
 from .monitor import TradeMonitor
-from .utils.logger import header, info, warning, error, success
+from .pipeline import TradePipeline
+from .targets import load_targets
+from .utils.logger import header, info, warning, error, success, shutdown_logging
 from .utils.create_clob_client import create_clob_client
-from .utils.api_helper import fetch_market_data, get_trader_portfolio_value, fetch_recent_trades, fetch_market_by_token
+from .utils.api_helper import fetch_recent_trades
+from .utils.http_client import close_session
+from .utils.market_cache import market_cache
+from .utils.balance_service import balance_service
+from .utils.metrics import metrics, start_metrics_server
+from .utils.loop_monitor import LoopMonitor
 from .clients.relay import RelayClient
-from py_clob_client.clob_types import OrderArgs, OrderType
-from py_clob_client.order_builder.constants import BUY, SELL
+from .clients.market_index import MarketIndex
+from .clients.execution import ExecutionService
+from .clients.portfolio import PortfolioRefresher
 
 async def main():
     header("POLY WEATHER MASTER BOT")
-    
+
+    # First thing: startup still makes blocking calls (CLOB auth), which should show up too
+    loop_monitor = LoopMonitor()
+    loop_monitor.start()
+
     try:
         Config.validate()
-        # Resolve Trader EOA -> Proxy for RTDS Monitoring
+        targets = load_targets()
+        if not targets:
+            raise ValueError("No valid trader addresses configured")
+        # Resolve each Trader EOA -> Proxy for RTDS Monitoring
         from .utils.resolve_proxy import resolve_to_proxy
-        target_proxy = resolve_to_proxy(Config.TRADER_ADDRESS)
         # We track the proxy if resolved, otherwise fallback to EOA
-        Config.TRADER_ADDRESS = target_proxy 
-        info(f"Configuration validated. Tracking: {Config.TRADER_ADDRESS}")
+        proxies = await asyncio.gather(*(resolve_to_proxy(target.address) for target in targets))
+        for target, proxy in zip(targets, proxies):
+            target.proxy = proxy
+        info(f"Configuration validated. Tracking: {', '.join(f'{t.proxy} (x{t.scale:g})' for t in targets)}")
     except Exception as e:
         error(f"Configuration error: {e}")
+        await loop_monitor.stop()
         return
 
     # Initialize Relay Client (for safe management/gasless ops)
@@ -32,223 +48,111 @@ async def main():
 
     account_manager = AccountManager()
     
-    # Initial Portfolio Value Fetch
-    info("Fetching Trader Portfolio Value...")
-    account_manager.trader_portfolio_value = get_trader_portfolio_value(Config.TRADER_ADDRESS)
-    account_manager.last_portfolio_update = time.time()
-    info(f"Trader Portfolio Value: ${account_manager.trader_portfolio_value:.2f}")
+    # Initial Portfolio Value Fetch (all targets concurrently); refreshed in the background afterwards
+    info("Fetching Trader Portfolio Values...")
+    portfolio_refresher = PortfolioRefresher(targets, account_manager)
+    await portfolio_refresher.refresh_all()
+
+    # Warm restart: known markets skip Gamma entirely
+    market_cache.load()
+    cache_task = asyncio.create_task(market_cache.autosave(Config.MARKET_CACHE_SAVE_INTERVAL_SECONDS))
+
+    # Prefetch the active market universe so enrichment is a dict lookup
+    market_index = MarketIndex()
+    try:
+        await market_index.refresh()
+    except Exception as e:
+        warning(f"Market index prefetch failed, falling back to per-trade lookups: {e}")
 
     trade_queue = asyncio.Queue()
-    monitor = TradeMonitor(trade_queue)
+    monitor = TradeMonitor(trade_queue, targets)
     
     # Create CLOB Client
     clob_client = await create_clob_client()
     
     if not account_manager.check_daily_guardrails():
         error(f"Daily guardrails triggered. Halting trading.")
+        await loop_monitor.stop()
         return
 
-    # Log last 5 trades from target
-    info("Fetching last 5 trades from target address...")
-    recent_trades = await fetch_recent_trades(Config.TRADER_ADDRESS, limit=5)
-
-    if recent_trades:
-        header("RECENT TARGET ACTIVITY (Last 5 Trades)")
-        for i, trade in enumerate(recent_trades, 1):
-            title = trade.get('title', 'Unknown')[:40]
-            outcome = trade.get('outcome', '?')
-            price = float(trade.get('price', 0))
-            size = float(trade.get('size', 0))
-            side = trade.get('side', '?')
-            timestamp = trade.get('timestamp', 0)
-            
-            from datetime import datetime
-            time_str = datetime.fromtimestamp(int(timestamp)).strftime('%Y-%m-%d %H:%M') if timestamp else 'Unknown'
-            
-            info(f"#{i} [{time_str}] {side} {outcome} @ ${price:.2f} | Size: {size:.2f} | {title}...")
-    else:
-        warning("No recent trades found for target address")
-    info("-" * 50)
+    # Log last 5 trades from each target
+    for target in targets:
+        info(f"Fetching last 5 trades from {target.proxy}...")
+        recent_trades = await fetch_recent_trades(target.proxy, limit=5)
+
+        if recent_trades:
+            header(f"RECENT TARGET ACTIVITY [{target.label}] (Last 5 Trades)")
+            for i, trade in enumerate(recent_trades, 1):
+                title = trade.get('title', 'Unknown')[:40]
+                outcome = trade.get('outcome', '?')
+                price = float(trade.get('price', 0))
+                size = float(trade.get('size', 0))
+                side = trade.get('side', '?')
+                timestamp = trade.get('timestamp', 0)
+                
+                time_str = datetime.fromtimestamp(int(timestamp)).strftime('%Y-%m-%d %H:%M') if timestamp else 'Unknown'
+                
+                info(f"#{i} [{time_str}] {side} {outcome} @ ${price:.2f} | Size: {size:.2f} | {title}...")
+        else:
+            warning(f"No recent trades found for {target.proxy}")
+        info("-" * 50)
 
     monitor_task = asyncio.create_task(monitor.start())
+    index_task = asyncio.create_task(market_index.start())
+    portfolio_task = asyncio.create_task(portfolio_refresher.start())
     info("State: WAITING FOR TRADES...")
     
-    try:
-        while True:
-            # Update trader portfolio cached value every hour
-            if time.time() - account_manager.last_portfolio_update > 3600:
-                 account_manager.trader_portfolio_value = get_trader_portfolio_value(Config.TRADER_ADDRESS)
-                 account_manager.last_portfolio_update = time.time()
-            
-            trade_data = await trade_queue.get()
-            
-            try:
-                # 0️⃣ Pre-Filter: Use Trade Data Title (Skip Gamma API for non-weather)
-                title_lower = trade_data.get('title', '').lower()
-                if 'london' not in title_lower or 'temperature' not in title_lower:
-                    info(f"Skipping non-weather trade: {trade_data.get('title', 'Unknown')[:50]}")
-                    continue
-
-                # 1. Fetch Real Market Data via Asset (Token) ID
-                # Use Token ID (asset) which is reliable, unlike conditionId from Activity API
-                token_id = trade_data.get('asset')
-                market_data = await fetch_market_by_token(token_id)
-                
-                if not market_data:
-                    warning(f"Could not fetch market data for token {token_id}")
-                    continue
-                
-                # Update market_id from the authoritative Gamma response
-                market_id = market_data.get('condition_id')
-
-                
-                # Debug logging for filter
-                info(f"Trade received: {trade_data.get('outcome')} on market {market_id}")
-                info(f"Market category: {market_data.get('category')}, question: {market_data.get('question')[:50]}")
+    execution = ExecutionService(clob_client)
+    pipeline = TradePipeline(trade_queue, account_manager, market_index, execution, targets)
+    info(f"Trade pipeline running with {Config.PIPELINE_WORKERS} workers.")
+
+    # Scrape-time gauges: read straight off the live objects, nothing to update on the hot path
+    metrics.gauge("polybot_trade_queue_depth", "Detected trades waiting for the dispatcher", callback=trade_queue.qsize)
+    metrics.gauge("polybot_pipeline_lane_backlog", "Trades queued in per-market lanes", callback=pipeline.backlog)
+    metrics.gauge("polybot_pipeline_active_lanes", "Markets with trades being processed", callback=lambda: pipeline.active_lanes)
+    metrics.gauge("polybot_execution_queue_depth", "CLOB calls waiting for a worker thread", callback=lambda: execution.queue_depth)
+    metrics.gauge("polybot_execution_in_flight", "CLOB calls running on a worker thread", callback=lambda: execution.in_flight)
+    metrics.gauge("polybot_flip_window_entries", "(trader, market, outcome) sides held for flip detection",
+                  callback=lambda: account_manager.flip_window_size)
+    metrics.track_caches({"market": market_cache, "balance": balance_service})
+
+    def poller_stat(key):
+        def collect():
+            stats = {(p.target.label,): p.scheduler.stats()[key] for p in monitor.pollers}
+            return {labels: value for labels, value in stats.items() if value is not None}
+        return collect
+    metrics.gauge("polybot_poll_interval_seconds", "Current adaptive poll interval per trader", ["trader"],
+                  callback=poller_stat("interval"))
+    metrics.gauge("polybot_detection_lag_seconds", "Trade timestamp to detection, most recent detection", ["trader"],
+                  callback=poller_stat("last_detection_lag"))
+    metrics.gauge("polybot_detection_lag_avg_seconds", "Trade timestamp to detection, EWMA", ["trader"],
+                  callback=poller_stat("avg_detection_lag"))
+    metrics_server = await start_metrics_server()
+    if metrics_server:
+        metrics_server.add_route("/debug/profile", loop_monitor.profile_endpoint)
 
-                # 2. Market Filter
-                if not Strategy.is_valid_market(market_data):
-                    info(f"Skipping trade: Invalid market category/question")
-                    continue
-                
-                # Flip Protection
-                if account_manager.is_flip(
-                    market_id=market_id,
-                    outcome=trade_data.get('outcome', ''),
-                    side=trade_data.get('side', '')
-                ):
-                    warning(f"Skipping trade: FLIP DETECTED on {trade_data.get('outcome')}")
-                    continue
-
-                # 3. Classify
-                trade_size_usd = float(trade_data.get('size_usd', 0))
-                if trade_size_usd == 0:
-                     trade_size_usd = float(trade_data.get('size', 0)) * float(trade_data.get('price', 0))
-                     trade_data['size_usd'] = trade_size_usd
-                
-                trader_alloc = trade_size_usd / max(1, account_manager.trader_portfolio_value)
-                
-                classification, reason = Strategy.classify_trade(trade_data, market_data, trader_alloc)
-                
-                if classification:
-                    info(f"Trade CLASSIFIED as {classification}: {reason}")
-                else:
-                    info(f"Trade SKIPPED: {reason}")
-                    trade_queue.task_done()
-                    continue
-                
-                from .utils.get_my_balance import get_my_balance
-                current_balance = get_my_balance(Config.PROXY_WALLET_ADDRESS)
-                
-                # Low Balance Check
-                if current_balance < 5.0: # Minimum $5 to operate
-                     warning(f"Low Balance (${current_balance:.2f}). Skipping trades.")
-                     # We can choose to halt or just skip
-                     # For now, just skip logic
-                     trade_queue.task_done()
-                     continue
-
-                account_manager.update_balance(current_balance)
-                
-                if classification == "CERTAINTY":
-                    # For Certainty Mode B, we are now extremely cautious
-                    # Max size is HARD CAPPED at MAX_SINGLE_TRADE_RATIO (0.25%)
-                    # We treat it same as max inventory drip
-                    
-                    max_drip = current_balance * Config.MAX_SINGLE_TRADE_RATIO
-                    size = max_drip # Always just drip, never go big
-                    
-                    if size > 0:
-                        success(f"EXECUTING CERTAINTY BET (CAPPED): ${size:.2f} on {trade_data['outcome']}")
-                        try:
-                            price = float(trade_data.get('price', 0.50))
-                            shares_size = size / price
-                            
-                            order_args = OrderArgs(
-                                price=price,
-                                size=shares_size, 
-                                side=BUY if trade_data.get('side') == 'BUY' else SELL,
-                                token_id=trade_data.get('asset')
-                            )
-                            
-                            tick_size = market_data.get("minimum_tick_size", "0.01")
-                            neg_risk = market_data.get("neg_risk", False)
-
-                            signed_order = clob_client.create_order(
-                                order_args, 
-                                options={"tick_size": str(tick_size), "neg_risk": neg_risk}
-                            )
-                            
-                            if not account_manager.check_market_cap(market_id, size, current_balance):
-                                warning(f"Skipping Certainty Bet: Market Cap hit for {market_id}")
-                                trade_queue.task_done()
-                                continue
-
-                            resp = clob_client.post_order(signed_order, OrderType.GTC)
-                            success(f"Order Placed (Certainty Capped): {resp}")
-                            account_manager.record_exposure(size, market_id)
-                        except Exception as e:
-                            error(f"Order Execution Failed: {e}")
-
-                elif classification == "INVENTORY":
-                    # INVENTORY MODE (Mode A) implementation
-                    # No accumulator wait - immediate execution
-                    # Size capped at 0.25% of OUR portfolio
-                    
-                    max_drip = current_balance * Config.MAX_SINGLE_TRADE_RATIO
-                    # Optionally scale down if pool is low, but usually just fixed drip
-                    size = max_drip
-                    
-                    if size > 0:
-                        success(f"EXECUTING INVENTORY BET: ${size:.2f} on {trade_data['outcome']}")
-                        try:
-                            # Use Limit order at trade price
-                            price = float(trade_data.get('price', 0.50))
-                            shares_size = size / price
-                            
-                            order_args = OrderArgs(
-                                price=price,
-                                size=shares_size, # Shares
-                                side=BUY if trade_data.get('side') == 'BUY' else SELL,
-                                token_id=trade_data.get('asset')
-                            )
-                            
-                            tick_size = market_data.get("minimum_tick_size", "0.01")
-                            neg_risk = market_data.get("neg_risk", False)
-
-                            signed_order = clob_client.create_order(
-                                order_args,
-                                options={"tick_size": str(tick_size), "neg_risk": neg_risk}
-                            )
-                            
-                            if not account_manager.check_market_cap(market_id, size, current_balance):
-                                warning(f"Skipping Inventory Bet: Market Cap hit for {market_id}")
-                                trade_queue.task_done()
-                                continue
-
-                            resp = clob_client.post_order(signed_order, OrderType.GTC)
-                            success(f"Order Placed (Inventory): {resp}")
-                            
-                            # Add to accumulator just for tracking/logging if relevant later, 
-                            # but we don't block on it.
-                            # We can also track exposure here.
-                            account_manager.record_exposure(size, market_id)
-                            
-                        except Exception as e:
-                            error(f"Inventory Order Failed: {e}")
-                    else:
-                        warning("Skipping Inventory Bet: Size near zero")
-
-            except Exception as e:
-                error(f"Error processing trade: {e}")
-            finally:
-                trade_queue.task_done()
-            
+    try:
+        await pipeline.run()
     except KeyboardInterrupt:
         info("Stopping bot...")
     finally:
+        if metrics_server:
+            await metrics_server.stop()
         await monitor.stop()
         await monitor_task
+        await pipeline.stop()
+        execution.shutdown()
+        await market_index.stop()
+        index_task.cancel()
+        await portfolio_refresher.stop()
+        portfolio_task.cancel()
+        cache_task.cancel()
+        market_cache.save()
+        account_manager.store.close()
+        await balance_service.close()
+        await close_session()
+        await loop_monitor.stop()
+        shutdown_logging()
 
 if __name__ == "__main__":
     try:
@@ -1,71 +1,159 @@
-import json
 import time
-import os
+from collections import OrderedDict, deque
 from decimal import Decimal
+from typing import Optional
 from .config import Config
 from .utils.logger import info
+from .utils.state_store import StateStore
+from .models import TradeEvent
+
+STATE_FILE = "bot_state.json" # Legacy JSON state, migrated into STATE_DB_FILE on first start
+STATE_DB_FILE = "bot_state.db"
+
+class ClusterWindow:
+    """Trades for one cluster inside the time window, with running totals"""
+    __slots__ = ("trades", "total_exposure", "bucket_counts", "last_added")
+
+    def __init__(self):
+        self.trades = deque() # (added_at, bucket, size_usd), oldest first
+        self.total_exposure = 0.0
+        self.bucket_counts = {} # bucket -> number of trades in window
+        self.last_added = 0.0
+
+    def add(self, added_at: float, bucket: str, size_usd: float):
+        self.trades.append((added_at, bucket, size_usd))
+        self.total_exposure += size_usd
+        self.bucket_counts[bucket] = self.bucket_counts.get(bucket, 0) + 1
+        self.last_added = added_at
+
+    def evict(self, cutoff: float):
+        while self.trades and self.trades[0][0] <= cutoff:
+            _, bucket, size_usd = self.trades.popleft()
+            self.total_exposure -= size_usd
+            remaining = self.bucket_counts[bucket] - 1
+            if remaining:
+                self.bucket_counts[bucket] = remaining
+            else:
+                del self.bucket_counts[bucket]
+        if not self.trades:
+            self.total_exposure = 0.0 # Drop accumulated float drift
 
-STATE_FILE = "bot_state.json"
 
 class MarketAccumulator:
     """
-    [LEGACY / UNUSED] 
-    Buffers trades to detect clusters. 
-    Not used in current INVENTORY MIRRORING strategy (Mode A is immediate).
-    Retained for potential reversion to cluster-based logic.
+    Buffers trades to detect clusters (CLUSTER strategy mode).
+    Each cluster keeps a deque-backed time window with a running exposure total
+    and per-bucket reference counts, so add and evict are O(1) per trade.
+    A bucket is trade.bucket when the caller sets it, else the outcome.
     """
-    def __init__(self):
-        self.buffers = {} # market_id -> list of trades
-        
-    def add_trade(self, market_id: str, trade: dict, trader_portfolio_value: float) -> tuple[bool, int, float]:
+    def __init__(self, window_seconds: float = 60 * 60, exposure_ratio: float = 0.04, clock=time.time):
+        self.window_seconds = window_seconds
+        self.exposure_ratio = exposure_ratio
+        self.clock = clock
+        self.buffers: "OrderedDict[str, ClusterWindow]" = OrderedDict() # market_id -> window, by last add
+
+    def _expire_idle(self, cutoff: float):
+        # Windows whose newest trade is outside the window are empty - drop them
+        while self.buffers:
+            market_id, window = next(iter(self.buffers.items()))
+            if window.last_added > cutoff:
+                break
+            del self.buffers[market_id]
+
+    def add_trade(self, market_id: str, trade: TradeEvent, trader_portfolio_value: float) -> tuple[bool, int, float]:
         """
         Add trade and check if cluster condition is met.
         Returns (is_triggered, bucket_count, total_exposure_usd)
         """
-        if market_id not in self.buffers:
-            self.buffers[market_id] = []
-            
-        # Append trade with timestamp
-        trade['added_at'] = time.time()
-        self.buffers[market_id].append(trade)
-        
-        # Prune old trades (> 60 mins)
-        cutoff = time.time() - (60 * 60)
-        self.buffers[market_id] = [t for t in self.buffers[market_id] if t['added_at'] > cutoff]
-        
-        # Check conditions
-        trades = self.buffers[market_id]
-        
-        # 1. Bucket Count (>= 2 unique buckets)
-        unique_buckets = set(t['outcome'] for t in trades)
-        bucket_count = len(unique_buckets)
-        
-        # 2. Total Exposure (>= 4% of trader portfolio)
-        total_exposure = sum(float(t.get('size_usd', 0)) for t in trades)
-        exposure_threshold = trader_portfolio_value * 0.04
-        
+        now = self.clock()
+        cutoff = now - self.window_seconds
+        self._expire_idle(cutoff)
+
+        window = self.buffers.get(market_id)
+        if window is None:
+            window = ClusterWindow()
+            self.buffers[market_id] = window
+        self.buffers.move_to_end(market_id)
+
+        window.evict(cutoff)
+        window.add(now, trade.bucket or trade.outcome, trade.size_usd)
+
+        # 1. Bucket Count (>= NORMAL_MIN_ADJACENT_BUCKETS unique buckets)
+        bucket_count = len(window.bucket_counts)
+        # 2. Total Exposure (>= exposure_ratio of trader portfolio)
+        total_exposure = window.total_exposure
+        exposure_threshold = trader_portfolio_value * self.exposure_ratio
+
         if bucket_count >= Config.NORMAL_MIN_ADJACENT_BUCKETS and total_exposure >= exposure_threshold:
              return True, bucket_count, total_exposure
              
         return False, bucket_count, total_exposure
 
+
+class FlipWindow:
+    """
+    Last side traded per (trader, market, outcome), kept only for the flip window.
+    Entries are ordered by last update, so expiry pops from the front: insert,
+    lookup and eviction are amortized O(1) and memory is bounded by the number
+    of trades inside one window, not by every market ever seen.
+    """
+    def __init__(self, window_seconds: float, clock=time.time):
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict() # key -> (side, ts)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._entries:
+            _, ts = next(iter(self._entries.values()))
+            if ts > cutoff:
+                break
+            self._entries.popitem(last=False)
+
+    def check_and_record(self, key: tuple, side: str) -> bool:
+        """True if this is an opposite-side trade inside the window (not recorded)"""
+        now = self.clock()
+        self._expire(now)
+
+        last = self._entries.get(key)
+        if last is not None and last[0] != side:
+            return True
+
+        self._entries[key] = (side, now)
+        self._entries.move_to_end(key)
+        return False
+
+
 class AccountManager:
-    def __init__(self, web3_client=None):
+    """
+    Risk state, flip/cluster windows and sizing.
+    clock drives every time-dependent rule (daily reset, flip and cluster windows)
+    so replays can run on simulated time; legacy_state_file=None skips the JSON migration.
+    """
+    def __init__(self, web3_client=None, store: StateStore = None, clock=time.time,
+                 legacy_state_file: Optional[str] = STATE_FILE):
         self.web3_client = web3_client
+        self.clock = clock
+        self.legacy_state_file = legacy_state_file
+        self.store = store or StateStore(STATE_DB_FILE)
         self.state = self._load_state()
-        self.accumulator = MarketAccumulator()
-        self.recent_trades = {} 
-        self.trader_portfolio_value = 0 # Cache this
-        self.last_portfolio_update = 0
+        self.accumulator = MarketAccumulator(Config.CLUSTER_WINDOW_MINUTES * 60, Config.CLUSTER_MIN_EXPOSURE_RATIO, clock)
+        self.recent_trades = FlipWindow(Config.IGNORE_FLIP_WINDOW_MINUTES * 60, clock)
+        # Per tracked trader (lowercased proxy) -> (portfolio value, refreshed at, is config fallback)
+        self.trader_portfolios = {}
         
     def _load_state(self):
-        if os.path.exists(STATE_FILE):
-            try:
-                with open(STATE_FILE, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {
+        # Storage errors propagate: trading on a silently-reset state would bypass the caps
+        if self.legacy_state_file:
+            self.store.import_json(self.legacy_state_file)
+        state = {
             "daily_start_balance": 0,
             "current_loss": 0,
             "current_exposure": 0,
@@ -73,28 +161,41 @@ class AccountManager:
             "pools": {
                 "certainty": 0,
                 "normal": 0
-            },
-            "market_exposures": {} # market_id -> float (usd exposure)
+            }
         }
+        # market_id -> usd exposure lives in the store's indexed table, not in this dict
+        state.update(self.store.load_state())
+        return state
         
     def _save_state(self):
-        with open(STATE_FILE, 'w') as f:
-            json.dump(self.state, f, indent=2)
+        self.store.save_state(self.state)
 
-    def is_flip(self, market_id: str, outcome: str, side: str) -> bool:
-        key = (market_id, outcome)
-        now = time.time()
-        
-        if key in self.recent_trades:
-            last_side, last_time = self.recent_trades[key]
-            if last_side != side and (now - last_time) < (Config.IGNORE_FLIP_WINDOW_MINUTES * 60):
-                return True 
-        
-        self.recent_trades[key] = (side, now)
-        return False
+    def get_trader_portfolio_value(self, trader: str) -> float:
+        return self.trader_portfolios.get((trader or "").lower(), (0, 0, False))[0]
+
+    def get_portfolio_age(self, trader: str):
+        """Seconds since the last good refresh, or None if never set"""
+        entry = self.trader_portfolios.get((trader or "").lower())
+        return None if entry is None else self.clock() - entry[1]
+
+    def is_portfolio_fallback(self, trader: str) -> bool:
+        """True while the value is TRADER_PORTFOLIO_FALLBACK_USD rather than a real refresh"""
+        entry = self.trader_portfolios.get((trader or "").lower())
+        return entry is not None and entry[2]
+
+    def set_trader_portfolio_value(self, trader: str, value: float, fallback: bool = False):
+        self.trader_portfolios[(trader or "").lower()] = (value, self.clock(), fallback)
+
+    def is_flip(self, market_id: str, outcome: str, side: str, trader: str = None) -> bool:
+        # A flip is one trader reversing; two whales on opposite sides is not a flip
+        return self.recent_trades.check_and_record((trader, market_id, outcome), side)
+
+    @property
+    def flip_window_size(self) -> int:
+        return self.recent_trades.size
 
     def update_balance(self, current_balance: float):
-        now = time.time()
+        now = self.clock()
         if now - self.state["last_reset_time"] > Config.HALT_DURATION_HOURS * 3600:
             self.state["daily_start_balance"] = current_balance
             self.state["current_loss"] = 0
@@ -115,24 +216,17 @@ class AccountManager:
 
     def record_exposure(self, amount: float, market_id: str = None):
         self.state["current_exposure"] += amount
-        
-        if market_id:
-            if "market_exposures" not in self.state:
-                self.state["market_exposures"] = {}
-            
-            curr = self.state["market_exposures"].get(market_id, 0.0)
-            self.state["market_exposures"][market_id] = curr + amount
-            
-        self._save_state()
+        self.store.record_exposure(amount, market_id, self.state["current_exposure"])
+
+    def get_market_exposure(self, market_id: str) -> float:
+        return self.store.get_market_exposure(market_id)
 
     def check_market_cap(self, market_id: str, proposed_amount: float, total_balance: float) -> bool:
-        if "market_exposures" not in self.state:
-             self.state["market_exposures"] = {}
-             
-        current_market_exp = self.state["market_exposures"].get(market_id, 0.0)
+        current_market_exp = self.store.get_market_exposure(market_id)
         max_market_exp = total_balance * Config.MAX_SINGLE_MARKET_RATIO
         
-        if (current_market_exp + proposed_amount) > max_market_exp:
+        # Tolerance: a size clamped to the exact headroom must not fail on float rounding
+        if (current_market_exp + proposed_amount) > max_market_exp + 1e-9:
             return False
         return True
         
@@ -155,3 +249,11 @@ class AccountManager:
         
         market_budget = min(max_market, pool_remaining)
         return market_budget / max(1, bucket_count)
+
+    def get_bet_size_cluster(self, total_balance: float, bucket_count: int, market_id: str) -> float:
+        """
+        Per-bucket cluster size, clamped to the headroom this bucket's market still has
+        under MAX_SINGLE_MARKET_RATIO (the budget split alone is 3-7.5% of balance)
+        """
+        headroom = total_balance * Config.MAX_SINGLE_MARKET_RATIO - self.get_market_exposure(market_id)
+        return max(0.0, min(self.get_bet_size_normal(total_balance, bucket_count), headroom))
@@ -0,0 +1,86 @@
+"""
+Typed records for the trade path
+TradeEvent: one detected fill, parsed once from the Activity API record.
+MarketInfo: the Gamma market fields the pipeline reads, parsed once per market
+(the raw dict is kept for the market filter and the on-disk cache).
+Both are slotted: no per-instance __dict__, and every numeric field is
+already a float/int by the time a stage reads it.
+"""
+from typing import Dict, Optional
+
+from .targets import TraderTarget
+from .utils.market_cache import market_condition_id, market_end_timestamp
+
+
+class TradeEvent:
+    __slots__ = ("trader", "proxy_wallet", "condition_id", "asset", "outcome", "side", "price", "size",
+                 "size_usd", "timestamp", "tx", "title", "slug", "detected_at", "bucket", "timings")
+
+    def __init__(self, trader: str, proxy_wallet: str, condition_id: Optional[str], asset: Optional[str],
+                 outcome: Optional[str], side: str, price: float, size: float, size_usd: float, timestamp: int,
+                 tx: Optional[str], title: str = "", slug: str = "", detected_at: Optional[float] = None):
+        self.trader = trader             # TraderTarget.key - routes sizing/portfolio lookups
+        self.proxy_wallet = proxy_wallet
+        self.condition_id = condition_id # As reported by the Activity API (Gamma's is authoritative)
+        self.asset = asset               # CLOB token id
+        self.outcome = outcome
+        self.side = side                 # "BUY" / "SELL"
+        self.price = price
+        self.size = size                 # Shares
+        self.size_usd = size_usd         # Notional
+        self.timestamp = timestamp
+        self.tx = tx
+        self.title = title
+        self.slug = slug
+        self.detected_at = detected_at   # Wall clock when we first saw it
+        self.bucket: Optional[str] = None  # CLUSTER mode: set once the market is known
+        self.timings: Dict[str, float] = {} # stage -> seconds
+
+    @classmethod
+    def from_activity(cls, activity: dict, target: TraderTarget, detected_at: Optional[float] = None) -> "TradeEvent":
+        """Activity API trade (or a normalized stream message) -> TradeEvent"""
+        price = float(activity.get('price') or 0)
+        size = float(activity.get('size') or 0)
+        # Activity API reports the notional as usdcSize; derive it when missing
+        size_usd = float(activity.get('usdcSize') or 0) or size * price
+        # Positional: this runs once per detected trade, keyword passing is measurably slower
+        return cls(
+            target.key,
+            target.proxy, # We know it's them
+            activity.get('conditionId'),
+            activity.get('asset'),
+            activity.get('outcome'),
+            (activity.get('side') or activity.get('type') or '').upper(),
+            price,
+            size,
+            size_usd,
+            int(activity.get('timestamp') or 0),
+            activity.get('transactionHash'),
+            activity.get('title') or '',
+            activity.get('slug') or '',
+            detected_at,
+        )
+
+    def __repr__(self) -> str:
+        return f"TradeEvent({self.side} {self.outcome} @ {self.price} x{self.size} [{self.trader}] {self.tx})"
+
+
+class MarketInfo:
+    __slots__ = ("condition_id", "question", "category", "end_ts", "tick_size", "neg_risk",
+                 "event_key", "group_item_title", "raw")
+
+    def __init__(self, raw: dict):
+        self.raw = raw
+        self.condition_id = market_condition_id(raw)
+        self.question = raw.get('question') or ''
+        self.category = raw.get('category')
+        # Certainty timing reads end_date_iso only (as it always has); None = no resolution veto
+        self.end_ts = market_end_timestamp(raw) if raw.get('end_date_iso') else None
+        self.tick_size = str(raw.get('minimum_tick_size', '0.01'))
+        self.neg_risk = bool(raw.get('neg_risk', False))
+        events = raw.get('events') or [{}]
+        self.event_key = events[0].get('slug') or events[0].get('id') or self.condition_id
+        self.group_item_title = raw.get('groupItemTitle')
+
+    def __repr__(self) -> str:
+        return f"MarketInfo({self.condition_id}: {self.question[:40]})"
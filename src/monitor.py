@@ -1,20 +1,61 @@
 import asyncio
-from typing import Optional
+from typing import List
 from .config import Config
-from .utils.logger import info, error, success
+from .utils.logger import info, error, success, warning
 from .clients.poller import TradePoller
+from .clients.poll_scheduler import RequestBudget
+from .clients.stream import TradeStream
+from .targets import TraderTarget
 
 class TradeMonitor:
-    def __init__(self, queue: asyncio.Queue):
+    """
+    Feeds the trade queue from one of two backends (Config.INGEST_MODE):
+    - "poll":   concurrent REST pollers, one per tracked trader
+    - "stream": WebSocket push stream; the pollers keep running as a slow
+                backstop and become primary again whenever the stream is down
+    """
+    def __init__(self, queue: asyncio.Queue, targets: List[TraderTarget]):
         self.queue = queue
-        self.poller = TradePoller(queue)
+        self.targets = targets
+        # One global request budget; each target keeps its own cursor and scheduler
+        self.budget = RequestBudget(Config.POLL_GLOBAL_REQUESTS_PER_SECOND, Config.POLL_GLOBAL_BURST)
+        self.pollers = [TradePoller(queue, target, self.budget) for target in targets]
+        self._by_proxy = {p.target.key: p for p in self.pollers}
+        self.stream = TradeStream(self._on_stream_activity, self._on_stream_state) if Config.INGEST_MODE == "stream" else None
+
+    async def _on_stream_activity(self, activity: dict):
+        poller = self._by_proxy.get(str(activity.get('proxyWallet', '')).lower())
+        if poller:
+            await poller.ingest(activity)
+
+    def _on_stream_state(self, connected: bool):
+        for poller in self.pollers:
+            poller.stream_active = connected
+            if connected:
+                # Resume: catch up anything missed while the stream was down
+                poller.wake()
+        if not connected:
+            warning("Trade stream down - polling is primary")
 
     async def start(self):
-        """Starts the polling monitor"""
-        success(f"Starting Trade Monitor (Polling) for {Config.TRADER_ADDRESS}...")
-        await self.poller.start()
+        """Starts one concurrent poller per tracked trader (+ the stream, if enabled)"""
+        mode = "Streaming + Polling fallback" if self.stream else "Polling"
+        success(f"Starting Trade Monitor ({mode}) for {len(self.targets)} trader(s): "
+                f"{', '.join(t.label for t in self.targets)}")
+        workers = [p.start() for p in self.pollers]
+        names = [p.target.label for p in self.pollers]
+        if self.stream:
+            workers.append(self.stream.start())
+            names.append("stream")
+        results = await asyncio.gather(*workers, return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                error(f"Ingestion worker {name} crashed: {result}")
 
     async def stop(self):
-        """Stops the polling monitor"""
-        await self.poller.stop()
+        """Stops the monitor"""
+        if self.stream:
+            await self.stream.stop()
+        for poller in self.pollers:
+            await poller.stop()
         info("Trade Monitor stopped.")
@@ -0,0 +1,371 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from .config import Config
+from .manager import AccountManager
+from .strategy import Strategy
+from .clients.market_index import MarketIndex
+from .clients.execution import ExecutionService
+from .targets import TraderTarget
+from .models import TradeEvent, MarketInfo
+from .utils.logger import info, warning, error, success, event
+from .utils.api_helper import fetch_market_by_token
+from .utils.balance_service import balance_service
+from .utils.market_cache import market_cache, normalize_condition_id
+from .utils.metrics import STAGE_SECONDS, TRADES_SKIPPED, TRADES_CLASSIFIED, ORDERS
+from py_clob_client.clob_types import OrderArgs, OrderType, PartialCreateOrderOptions
+from py_clob_client.order_builder.constants import BUY, SELL
+
+# classification -> (execute msg, cap-hit msg, placed msg, failure msg)
+EXECUTION_LABELS = {
+    "CERTAINTY": ("EXECUTING CERTAINTY BET (CAPPED)", "Skipping Certainty Bet", "Order Placed (Certainty Capped)", "Order Execution Failed"),
+    "INVENTORY": ("EXECUTING INVENTORY BET", "Skipping Inventory Bet", "Order Placed (Inventory)", "Inventory Order Failed"),
+    "CLUSTER": ("EXECUTING CLUSTER BET", "Skipping Cluster Bet", "Order Placed (Cluster)", "Cluster Order Failed"),
+}
+
+
+@contextmanager
+def stage_timer(trade_data: TradeEvent, stage: str):
+    """Record the wall time of one pipeline stage in trade_data.timings (seconds) and the stage histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        trade_data.timings[stage] = elapsed
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+
+
+class TradePipeline:
+    """
+    Staged trade processing: enrich -> classify -> risk-check -> execute.
+
+    A single dispatcher drains the trade queue into per-market lanes. Each lane
+    processes its trades strictly in arrival order (flip detection and the
+    per-market cap depend on it); lanes for different markets run concurrently,
+    bounded by Config.PIPELINE_WORKERS.
+    """
+    def __init__(self, queue: asyncio.Queue, account_manager: AccountManager, market_index: MarketIndex,
+                 execution: ExecutionService, targets: List[TraderTarget]):
+        self.queue = queue
+        self.targets = {t.key: t for t in targets}
+        self.account_manager = account_manager
+        self.market_index = market_index
+        self.execution = execution
+        self._lanes: Dict[str, asyncio.Queue] = {}
+        self._lane_tasks = set()
+        self._workers = asyncio.Semaphore(Config.PIPELINE_WORKERS)
+
+    # --- Dispatch -------------------------------------------------------
+
+    def _lane_key(self, trade_data: TradeEvent) -> str:
+        """
+        Resolve the market a trade belongs to without I/O. The key is always the
+        normalized condition id, whichever source supplies it, so a market cannot
+        end up on two lanes: the Activity API conditionId, or (when a record lacks
+        it) the condition id of the indexed/cached market. The token id is only a
+        last resort for a record with neither.
+        """
+        condition_id = normalize_condition_id(trade_data.condition_id)
+        if not condition_id:
+            token_id = trade_data.asset
+            indexed = self.market_index.lookup(token_id)
+            if indexed:
+                condition_id = indexed[0].condition_id
+            else:
+                # Peek: fetch_market_by_token does the counted lookup right after
+                condition_id = market_cache.peek_condition_id(token_id)
+        return condition_id or str(trade_data.asset)
+
+    async def run(self):
+        """Dispatcher loop: route each trade to its market lane"""
+        while True:
+            trade_data = await self.queue.get()
+
+            with stage_timer(trade_data, 'prefilter'):
+                relevant = self.prefilter(trade_data)
+            if not relevant:
+                info(f"Skipping non-weather trade: {(trade_data.title or 'Unknown')[:50]}")
+                TRADES_SKIPPED.inc(stage="prefilter", reason="not_weather")
+                self.queue.task_done()
+                continue
+
+            key = self._lane_key(trade_data)
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = asyncio.Queue()
+                self._lanes[key] = lane
+                task = asyncio.create_task(self._run_lane(key, lane))
+                self._lane_tasks.add(task)
+                task.add_done_callback(self._lane_tasks.discard)
+            lane.put_nowait(trade_data)
+
+    async def _run_lane(self, key: str, lane: asyncio.Queue):
+        while True:
+            try:
+                trade_data = lane.get_nowait()
+            except asyncio.QueueEmpty:
+                # No await between the empty check and removal, so the dispatcher
+                # cannot enqueue into a lane that is about to disappear
+                del self._lanes[key]
+                return
+
+            try:
+                async with self._workers:
+                    await self.process(trade_data)
+            finally:
+                self.queue.task_done()
+
+    def backlog(self) -> int:
+        """Trades routed to a market lane but not yet processed"""
+        return sum(lane.qsize() for lane in self._lanes.values())
+
+    @property
+    def active_lanes(self) -> int:
+        return len(self._lanes)
+
+    async def stop(self):
+        for task in list(self._lane_tasks):
+            task.cancel()
+        if self._lane_tasks:
+            await asyncio.gather(*self._lane_tasks, return_exceptions=True)
+        self._lanes.clear()
+
+    # --- Stages ---------------------------------------------------------
+
+    @staticmethod
+    def prefilter(trade_data: TradeEvent) -> bool:
+        """0️⃣ Pre-Filter: Use Trade Data Title (Skip Gamma API for non-weather)"""
+        title_lower = trade_data.title.lower()
+        return 'london' in title_lower and 'temperature' in title_lower
+
+    @staticmethod
+    def _event(kind: str, trade_data: TradeEvent, **fields):
+        """Trade-decision record for the JSONL event stream (and the matching metric)"""
+        if kind == "trade_skipped":
+            # Classify reasons are prose; collapse them so the label set stays bounded
+            reason = fields.get('reason') or ''
+            TRADES_SKIPPED.inc(stage=fields.get('stage'), reason=reason if ' ' not in reason else "criteria")
+        elif kind == "trade_classified":
+            TRADES_CLASSIFIED.inc(classification=fields.get('classification'))
+        elif kind in ("order_placed", "order_failed"):
+            ORDERS.inc(classification=fields.get('classification'), result=kind.split('_')[1])
+        event(kind,
+              trader=trade_data.trader,
+              tx=trade_data.tx,
+              asset=trade_data.asset,
+              outcome=trade_data.outcome,
+              side=trade_data.side,
+              price=trade_data.price,
+              **fields)
+
+    async def process(self, trade_data: TradeEvent):
+        if trade_data.detected_at:
+            queued = max(0.0, time.time() - trade_data.detected_at)
+            trade_data.timings['queue'] = queued
+            STAGE_SECONDS.observe(queued, stage='queue')
+        try:
+            enriched = await self.enrich(trade_data)
+            if not enriched:
+                return
+            market_data, market_id = enriched
+
+            classification = self.classify(trade_data, market_data, market_id)
+            if not classification:
+                return
+
+            cluster_buckets = None
+            if classification == "INVENTORY" and Config.STRATEGY_MODE == "CLUSTER":
+                cluster_buckets = self.accumulate(trade_data, market_data, market_id)
+                if not cluster_buckets:
+                    return
+                classification = "CLUSTER"
+
+            with stage_timer(trade_data, 'balance'):
+                current_balance = await self.risk_check(trade_data)
+            if current_balance is None:
+                return
+
+            size = None
+            if cluster_buckets:
+                size = self.account_manager.get_bet_size_cluster(current_balance, cluster_buckets, market_id)
+                if size <= 0:
+                    warning(f"Cluster mirror skipped: Market Cap hit for {market_id}")
+                    self._event("trade_skipped", trade_data, stage="risk", reason="market_cap", market=market_id)
+                    return
+            await self.execute(trade_data, market_data, market_id, classification, current_balance, size)
+        except Exception as e:
+            error(f"Error processing trade: {e}")
+
+    async def enrich(self, trade_data: TradeEvent) -> Optional[Tuple[MarketInfo, str]]:
+        """1️⃣ + 2️⃣ Resolve market metadata and apply the market filter"""
+        # Use Token ID (asset) which is reliable, unlike conditionId from Activity API
+        token_id = trade_data.asset
+        indexed = self.market_index.lookup(token_id)
+        if indexed:
+            # Prefetched + pre-validated at startup/refresh
+            market_data, is_valid = indexed
+        else:
+            with stage_timer(trade_data, 'fetch_market'):
+                raw_market = await fetch_market_by_token(token_id)
+            market_data = MarketInfo(raw_market) if raw_market else None
+            is_valid = None
+
+        if not market_data:
+            warning(f"Could not fetch market data for token {token_id}")
+            self._event("trade_skipped", trade_data, stage="enrich", reason="market_not_found")
+            return None
+
+        # Update market_id from the authoritative Gamma response
+        market_id = market_data.condition_id
+
+        # Debug logging for filter
+        info(f"Trade received: {trade_data.outcome} on market {market_id}")
+        info(f"Market category: {market_data.category}, question: {market_data.question[:50]}")
+
+        if is_valid is None:
+            with stage_timer(trade_data, 'is_valid_market'):
+                is_valid = Strategy.is_valid_market(market_data.raw)
+        if not is_valid:
+            info(f"Skipping trade: Invalid market category/question")
+            self._event("trade_skipped", trade_data, stage="market_filter", reason="invalid_market", market=market_id)
+            return None
+        return market_data, market_id
+
+    def classify(self, trade_data: TradeEvent, market_data: MarketInfo, market_id: str) -> Optional[str]:
+        """Flip protection + 3️⃣ trade classification"""
+        if self.account_manager.is_flip(
+            market_id=market_id,
+            outcome=trade_data.outcome or '',
+            side=trade_data.side,
+            trader=trade_data.trader
+        ):
+            warning(f"Skipping trade: FLIP DETECTED on {trade_data.outcome}")
+            self._event("trade_skipped", trade_data, stage="flip", reason="flip_detected", market=market_id)
+            return None
+
+        trade_size_usd = trade_data.size_usd
+        trader_value = self.account_manager.get_trader_portfolio_value(trade_data.trader)
+        trader_alloc = trade_size_usd / max(1, trader_value)
+
+        with stage_timer(trade_data, 'classify'):
+            classification, reason = Strategy.classify_trade(trade_data, market_data, trader_alloc,
+                                                             now=self.account_manager.clock())
+
+        if classification:
+            info(f"Trade CLASSIFIED as {classification}: {reason}")
+            self._event("trade_classified", trade_data, market=market_id, classification=classification,
+                        reason=reason, size_usd=trade_size_usd, trader_alloc=trader_alloc)
+        else:
+            info(f"Trade SKIPPED: {reason}")
+            self._event("trade_skipped", trade_data, stage="classify", reason=reason, market=market_id,
+                        size_usd=trade_size_usd, trader_alloc=trader_alloc)
+        return classification
+
+    def accumulate(self, trade_data: TradeEvent, market_data: MarketInfo, market_id: str) -> Optional[int]:
+        """
+        CLUSTER mode: buffer the trade per (trader, event) and only mirror once the
+        trader has spread enough exposure across enough buckets in the window.
+        Returns the cluster's bucket count when triggered, else None.
+        """
+        event_key = market_data.event_key or market_id
+        cluster_key = f"{trade_data.trader}:{event_key}"
+        trade_data.bucket = market_data.group_item_title or market_id
+
+        trader_value = self.account_manager.get_trader_portfolio_value(trade_data.trader)
+        triggered, bucket_count, total_exposure = self.account_manager.accumulator.add_trade(
+            cluster_key, trade_data, trader_value
+        )
+        if not triggered:
+            info(f"Cluster building on {event_key}: {bucket_count} buckets, ${total_exposure:.2f}")
+            self._event("trade_skipped", trade_data, stage="cluster", reason="cluster_not_triggered",
+                        market=market_id, bucket_count=bucket_count, cluster_exposure=total_exposure)
+            return None
+
+        info(f"Cluster TRIGGERED on {event_key}: {bucket_count} buckets, ${total_exposure:.2f}")
+        return bucket_count
+
+    async def read_balance(self) -> float:
+        return await balance_service.get_balance(Config.PROXY_WALLET_ADDRESS)
+
+    async def risk_check(self, trade_data: TradeEvent) -> Optional[float]:
+        """Balance read + low-balance guard. Returns the balance to size against"""
+        current_balance = await self.read_balance()
+
+        # Low Balance Check
+        if current_balance < 5.0: # Minimum $5 to operate
+            warning(f"Low Balance (${current_balance:.2f}). Skipping trades.")
+            self._event("trade_skipped", trade_data, stage="risk", reason="low_balance", balance=current_balance)
+            return None
+
+        self.account_manager.update_balance(current_balance)
+        return current_balance
+
+    async def execute(self, trade_data: TradeEvent, market_data: MarketInfo, market_id: str, classification: str,
+                      current_balance: float, size: Optional[float] = None):
+        """
+        Both modes are HARD CAPPED at MAX_SINGLE_TRADE_RATIO (0.25%) of OUR portfolio.
+        Certainty (Mode B) is treated the same as the max inventory drip - never go big.
+        CLUSTER mode passes its own size (get_bet_size_cluster, already within the market cap).
+        The source trader's scale (0-1] shrinks the size further.
+        """
+        executing_msg, skip_msg, placed_msg, failed_msg = EXECUTION_LABELS[classification]
+        target = self.targets.get(trade_data.trader)
+        scale = target.scale if target else 1.0
+        if size is None:
+            size = current_balance * Config.MAX_SINGLE_TRADE_RATIO
+        size *= scale
+
+        if size <= 0:
+            warning(f"{skip_msg}: Size near zero")
+            self._event("trade_skipped", trade_data, stage="risk", reason="size_zero", market=market_id)
+            return
+
+        # Before signing: a rejected trade should not cost a CLOB round-trip
+        if not self.account_manager.check_market_cap(market_id, size, current_balance):
+            warning(f"{skip_msg}: Market Cap hit for {market_id}")
+            self._event("trade_skipped", trade_data, stage="risk", reason="market_cap", market=market_id, size=size)
+            return
+
+        success(f"{executing_msg}: ${size:.2f} on {trade_data.outcome}")
+        exposure_recorded = False
+        try:
+            # Use Limit order at trade price
+            price = trade_data.price
+            shares_size = size / price
+
+            order_args = OrderArgs(
+                price=price,
+                size=shares_size, # Shares
+                side=BUY if trade_data.side == 'BUY' else SELL,
+                token_id=trade_data.asset
+            )
+
+            with stage_timer(trade_data, 'create_order'):
+                signed_order = await self.execution.sign(
+                    order_args,
+                    options=PartialCreateOrderOptions(tick_size=market_data.tick_size, neg_risk=market_data.neg_risk)
+                )
+
+            with stage_timer(trade_data, 'post_order'):
+                try:
+                    resp = await self.execution.post(signed_order, OrderType.GTC)
+                except TimeoutError:
+                    # The CLOB may still have accepted it: count it, so later trades cannot breach the market cap
+                    balance_service.invalidate(Config.PROXY_WALLET_ADDRESS)
+                    self.account_manager.record_exposure(size, market_id)
+                    exposure_recorded = True
+                    raise
+            # Cash moved (or is about to) - never size the next trade off the cached value
+            balance_service.invalidate(Config.PROXY_WALLET_ADDRESS)
+            success(f"{placed_msg}: {resp}")
+            self.account_manager.record_exposure(size, market_id)
+            self._event("order_placed", trade_data, market=market_id, classification=classification,
+                        size=size, order_price=price, shares=shares_size, response=resp,
+                        detected_at=trade_data.detected_at, timings=trade_data.timings)
+        except Exception as e:
+            error(f"{failed_msg}: {e}")
+            self._event("order_failed", trade_data, market=market_id, classification=classification,
+                        size=size, error=str(e), exposure_recorded=exposure_recorded,
+                        detected_at=trade_data.detected_at, timings=trade_data.timings)
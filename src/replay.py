@@ -0,0 +1,300 @@
+"""
+Offline replay / backtest
+Streams recorded Activity API trades (plus cached market metadata) through the
+live TradePipeline stages - prefilter -> market filter -> flip protection ->
+classify -> (cluster) -> risk -> sizing -> market cap - on a simulated clock,
+with a fake CLOB client and an in-memory state store. Nothing touches the
+network or the live bot_state.db.
+
+    python -m src.replay activity.jsonl --markets market_cache.json --balance 1000
+
+activity: JSONL or a JSON list of Activity API records (non-TRADE rows are ignored).
+markets:  the bot's market_cache.json, or a JSON list of Gamma market objects.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from .config import Config
+from .manager import AccountManager
+from .pipeline import TradePipeline
+from .strategy import Strategy
+from .targets import TraderTarget, parse_targets
+from .models import TradeEvent, MarketInfo
+from .utils.json_codec import loads
+from .utils.logger import configure_logging
+from .utils.market_cache import market_token_ids
+from .utils.state_store import StateStore
+
+
+class SimClock:
+    """Replay time: set to each trade's timestamp before it is processed"""
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeClobClient:
+    """Stands in for py-clob-client: 'signs' by echoing the args, 'posts' by recording a fill"""
+    def __init__(self):
+        self.orders: List[dict] = []
+
+    def create_order(self, order_args, options=None) -> dict:
+        return {
+            "token_id": order_args.token_id,
+            "price": order_args.price,
+            "size": order_args.size,
+            "side": order_args.side,
+            "tick_size": getattr(options, 'tick_size', None),
+            "neg_risk": getattr(options, 'neg_risk', None),
+        }
+
+    def post_order(self, signed_order: dict, order_type=None) -> dict:
+        order_id = f"replay-{len(self.orders) + 1}"
+        self.orders.append(dict(signed_order, order_id=order_id))
+        return {"success": True, "orderID": order_id, "status": "matched"}
+
+
+class ReplayExecution:
+    """ExecutionService interface, run inline - there is no I/O to keep off the loop"""
+    def __init__(self, clob_client: FakeClobClient):
+        self.clob_client = clob_client
+
+    async def sign(self, order_args, options):
+        return self.clob_client.create_order(order_args, options=options)
+
+    async def post(self, signed_order, order_type=None):
+        return self.clob_client.post_order(signed_order, order_type)
+
+
+class ReplayMarkets:
+    """Static MarketIndex stand-in: token -> (market, is_valid), no TTL/end-date expiry"""
+    def __init__(self, markets: List[dict]):
+        self.tokens: Dict[str, Tuple[MarketInfo, bool]] = {}
+        for market in markets:
+            entry = (MarketInfo(market), Strategy.is_valid_market(market))
+            for token in market_token_ids(market):
+                self.tokens[token] = entry
+
+    def lookup(self, token_id: str) -> Optional[Tuple[MarketInfo, bool]]:
+        if not token_id:
+            return None
+        return self.tokens.get(str(token_id))
+
+
+class ReplayPipeline(TradePipeline):
+    """
+    TradePipeline with a simulated wallet. Decisions are tallied from the same
+    events the live pipeline emits, instead of being written to the JSONL log.
+    """
+    def __init__(self, account_manager: AccountManager, markets: ReplayMarkets, execution: ReplayExecution,
+                 targets: List[TraderTarget], starting_balance: float):
+        super().__init__(asyncio.Queue(), account_manager, markets, execution, targets)
+        self.balance = starting_balance
+        self.outcomes = Counter()
+        self.placed: List[dict] = []
+
+    async def read_balance(self) -> float:
+        return self.balance
+
+    def _event(self, kind: str, trade_data: TradeEvent, **fields):
+        if kind == "trade_skipped":
+            reason = fields.get('reason') or ''
+            # Short reason codes (market_cap, low_balance, ...) are worth splitting out; classify reasons are prose
+            suffix = f":{reason}" if reason and ' ' not in reason else ''
+            self.outcomes[f"skipped:{fields.get('stage')}{suffix}"] += 1
+        elif kind == "order_placed":
+            self.outcomes[f"placed:{fields.get('classification')}"] += 1
+            # Assume a full fill at the limit price
+            self.balance += -fields['size'] if trade_data.side == 'BUY' else fields['size']
+            self.placed.append({
+                "timestamp": trade_data.timestamp,
+                "trader": trade_data.trader,
+                "market": fields.get('market'),
+                "asset": trade_data.asset,
+                "outcome": trade_data.outcome,
+                "side": trade_data.side,
+                "classification": fields.get('classification'),
+                "price": fields.get('order_price'),
+                "size": fields.get('size'),
+                "shares": fields.get('shares'),
+                "balance_after": self.balance,
+            })
+        elif kind == "order_failed":
+            self.outcomes["failed"] += 1
+
+
+def market_token_prices(markets: List[dict]) -> Dict[str, float]:
+    """
+    token -> final (resolved) or latest price from Gamma's outcomePrices,
+    which is aligned with clobTokenIds
+    """
+    prices = {}
+    for market in markets:
+        raw = market.get('outcomePrices')
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                continue
+        if not isinstance(raw, list):
+            continue
+        for token, price in zip(market_token_ids(market), raw):
+            try:
+                prices[token] = float(price)
+            except (TypeError, ValueError):
+                continue
+    return prices
+
+
+def simulated_pnl(orders: List[dict], token_prices: Dict[str, float]) -> Tuple[float, int]:
+    """Mark every simulated fill to its token's final price. Returns (pnl, orders without a price)"""
+    pnl = 0.0
+    unpriced = 0
+    for order in orders:
+        final = token_prices.get(str(order.get('asset')))
+        if final is None:
+            unpriced += 1
+            continue
+        value = order['shares'] * final
+        pnl += value - order['size'] if order.get('side') == 'BUY' else order['size'] - value
+    return pnl, unpriced
+
+
+def load_activity(path: str) -> List[dict]:
+    """Recorded trades, oldest first (stable for equal timestamps)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    stripped = data.lstrip()
+    if stripped.startswith(b'['):
+        records = loads(stripped)
+    else:
+        records = [loads(line) for line in data.splitlines() if line.strip()]
+    trades = [r for r in records if (r.get('type') or 'TRADE').upper() == 'TRADE']
+    trades.sort(key=lambda r: float(r.get('timestamp') or 0))
+    return trades
+
+
+def load_markets(path: str) -> List[dict]:
+    """market_cache.json snapshot or a plain list of Gamma markets"""
+    with open(path, 'rb') as f:
+        data = loads(f.read())
+    if isinstance(data, dict):
+        return [item['market'] for item in data.get('entries', [])]
+    return data
+
+
+async def replay(activity: List[dict], markets: List[dict], starting_balance: float,
+                 trader_portfolio_value: float, targets: Optional[List[TraderTarget]] = None) -> dict:
+    """
+    Run recorded trades through the pipeline in timestamp order.
+    targets: per-trader scales; traders in the file without a target are mirrored at scale 1.0.
+    Returns a report dict (outcome counts, orders, exposure, throughput).
+    """
+    targets = list(targets or [])
+    by_key = {t.key: t for t in targets}
+    for record in activity:
+        wallet = (record.get('proxyWallet') or '').lower()
+        if wallet and wallet not in by_key:
+            by_key[wallet] = TraderTarget(wallet)
+            targets.append(by_key[wallet])
+    default_target = targets[0] if targets else TraderTarget("unknown")
+
+    clock = SimClock()
+    account_manager = AccountManager(store=StateStore(":memory:"), clock=clock, legacy_state_file=None)
+    for target in targets:
+        account_manager.set_trader_portfolio_value(target.key, trader_portfolio_value)
+
+    clob = FakeClobClient()
+    index = ReplayMarkets(markets)
+    pipeline = ReplayPipeline(account_manager, index, ReplayExecution(clob), targets, starting_balance)
+
+    started = time.perf_counter()
+    for record in activity:
+        clock.now = float(record.get('timestamp') or clock.now)
+        target = by_key.get((record.get('proxyWallet') or '').lower(), default_target)
+        trade_data = TradeEvent.from_activity(record, target)
+
+        if not pipeline.prefilter(trade_data):
+            pipeline.outcomes["skipped:prefilter"] += 1
+            continue
+        if index.lookup(trade_data.asset) is None:
+            # Live mode would fetch it from Gamma; offline it is simply unknown
+            pipeline.outcomes["skipped:market_unknown"] += 1
+            continue
+        await pipeline.process(trade_data)
+    elapsed = time.perf_counter() - started
+
+    exposures = account_manager.store.market_exposures()
+    account_manager.store.close()
+    pnl, unpriced = simulated_pnl(pipeline.placed, market_token_prices(markets))
+    return {
+        "trades": len(activity),
+        "elapsed_seconds": elapsed,
+        "trades_per_second": len(activity) / elapsed if elapsed > 0 else None,
+        "outcomes": dict(pipeline.outcomes),
+        "orders": pipeline.placed,
+        "ordered_usd": sum(o['size'] for o in pipeline.placed),
+        "starting_balance": starting_balance,
+        "ending_balance": pipeline.balance,
+        "current_exposure": account_manager.state["current_exposure"],
+        "market_exposures": exposures,
+        "pnl": pnl,
+        "unpriced_orders": unpriced,
+    }
+
+
+def print_report(report: dict, top: int = 10):
+    print(f"Replayed {report['trades']} trades in {report['elapsed_seconds']:.2f}s "
+          f"({report['trades_per_second'] or 0:.0f} trades/s)")
+    for outcome, count in sorted(report['outcomes'].items()):
+        print(f"  {outcome:<40} {count}")
+    print(f"Orders: {len(report['orders'])} totalling ${report['ordered_usd']:.2f}")
+    print(f"Balance: ${report['starting_balance']:.2f} -> ${report['ending_balance']:.2f}")
+    print(f"Simulated PnL at final prices: ${report['pnl']:.2f}"
+          + (f" ({report['unpriced_orders']} orders without a price)" if report['unpriced_orders'] else ""))
+    print(f"Exposure (since last daily reset): ${report['current_exposure']:.2f}")
+    ranked = sorted(report['market_exposures'].items(), key=lambda kv: kv[1], reverse=True)
+    for market_id, amount in ranked[:top]:
+        print(f"  {market_id}  ${amount:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded trader activity through the strategy offline")
+    parser.add_argument("activity", help="Activity API trades (JSONL or JSON list)")
+    parser.add_argument("--markets", default=Config.MARKET_CACHE_FILE, help="market_cache.json or JSON list of Gamma markets")
+    parser.add_argument("--balance", type=float, default=1000.0, help="Starting USDC balance")
+    parser.add_argument("--trader-portfolio", type=float, default=Config.TRADER_PORTFOLIO_FALLBACK_USD,
+                        help="Portfolio value assumed for every trader")
+    parser.add_argument("--targets", default=Config.TRADER_ADDRESSES or Config.TRADER_ADDRESS,
+                        help='Per-trader scales, same format as TRADER_ADDRESSES ("0xabc,0xdef:0.5")')
+    parser.add_argument("--strategy", choices=["INVENTORY", "CLUSTER"], default=Config.STRATEGY_MODE)
+    parser.add_argument("--orders-out", help="Write the simulated orders here as JSONL")
+    parser.add_argument("--verbose", action="store_true", help="Print the pipeline's per-trade logging")
+    args = parser.parse_args()
+
+    configure_logging(console=args.verbose, files=False)
+    Config.STRATEGY_MODE = args.strategy
+
+    report = asyncio.run(replay(
+        load_activity(args.activity),
+        load_markets(args.markets),
+        args.balance,
+        args.trader_portfolio,
+        parse_targets(args.targets),
+    ))
+    print_report(report)
+
+    if args.orders_out:
+        with open(args.orders_out, 'w') as f:
+            for order in report['orders']:
+                f.write(json.dumps(order) + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
-from datetime import datetime
+import time
+from typing import Optional
 from .config import Config
+from .models import TradeEvent, MarketInfo
 
 class Strategy:
     
@@ -34,14 +36,17 @@ class Strategy:
         return True
 
     @staticmethod
-    def classify_trade(trade_data: dict, market_data: dict, trader_portfolio_alloc: float) -> tuple[str, str]:
+    def classify_trade(trade_data: TradeEvent, market_data: MarketInfo, trader_portfolio_alloc: float,
+                       now: Optional[float] = None) -> tuple[str, str]:
         """
         3️⃣ TRADE CLASSIFICATION
         Returns: (Classification, Reason)
         Classification: "CERTAINTY", "INVENTORY", or None
+        now: "current" epoch seconds (replays pass the trade's time); defaults to time.time()
+        Vectorized twin for large histories: batch_classifier.classify_batch (keep the rules in sync)
         """
-        price = float(trade_data.get("price", 0))
-        size_usd = float(trade_data.get("size_usd", 0)) # Notional size
+        price = trade_data.price
+        size_usd = trade_data.size_usd # Notional size
         
         # 6️⃣ WHAT TO IGNORE (Must also be filtered by flip-detector in Manager)
         if size_usd < Config.IGNORE_MIN_NOTIONAL_USD:
@@ -51,7 +56,7 @@ class Strategy:
         # Price 5c - 85c (Config.NORMAL_PRICE_MAX_CENTS)
         # Trader size <= 5% (Raised from 1%) of HIS portfolio (small drip)
         price_inventory = (Config.NORMAL_PRICE_MIN_CENTS / 100.0) <= price <= (Config.NORMAL_PRICE_MAX_CENTS / 100.0)
-        alloc_inventory = trader_portfolio_alloc <= 0.05 # Raised to 5% to catch larger drips ($50 on $3.5k is ~1.4%)
+        alloc_inventory = trader_portfolio_alloc <= Config.NORMAL_MAX_PORTFOLIO_ALLOCATION # $50 on $3.5k is ~1.4%
         
         if price_inventory and alloc_inventory:
             # We treat this as an "INVENTORY" trade to be mirrored immediately (dripped)
@@ -69,9 +74,8 @@ class Strategy:
         # ISSUE 2 FIX: Require BOTH Price Extreme AND Huge Size
         if is_price_extreme and is_huge_size:
             # Skip if < 60 min to resolution
-            end_iso = market_data.get("end_date_iso")
-            if end_iso:
-                seconds_to_res = (datetime.fromisoformat(end_iso) - datetime.utcnow()).total_seconds()
+            if market_data.end_ts is not None:
+                seconds_to_res = market_data.end_ts - (now if now is not None else time.time())
                 if seconds_to_res < (60 * 60):
                     return None, "Certainty candidate but < 60 mins to resolution"
             
@@ -80,7 +84,7 @@ class Strategy:
         # Generate skip reason
         reason = []
         if not price_inventory: reason.append(f"Price {price:.2f} not in Inventory range {Config.NORMAL_PRICE_MIN_CENTS/100:.2f}-{Config.NORMAL_PRICE_MAX_CENTS/100:.2f}")
-        if not alloc_inventory: reason.append(f"Alloc {trader_portfolio_alloc*100:.2f}% > 5% limit")
+        if not alloc_inventory: reason.append(f"Alloc {trader_portfolio_alloc*100:.2f}% > {Config.NORMAL_MAX_PORTFOLIO_ALLOCATION*100:g}% limit")
         if not (is_price_extreme and is_huge_size): reason.append("Not certain (Price/Size mismatch)")
         
         return None, "; ".join(reason)
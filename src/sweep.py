@@ -0,0 +1,276 @@
+"""
+Parallel parameter sweep
+Replays one recorded history (see src/replay.py) once per Config parameter set,
+fanned out over a process pool on every core, and tabulates exposure, trade
+count and simulated PnL per set.
+
+    python -m src.sweep activity.jsonl --markets market_cache.json \\
+        --grid NORMAL_PRICE_MAX_CENTS=75,85,95 --grid MAX_SINGLE_TRADE_RATIO=0.0025,0.005
+
+    python -m src.sweep activity.jsonl --random CERTAINTY_PORTFOLIO_ALLOCATION_THRESHOLD=0.05:0.3 \\
+        --random IGNORE_FLIP_WINDOW_MINUTES=5:120 --samples 64 --out sweep.csv
+
+The trades are written once as columnar arrays (numeric columns as float64,
+string columns as codes into one UTF-8 string table) to .npy files in a temp
+directory. Workers map them read-only, so every process shares the same page
+cache pages and memory does not grow with --workers; each row is rebuilt as a
+short-lived dict only while the replay reads it. Tasks only carry their
+parameter set. Market metadata is small and is still copied per worker (the
+replay builds a MarketInfo per market anyway).
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import os
+import pickle
+import random
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .config import Config
+from .replay import load_activity, load_markets, replay
+from .utils.logger import configure_logging
+
+RESULT_COLUMNS = ["orders", "ordered_usd", "exposure", "max_market_exposure", "pnl", "ending_balance"]
+
+# Activity fields the replay reads (see TradeEvent.from_activity)
+NUMERIC_FIELDS = ("timestamp", "price", "size", "usdcSize")
+STRING_FIELDS = ("type", "proxyWallet", "conditionId", "asset", "outcome", "side", "transactionHash", "title", "slug")
+MISSING = -1 # String code for an absent field
+
+# Worker-process state, filled once by _init_worker
+_history = None
+_settings = None
+
+
+class ColumnarActivity:
+    """
+    Read-only trade history over memory-mapped columns. Iterating yields one
+    Activity-shaped dict per trade, built on demand and dropped after use.
+    """
+    def __init__(self, directory: str):
+        load = lambda name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+        self.numeric = {field: load(field) for field in NUMERIC_FIELDS}
+        self.codes = {field: load(field) for field in STRING_FIELDS}
+        self.string_bytes = load("strings")
+        self.string_offsets = load("string_offsets")
+
+    def __len__(self) -> int:
+        return len(self.numeric["timestamp"])
+
+    def _string(self, code: int) -> Optional[str]:
+        if code == MISSING:
+            return None
+        start, end = self.string_offsets[code], self.string_offsets[code + 1]
+        return self.string_bytes[start:end].tobytes().decode('utf-8')
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(len(self)):
+            record = {}
+            for field, column in self.numeric.items():
+                value = column[i]
+                if not np.isnan(value):
+                    record[field] = float(value)
+            for field, column in self.codes.items():
+                value = self._string(int(column[i]))
+                if value is not None:
+                    record[field] = value
+            yield record
+
+
+def write_columnar_activity(activity: List[dict], directory: str):
+    """Column files for ColumnarActivity; repeated strings (wallets, markets, assets) are stored once"""
+    def number(value) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    for field in NUMERIC_FIELDS:
+        column = np.fromiter((number(r.get(field)) for r in activity), dtype=np.float64, count=len(activity))
+        np.save(os.path.join(directory, f"{field}.npy"), column)
+
+    codes_by_string: Dict[str, int] = {}
+    for field in STRING_FIELDS:
+        codes = np.empty(len(activity), dtype=np.int32)
+        for i, record in enumerate(activity):
+            value = record.get(field)
+            codes[i] = MISSING if value is None else codes_by_string.setdefault(str(value), len(codes_by_string))
+        np.save(os.path.join(directory, f"{field}.npy"), codes)
+
+    encoded = [s.encode('utf-8') for s in codes_by_string] # Insertion order = code order
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(os.path.join(directory, "string_offsets.npy"), offsets)
+    np.save(os.path.join(directory, "strings.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+def cast_config_value(name: str, raw: str):
+    """Parse a CLI value with the type of the Config attribute it overrides"""
+    current = getattr(Config, name)
+    if isinstance(current, bool):
+        return raw.lower() in ("1", "true", "yes")
+    if isinstance(current, int):
+        return int(float(raw))
+    if isinstance(current, float):
+        return float(raw)
+    return raw
+
+
+def grid_sets(grid: Dict[str, List]) -> List[dict]:
+    """Cartesian product of every listed value"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def random_sets(ranges: Dict[str, tuple], samples: int, seed: Optional[int] = None) -> List[dict]:
+    """Uniform samples from each (low, high) range; ints stay ints"""
+    rng = random.Random(seed)
+    sets = []
+    for _ in range(samples):
+        params = {}
+        for name, (low, high) in ranges.items():
+            if isinstance(getattr(Config, name), int) and not isinstance(getattr(Config, name), bool):
+                params[name] = rng.randint(int(low), int(high))
+            else:
+                params[name] = rng.uniform(float(low), float(high))
+        sets.append(params)
+    return sets
+
+
+def _init_worker(history_dir: str, settings: dict):
+    global _history, _settings
+    configure_logging(console=False, files=False)
+    with open(os.path.join(history_dir, "markets.pkl"), 'rb') as f:
+        markets = pickle.load(f)
+    _history = {"activity": ColumnarActivity(history_dir), "markets": markets}
+    _settings = settings
+
+
+def _run(params: dict) -> dict:
+    """One replay with params applied to Config (restored afterwards - workers are reused)"""
+    original = {name: getattr(Config, name) for name in params}
+    try:
+        for name, value in params.items():
+            setattr(Config, name, value)
+        report = asyncio.run(replay(
+            _history["activity"], _history["markets"],
+            _settings["balance"], _settings["trader_portfolio"],
+        ))
+    finally:
+        for name, value in original.items():
+            setattr(Config, name, value)
+
+    exposures = report["market_exposures"]
+    return dict(params,
+                orders=len(report["orders"]),
+                ordered_usd=report["ordered_usd"],
+                exposure=sum(exposures.values()),
+                max_market_exposure=max(exposures.values(), default=0.0),
+                pnl=report["pnl"],
+                ending_balance=report["ending_balance"])
+
+
+def run_sweep(activity: List[dict], markets: List[dict], param_sets: List[dict],
+              balance: float, trader_portfolio: float, workers: Optional[int] = None) -> List[dict]:
+    """Evaluate every parameter set in parallel; rows come back in param_sets order"""
+    history_dir = tempfile.mkdtemp(prefix="sweep-history-")
+    try:
+        write_columnar_activity(activity, history_dir)
+        with open(os.path.join(history_dir, "markets.pkl"), 'wb') as f:
+            pickle.dump(markets, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        settings = {"balance": balance, "trader_portfolio": trader_portfolio}
+        workers = min(workers or os.cpu_count() or 1, max(1, len(param_sets)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(history_dir, settings)) as pool:
+            return list(pool.map(_run, param_sets))
+    finally:
+        shutil.rmtree(history_dir, ignore_errors=True)
+
+
+def print_table(rows: List[dict], param_names: List[str], top: Optional[int] = None):
+    columns = param_names + RESULT_COLUMNS
+    widths = {c: max(len(c), 12) for c in columns}
+    print("  ".join(c.rjust(widths[c]) for c in columns))
+    for row in rows[:top]:
+        cells = []
+        for c in columns:
+            value = row[c]
+            text = f"{value:.6g}" if isinstance(value, float) else str(value)
+            cells.append(text.rjust(widths[c]))
+        print("  ".join(cells))
+
+
+def _parse_assignments(values: List[str]) -> Dict[str, str]:
+    parsed = {}
+    for item in values or []:
+        name, sep, raw = item.partition("=")
+        if not sep:
+            raise SystemExit(f"Expected NAME=VALUES, got: {item}")
+        name = name.strip()
+        if not name.isupper() or not hasattr(Config, name):
+            raise SystemExit(f"Unknown Config parameter: {name}")
+        parsed[name] = raw
+    return parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep Config thresholds over a recorded history in parallel")
+    parser.add_argument("activity", help="Activity API trades (JSONL or JSON list)")
+    parser.add_argument("--markets", default=Config.MARKET_CACHE_FILE, help="market_cache.json or JSON list of Gamma markets")
+    parser.add_argument("--grid", action="append", metavar="NAME=V1,V2,...", help="Grid values for a Config parameter")
+    parser.add_argument("--random", action="append", metavar="NAME=LOW:HIGH", help="Sample range for a Config parameter")
+    parser.add_argument("--samples", type=int, default=32, help="Random parameter sets to draw (with --random)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--balance", type=float, default=1000.0, help="Starting USDC balance")
+    parser.add_argument("--trader-portfolio", type=float, default=Config.TRADER_PORTFOLIO_FALLBACK_USD)
+    parser.add_argument("--strategy", choices=["INVENTORY", "CLUSTER"], default=Config.STRATEGY_MODE)
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores); they share one memory-mapped copy of the trades")
+    parser.add_argument("--sort", default="pnl", help=f"Column to sort by, descending (one of {', '.join(RESULT_COLUMNS)} or a parameter)")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("--out", help="Write every row to this CSV")
+    args = parser.parse_args()
+
+    grid = {name: [cast_config_value(name, v) for v in raw.split(",") if v.strip()]
+            for name, raw in _parse_assignments(args.grid).items()}
+    ranges = {name: tuple(cast_config_value(name, v) for v in raw.split(":", 1))
+              for name, raw in _parse_assignments(args.random).items()}
+    if not grid and not ranges:
+        raise SystemExit("Nothing to sweep: pass --grid and/or --random")
+    param_names = list(grid) + list(ranges)
+    if args.sort not in RESULT_COLUMNS + param_names:
+        raise SystemExit(f"Unknown sort column: {args.sort}")
+
+    # The same random draws are crossed with every grid point
+    param_sets = grid_sets(grid)
+    if ranges:
+        draws = random_sets(ranges, args.samples, args.seed)
+        param_sets = [dict(g, **r) for g in param_sets for r in draws]
+    for params in param_sets:
+        params["STRATEGY_MODE"] = args.strategy
+
+    configure_logging(console=False, files=False)
+    activity = load_activity(args.activity)
+    markets = load_markets(args.markets)
+    print(f"Sweeping {len(param_sets)} parameter sets over {len(activity)} trades...")
+
+    rows = run_sweep(activity, markets, param_sets, args.balance, args.trader_portfolio, args.workers)
+    rows.sort(key=lambda r: r[args.sort], reverse=True)
+    print_table(rows, param_names, args.top)
+
+    if args.out:
+        with open(args.out, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=["STRATEGY_MODE"] + param_names + RESULT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Wrote {len(rows)} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
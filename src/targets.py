@@ -0,0 +1,52 @@
+from typing import List
+from .config import Config
+from .utils.logger import format_address
+
+
+class TraderTarget:
+    """
+    A tracked trader.
+    address: as configured (EOA or proxy)
+    proxy:   resolved proxy wallet - what we poll and what trades are tagged with
+    scale:   fraction (0-1] of the per-trade drip we mirror for this trader
+    """
+    def __init__(self, address: str, scale: float = 1.0):
+        self.address = address
+        self.proxy = address
+        self.scale = min(1.0, max(0.0, scale))
+
+    @property
+    def key(self) -> str:
+        return self.proxy.lower()
+
+    @property
+    def label(self) -> str:
+        return format_address(self.proxy)
+
+    def __repr__(self) -> str:
+        return f"TraderTarget({self.proxy}, scale={self.scale})"
+
+
+def parse_targets(raw: str) -> List[TraderTarget]:
+    """
+    Parse "0xabc,0xdef:0.5" -> targets. An optional ":scale" suffix sets the
+    fraction of our drip size mirrored for that trader (default 1.0).
+    """
+    targets = []
+    seen = set()
+    for entry in (raw or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        address, _, scale = entry.partition(":")
+        address = address.strip()
+        if address.lower() in seen:
+            continue
+        seen.add(address.lower())
+        targets.append(TraderTarget(address, float(scale) if scale.strip() else 1.0))
+    return targets
+
+
+def load_targets() -> List[TraderTarget]:
+    """TRADER_ADDRESSES (multi) takes precedence over the legacy single TRADER_ADDRESS"""
+    return parse_targets(Config.TRADER_ADDRESSES or Config.TRADER_ADDRESS or "")
@@ -1,96 +1,137 @@
-import requests
+import asyncio
 import aiohttp
 import time
-import ssl
-import certifi
+from typing import Optional
 from ..config import Config
 from .logger import error, info, debug, warning
-from .get_my_balance import get_my_balance
+from .balance_service import balance_service
+from .http_client import get_session
+from .market_cache import market_cache
+from .json_codec import loads
+from .single_flight import SingleFlight
+from . import hedging, outbound
 
-GAMMA_API_URL = "https://gamma-api.polymarket.com/markets"
-DATA_API_URL = "https://data-api.polymarket.com/positions"
+# Trades on one market arrive in bursts (and on several lanes): concurrent lookups of the
+# same id share one Gamma request, and a miss is replayed briefly instead of re-requested
+market_lookups = SingleFlight("gamma_market", Config.MARKET_LOOKUP_NEGATIVE_TTL_SECONDS)
+
+gamma_by_condition = hedging.endpoint("gamma_markets_by_condition", Config.GAMMA_CONDITION_BUDGET_SECONDS)
+gamma_by_token = hedging.endpoint("gamma_markets_by_token", Config.GAMMA_TOKEN_BUDGET_SECONDS)
+
+async def _get_gamma_markets(endpoint: hedging.HedgedEndpoint, params: dict):
+    """GET /markets, hedged; returns (status, parsed body or None)"""
+    async def attempt():
+        session = await get_session()
+        async with outbound.call("gamma", outbound.TRADE, "market_lookup") as call:
+            async with session.get(f"{Config.GAMMA_API_URL}/markets", params=params,
+                                   timeout=aiohttp.ClientTimeout(total=endpoint.budget_seconds)) as response:
+                call.record(response.status, response.headers.get('Retry-After'))
+                if response.status != 200:
+                    return response.status, None
+                return response.status, loads(await response.read())
+    return await endpoint.call(attempt)
 
 async def fetch_market_data(condition_id: str):
     """Fetch real market data from Gamma API"""
+    cached = market_cache.get_by_condition(condition_id)
+    if cached:
+        return cached
+    return await market_lookups.do(("condition", condition_id.lower()), lambda: _fetch_market_data(condition_id))
+
+async def _fetch_market_data(condition_id: str):
     try:
-        # Use simple URL and pass params dict
-        url = "https://gamma-api.polymarket.com/markets"
-        params = {"condition_id": condition_id}
-        
-        # Add SSL context with certifi
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        
-        async with aiohttp.ClientSession(connector=connector) as session:
-            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                if response.status != 200:
-                    error(f"Gamma API error {response.status} for {condition_id}")
-                    return None
-                
-                data = await response.json()
-                
-                # Debug: Log what we actually got
-                if isinstance(data, list) and len(data) > 0:
-                    m = data[0]
-                    # SAFETY CHECK: API can return default/stale data if filter fails
-                    if m.get('condition_id', '').lower() != condition_id.lower():
-                        warning(f"Market Mismatch! Requested {condition_id}, got {m.get('condition_id')} ({m.get('question')[:30]}...)")
-                        return None
-                        
-                    # Log snippet of market data to verify it matches trade
-                    debug(f"Market Found {condition_id}: {m.get('category')} - {m.get('question')[:40]}...")
-                    return m
-                else:
-                    warning(f"No market data found for {condition_id}")
-                    return None
+        status, data = await _get_gamma_markets(gamma_by_condition, {"condition_id": condition_id})
+        if status != 200:
+            error(f"Gamma API error {status} for {condition_id}")
+            return None
+
+        # Debug: Log what we actually got
+        if isinstance(data, list) and len(data) > 0:
+            m = data[0]
+            # SAFETY CHECK: API can return default/stale data if filter fails
+            if m.get('condition_id', '').lower() != condition_id.lower():
+                warning(f"Market Mismatch! Requested {condition_id}, got {m.get('condition_id')} ({m.get('question')[:30]}...)")
+                return None
                     
+            # Log snippet of market data to verify it matches trade
+            debug(f"Market Found {condition_id}: {m.get('category')} - {m.get('question')[:40]}...")
+            market_cache.put(m)
+            return m
+        else:
+            warning(f"No market data found for {condition_id}")
+            return None
+                
     except Exception as e:
         error(f"Failed to fetch market data for {condition_id}: {e}")
         return None
 
-def get_trader_portfolio_value(address: str) -> float:
+async def _fetch_positions_page(address: str, offset: int) -> list:
+    session = await get_session()
+    params = {"user": address, "limit": str(Config.PORTFOLIO_POSITIONS_PAGE_SIZE), "offset": str(offset)}
+    async with outbound.call("data", outbound.BACKGROUND, "positions") as call:
+        async with session.get(f"{Config.DATA_API_URL}/positions", params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            call.record(response.status, response.headers.get('Retry-After'))
+            response.raise_for_status()
+            positions = loads(await response.read())
+    return positions if isinstance(positions, list) else []
+
+async def fetch_positions_value(address: str) -> float:
+    """
+    Sum currentValue over ALL of a user's positions.
+    Pages are fetched in concurrent batches and valued as they arrive; raises on failure
+    so callers never mistake a partial read for the real value.
+    """
+    page_size = Config.PORTFOLIO_POSITIONS_PAGE_SIZE
+    batch = Config.PORTFOLIO_POSITIONS_CONCURRENCY
+    max_pages = Config.PORTFOLIO_POSITIONS_MAX_PAGES
+    total = 0.0
+    for first in range(0, max_pages, batch):
+        count = min(batch, max_pages - first) # Last batch stops at max_pages
+        pages = await asyncio.gather(*(
+            _fetch_positions_page(address, (first + i) * page_size) for i in range(count)
+        ))
+        for page in pages:
+            total += sum(float(p.get("currentValue", 0) or 0) for p in page)
+        # A short page means we've reached the end
+        if any(len(page) < page_size for page in pages):
+            return total
+    warning(f"Positions for {address} exceed {Config.PORTFOLIO_POSITIONS_MAX_PAGES} pages; value truncated")
+    return total
+
+async def get_trader_portfolio_value(address: str) -> Optional[float]:
     """
     Calculate generic portfolio value (USDC + Positions).
-    This is expensive so should be cached/called infrequently.
+    This is expensive so should be cached/called infrequently - see PortfolioRefresher.
+    Returns None on failure (callers keep their last good value).
     """
     try:
-        # 1. USDC Balance
-        usdc_bal = get_my_balance(address)
-        
-        # 2. Positions Value
-        url = f"{DATA_API_URL}?user={address}"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        positions = response.json()
-        
-        pos_value = 0.0
-        if isinstance(positions, list):
-            pos_value = sum(float(p.get("currentValue", 0) or 0) for p in positions)
-            
+        usdc_bal, pos_value = await asyncio.gather(
+            balance_service.get_balance(address, max_age=0, raise_errors=True),
+            fetch_positions_value(address)
+        )
         return usdc_bal + pos_value
     except Exception as e:
         error(f"Failed to get portfolio value for {address}: {e}")
-        return 1600.0 # Fallback default if API fails (approx value of a small whale)
+        return None
 
 async def fetch_recent_trades(address: str, limit: int = 5):
     """Fetch recent activity for a user from Data API"""
     try:
-        url = "https://data-api.polymarket.com/activity"
+        url = f"{Config.DATA_API_URL}/activity"
         params = {
             "user": address.lower(),
             "limit": str(limit)
         }
         
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        
-        async with aiohttp.ClientSession(connector=connector) as session:
+        session = await get_session()
+        async with outbound.call("data", outbound.BACKGROUND, "recent_trades") as call:
             async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                call.record(resp.status, resp.headers.get('Retry-After'))
                 if resp.status != 200:
                     error(f"Activity API error: {resp.status}")
                     return []
                 
-                data = await resp.json()
+                data = loads(await resp.read())
                 
                 if not data:
                     return []
@@ -110,41 +151,41 @@ async def fetch_recent_trades(address: str, limit: int = 5):
 
 async def fetch_market_by_token(token_id: str):
     """Fetch market data using token ID instead of condition ID"""
+    cached = market_cache.get_by_token(token_id)
+    if cached:
+        return cached
+    return await market_lookups.do(("token", token_id), lambda: _fetch_market_by_token(token_id))
+
+async def _fetch_market_by_token(token_id: str):
     try:
-        url = "https://gamma-api.polymarket.com/markets"
-        params = {"clob_token_ids": token_id}
-        
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        
-        async with aiohttp.ClientSession(connector=connector) as session:
-            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                if response.status != 200:
-                    warning(f"Gamma API error {response.status} for token {token_id}")
-                    return None
+        status, data = await _get_gamma_markets(gamma_by_token, {"clob_token_ids": token_id})
+        if status != 200:
+            warning(f"Gamma API error {status} for token {token_id}")
+            return None
+
+        if isinstance(data, list) and len(data) > 0:
+            # We found the market via Token ID.
+            # However, this endpoint might return a "thin" object without category.
+            # To be safe, we now fetch the FULL data using the trusted condition_id.
+            m = data[0]
+            trusted_condition_id = m.get('conditionId') # Note: Gamma sometimes uses conditionId vs condition_id
                 
-                data = await response.json()
-                if isinstance(data, list) and len(data) > 0:
-                    # We found the market via Token ID.
-                    # However, this endpoint might return a "thin" object without category.
-                    # To be safe, we now fetch the FULL data using the trusted condition_id.
-                    m = data[0]
-                    trusted_condition_id = m.get('conditionId') # Note: Gamma sometimes uses conditionId vs condition_id
+            if not trusted_condition_id:
+                trusted_condition_id = m.get('condition_id')
                     
-                    if not trusted_condition_id:
-                        trusted_condition_id = m.get('condition_id')
+            if trusted_condition_id:
+                # Chain to get full data
+                full_market = await fetch_market_data(trusted_condition_id)
+                if full_market:
+                    # Index under the requested token too, in case Gamma omits clobTokenIds
+                    market_cache.put(full_market, token_id=token_id)
+                    return full_market
                         
-                    if trusted_condition_id:
-                        # Chain to get full data
-                        full_market = await fetch_market_data(trusted_condition_id)
-                        if full_market:
-                            return full_market
-                            
-                    # Fallback to returning what we have if full fetch fails
-                    return m
-                
-                warning(f"No market found for token {token_id}")
-                return None
+            # Fallback to returning what we have if full fetch fails
+            return m
+            
+        warning(f"No market found for token {token_id}")
+        return None
     except Exception as e:
         error(f"Failed to fetch market by token: {e}")
         return None
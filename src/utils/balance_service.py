@@ -0,0 +1,105 @@
+"""
+Async USDC balance service
+One persistent AsyncWeb3 provider shared by every balance read (our proxy wallet
+and tracked traders), with a short per-address cache that is invalidated locally
+as soon as we post an order. Concurrent reads of one address share a single
+RPC call (and a failing one is not retried by every waiting lane).
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+from web3 import AsyncWeb3, AsyncHTTPProvider
+
+from ..config import Config
+from .get_my_balance import USDC_CONTRACT_ADDRESS, USDC_ABI
+from .logger import error, info
+from .single_flight import SingleFlight
+
+
+class BalanceService:
+    def __init__(self, rpc_url: str, ttl_seconds: float):
+        self.rpc_url = rpc_url
+        self.ttl_seconds = ttl_seconds
+        self._w3: Optional[AsyncWeb3] = None
+        self._contract = None
+        self._cache: Dict[str, Tuple[float, float]] = {} # checksum address -> (fetched_at, balance)
+        # Bumped by invalidate(): a read that started before an invalidation must not repopulate the cache
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0 # invalidate() with no address
+        self.hits = 0
+        self.misses = 0
+        self._flight = SingleFlight("balance", Config.BALANCE_ERROR_TTL_SECONDS)
+
+    def _ensure_client(self):
+        if self._w3 is None:
+            self._w3 = AsyncWeb3(AsyncHTTPProvider(self.rpc_url))
+            self._contract = self._w3.eth.contract(
+                address=AsyncWeb3.to_checksum_address(USDC_CONTRACT_ADDRESS),
+                abi=USDC_ABI
+            )
+
+    async def get_balance(self, address: str, max_age: Optional[float] = None, raise_errors: bool = False) -> float:
+        """
+        USDC balance (6 decimals) for address; served from cache when fresher than max_age/TTL.
+        Errors read as 0.0 (skips the trade) unless raise_errors is set.
+        """
+        try:
+            checksum_address = AsyncWeb3.to_checksum_address(address)
+        except Exception as e:
+            if raise_errors:
+                raise
+            error(f"Invalid address for balance read {address}: {e}")
+            return 0.0
+
+        max_age = self.ttl_seconds if max_age is None else max_age
+        cached = self._cache.get(checksum_address)
+        if cached and (time.time() - cached[0]) < max_age:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        generation = (self._epoch, self._generations.get(checksum_address, 0))
+        try:
+            balance = await self._flight.do(checksum_address, lambda: self._fetch(checksum_address))
+        except Exception as e:
+            if raise_errors:
+                raise
+            error(f"Error fetching balance for {address}: {e}")
+            return 0.0
+
+        if generation == (self._epoch, self._generations.get(checksum_address, 0)):
+            self._cache[checksum_address] = (time.time(), balance)
+        return balance
+
+    async def _fetch(self, checksum_address: str) -> float:
+        self._ensure_client()
+        balance_wei = await self._contract.functions.balanceOf(checksum_address).call()
+        return float(balance_wei) / 10**6
+
+    def invalidate(self, address: Optional[str] = None):
+        """Drop cached balance(s) - call right after posting an order"""
+        # Reads already in flight may predate the order: later callers start a fresh one
+        if address is None:
+            self._epoch += 1
+            self._cache.clear()
+            self._flight.forget()
+            return
+        try:
+            checksum_address = AsyncWeb3.to_checksum_address(address)
+        except Exception:
+            return
+        self._generations[checksum_address] = self._generations.get(checksum_address, 0) + 1
+        self._cache.pop(checksum_address, None)
+        self._flight.forget(checksum_address)
+
+    async def close(self):
+        if self._w3 is None:
+            return
+        disconnect = getattr(self._w3.provider, 'disconnect', None)
+        if disconnect:
+            await disconnect()
+        self._w3 = None
+        info("Balance service closed.")
+
+
+balance_service = BalanceService(Config.RPC_URL, Config.BALANCE_CACHE_TTL_SECONDS)
@@ -26,7 +26,7 @@ async def is_gnosis_safe(address: str) -> bool:
 async def create_clob_client() -> ClobClient:
     """Create and initialize official ClobClient"""
     chain_id = 137
-    host = "https://clob.polymarket.com"
+    host = Config.CLOB_API_URL
     private_key = Config.PRIVATE_KEY
     
     # Check for Proxy using RelayClient
@@ -0,0 +1,144 @@
+"""
+Hedged requests with per-endpoint latency budgets
+Each endpoint keeps a rolling window of observed latencies. When a call has
+not answered by the window's p95, a second identical call is fired and the
+first answer wins (the loser is cancelled). Hedges spend from a token budget
+refilled by a fixed share of primary calls, so they add at most a few
+percent to request volume. The whole call, hedge included, must finish within
+the endpoint's latency budget.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+from ..config import Config
+from .metrics import metrics
+
+HEDGES = metrics.counter("polybot_hedged_requests_total",
+                         "Hedging decisions per endpoint: fired, won (hedge answered first), "
+                         "denied (over the hedge budget)", ["endpoint", "result"])
+HEDGE_DELAY = metrics.gauge("polybot_hedge_delay_seconds",
+                            "Current hedge trigger delay (observed latency quantile) per endpoint", ["endpoint"])
+
+
+class HedgeBudget:
+    """Token bucket: every primary call earns `ratio` tokens, a hedge costs one"""
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+
+    def earn(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class LatencyTracker:
+    def __init__(self, window: int, quantile: float, min_samples: int, default: float,
+                 floor: float, ceiling: float):
+        self.samples = deque(maxlen=window)
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.default = default
+        self.floor = floor
+        self.ceiling = ceiling
+        self._delay: Optional[float] = None # Recomputed lazily after new samples
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self._delay = None
+
+    def hedge_delay(self) -> float:
+        if self._delay is None:
+            if len(self.samples) < self.min_samples:
+                delay = self.default
+            else:
+                ordered = sorted(self.samples)
+                delay = ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))]
+            self._delay = min(self.ceiling, max(self.floor, delay))
+        return self._delay
+
+
+class HedgedEndpoint:
+    def __init__(self, name: str, budget_seconds: float, hedge_budget: HedgeBudget):
+        self.name = name
+        self.budget_seconds = budget_seconds
+        self.hedge_budget = hedge_budget
+        self.latency = LatencyTracker(Config.HEDGE_WINDOW, Config.HEDGE_QUANTILE, Config.HEDGE_MIN_SAMPLES,
+                                      Config.HEDGE_DEFAULT_DELAY_SECONDS, Config.HEDGE_MIN_DELAY_SECONDS,
+                                      Config.HEDGE_MAX_DELAY_SECONDS)
+        HEDGE_DELAY.set(self.latency.hedge_delay(), endpoint=name)
+
+    async def call(self, fn: Callable[[], Awaitable]):
+        """
+        fn() performs one attempt. Returns the first attempt to succeed; raises the
+        last error if every attempt failed, or asyncio.TimeoutError past the budget.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.budget_seconds
+        started = time.monotonic()
+        self.hedge_budget.earn()
+
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        hedge = None
+        last_error: Optional[BaseException] = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=min(self.latency.hedge_delay(), self.budget_seconds))
+            if not done:
+                if self.hedge_budget.spend():
+                    hedge = asyncio.ensure_future(fn())
+                    pending.add(hedge)
+                    HEDGES.inc(endpoint=self.name, result="fired")
+                else:
+                    HEDGES.inc(endpoint=self.name, result="denied")
+
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if primary in done:
+                    self._observe(time.monotonic() - started)
+                winner = None
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                    elif winner is None or task is primary:
+                        winner = task
+                if winner is not None:
+                    if winner is hedge:
+                        HEDGES.inc(endpoint=self.name, result="won")
+                    return winner.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if not primary.done() or primary.cancelled():
+                # Censored sample: the primary took at least this long
+                self._observe(time.monotonic() - started)
+
+        if last_error is not None:
+            raise last_error
+        raise asyncio.TimeoutError(f"{self.name}: no answer within {self.budget_seconds}s")
+
+    def _observe(self, seconds: float):
+        self.latency.observe(seconds)
+        HEDGE_DELAY.set(self.latency.hedge_delay(), endpoint=self.name)
+
+
+_hedge_budget = HedgeBudget(Config.HEDGE_BUDGET_RATIO, Config.HEDGE_BUDGET_BURST) # Shared: caps extra Gamma load overall
+_endpoints: Dict[str, HedgedEndpoint] = {}
+
+
+def endpoint(name: str, budget_seconds: float) -> HedgedEndpoint:
+    ep = _endpoints.get(name)
+    if ep is None:
+        ep = _endpoints[name] = HedgedEndpoint(name, budget_seconds, _hedge_budget)
+    return ep
@@ -0,0 +1,60 @@
+"""
+Shared HTTP client layer
+One long-lived aiohttp session (keep-alive pool per host, DNS cache, single SSL context)
+reused by the poller and every Gamma/Data API helper.
+"""
+import asyncio
+import ssl
+from typing import Optional
+
+import aiohttp
+import certifi
+
+from ..config import Config
+from .logger import info
+
+# Built once per process - loading the CA bundle is not free
+SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_lock: Optional[asyncio.Lock] = None
+
+
+def _build_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        ssl=SSL_CONTEXT,
+        limit=Config.HTTP_POOL_LIMIT,
+        limit_per_host=Config.HTTP_POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=Config.HTTP_DNS_CACHE_TTL_SECONDS,
+        use_dns_cache=True,
+        keepalive_timeout=Config.HTTP_KEEPALIVE_TIMEOUT_SECONDS,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=Config.HTTP_DEFAULT_TIMEOUT_SECONDS),
+    )
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the process-wide session, creating it on first use"""
+    global _session, _session_lock
+    if _session is not None and not _session.closed:
+        return _session
+
+    if _session_lock is None:
+        _session_lock = asyncio.Lock()
+
+    async with _session_lock:
+        if _session is None or _session.closed:
+            _session = _build_session()
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared session (call once on shutdown)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        info("HTTP client pool closed.")
+    _session = None
@@ -1,11 +1,17 @@
 """
 Logger utility with colored output and file logging
 """
+import atexit
+import json
 import os
+import queue
 import sys
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Any
+from typing import Callable, List, Optional, Any
+
+from ..config import Config
 
 try:
     from colorama import init, Fore, Style
@@ -29,17 +35,195 @@ def get_log_file_name() -> Path:
     return logs_dir / f'bot-{date}.log'
 
 
+def get_event_file_name() -> Path:
+    """Get trade-decision event (JSONL) file name for today"""
+    date = datetime.now().strftime('%Y-%m-%d')
+    return logs_dir / f'events-{date}.jsonl'
+
+
+class _LogSink:
+    """
+    Background log writer.
+    Callers only enqueue; a daemon thread batches lines, keeps files open,
+    rotates by day (file name) and by size (.1, .2, ... backups).
+    When the queue is full new lines are dropped and counted - logging must
+    never block or grow memory without bound on the trading path.
+    """
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float, max_bytes: int, backups: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._handles = {} # path -> open file
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._dropped_lock = threading.Lock() # put() runs on any thread; only taken when a line is dropped
+        self._stopped = False
+
+    def put(self, path_fn: Callable[[], Path], line: str) -> None:
+        if self._stopped:
+            return
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait((path_fn, line))
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if item is None:
+                self._write_batch([])
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write_batch(batch)
+                    return
+                batch.append(item)
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: list) -> None:
+        try:
+            grouped = {}
+            for path_fn, line in batch:
+                grouped.setdefault(path_fn(), []).append(line)
+            if self.dropped:
+                with self._dropped_lock:
+                    dropped, self.dropped = self.dropped, 0
+                grouped.setdefault(get_log_file_name(), []).append(
+                    f'[{datetime.now().isoformat()}] WARNING: log queue full, dropped {dropped} lines\n')
+
+            for path, lines in grouped.items():
+                handle = self._handle(path)
+                handle.write(''.join(lines))
+                handle.flush()
+                if handle.tell() >= self.max_bytes:
+                    self._rotate(path)
+        except Exception:
+            # Silently fail to avoid infinite loops
+            pass
+
+    def _handle(self, path: Path):
+        handle = self._handles.get(path)
+        if handle is None:
+            # New day -> new file name; close yesterday's handle for the same stream
+            stream = path.name.split('-', 1)[0]
+            for old_path in [p for p in self._handles if p.name.split('-', 1)[0] == stream]:
+                self._handles.pop(old_path).close()
+            handle = open(path, 'a', encoding='utf-8')
+            self._handles[path] = handle
+        return handle
+
+    def _rotate(self, path: Path) -> None:
+        self._handles.pop(path).close()
+        for i in range(self.backups - 1, 0, -1):
+            src = path.with_name(f'{path.name}.{i}')
+            if src.exists():
+                os.replace(src, path.with_name(f'{path.name}.{i + 1}'))
+        os.replace(path, path.with_name(f'{path.name}.1'))
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush everything queued and stop the writer"""
+        if self._stopped:
+            return
+        self._stopped = True
+        if self._thread is not None:
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        for handle in self._handles.values():
+            try:
+                handle.close()
+            except Exception:
+                pass
+        self._handles.clear()
+
+
+_console_enabled = True
+_files_enabled = True
+
+
+def configure_logging(console: bool = True, files: bool = True) -> None:
+    """Turn console output and/or log/event files off (e.g. for offline replays)"""
+    global _console_enabled, _files_enabled
+    _console_enabled = console
+    _files_enabled = files
+
+
+_sink = _LogSink(
+    max_queue=Config.LOG_QUEUE_MAX,
+    batch_size=Config.LOG_BATCH_SIZE,
+    flush_interval=Config.LOG_FLUSH_INTERVAL_SECONDS,
+    max_bytes=Config.LOG_MAX_BYTES,
+    backups=Config.LOG_BACKUP_COUNT,
+)
+
+
 def write_to_file(message: str) -> None:
-    """Write message to log file"""
+    """Queue message for the log file (written by the background sink)"""
+    if not _files_enabled:
+        return
+    timestamp = datetime.now().isoformat()
+    _sink.put(get_log_file_name, f'[{timestamp}] {message}\n')
+
+
+_event_listeners: List[Callable[[dict], None]] = []
+
+
+def add_event_listener(callback: Callable[[dict], None]) -> None:
+    """Also hand every event record to callback (called inline - keep it cheap)"""
+    _event_listeners.append(callback)
+
+
+def remove_event_listener(callback: Callable[[dict], None]) -> None:
+    if callback in _event_listeners:
+        _event_listeners.remove(callback)
+
+
+def event(kind: str, **fields: Any) -> None:
+    """Record a machine-readable trade-decision event (one JSON object per line)"""
+    if not _files_enabled and not _event_listeners:
+        return
+    record = {'ts': datetime.now().isoformat(), 'event': kind}
+    record.update(fields)
+    for callback in _event_listeners:
+        try:
+            callback(record)
+        except Exception:
+            pass
+    if not _files_enabled:
+        return
     try:
-        log_file = get_log_file_name()
-        timestamp = datetime.now().isoformat()
-        log_entry = f'[{timestamp}] {message}\n'
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(log_entry)
+        line = json.dumps(record, default=str)
     except Exception:
-        # Silently fail to avoid infinite loops
-        pass
+        return
+    _sink.put(get_event_file_name, line + '\n')
+
+
+def shutdown_logging() -> None:
+    """Flush and stop the background log writer (call on shutdown)"""
+    _sink.close()
 
 
 def format_address(address: str) -> str:
@@ -52,51 +236,56 @@ def mask_address(address: str) -> str:
     return f'{address[:6]}{"*" * 34}{address[-4:]}'
 
 
+def _print(*args, **kwargs) -> None:
+    if _console_enabled:
+        print(*args, **kwargs)
+
+
 def header(title: str) -> None:
     """Print header"""
-    print(f'\n{Fore.CYAN}{Style.BRIGHT}{"=" * 70}{Style.RESET_ALL}')
-    print(f'{Fore.CYAN}{Style.BRIGHT}  {title}{Style.RESET_ALL}')
-    print(f'{Fore.CYAN}{Style.BRIGHT}{"=" * 70}{Style.RESET_ALL}\n')
+    _print(f'\n{Fore.CYAN}{Style.BRIGHT}{"=" * 70}{Style.RESET_ALL}')
+    _print(f'{Fore.CYAN}{Style.BRIGHT}  {title}{Style.RESET_ALL}')
+    _print(f'{Fore.CYAN}{Style.BRIGHT}{"=" * 70}{Style.RESET_ALL}\n')
     write_to_file(f'HEADER: {title}')
 
 
 def info(message: str) -> None:
     """Print info message"""
-    print(f'{Fore.BLUE}[INFO]{Style.RESET_ALL} {message}')
+    _print(f'{Fore.BLUE}[INFO]{Style.RESET_ALL} {message}')
     write_to_file(f'INFO: {message}')
 
 
 def trade_detect(message: str) -> None:
     """Print detected trade message in MAGENTA"""
     # Use Magenta for visibility
-    print(f'{Fore.MAGENTA}[DETECTED]{Style.RESET_ALL} {message}')
+    _print(f'{Fore.MAGENTA}[DETECTED]{Style.RESET_ALL} {message}')
     write_to_file(f'DETECTED: {message}')
 
 
 def success(message: str) -> None:
     """Print success message"""
-    print(f'{Fore.GREEN}[SUCCESS]{Style.RESET_ALL} {message}')
+    _print(f'{Fore.GREEN}[SUCCESS]{Style.RESET_ALL} {message}')
     write_to_file(f'SUCCESS: {message}')
 
 
 def warning(message: str) -> None:
     """Print warning message"""
-    print(f'{Fore.YELLOW}[WARNING]{Style.RESET_ALL} {message}')
+    _print(f'{Fore.YELLOW}[WARNING]{Style.RESET_ALL} {message}')
     write_to_file(f'WARNING: {message}')
 
 
 def error(message: str) -> None:
     """Print error message"""
-    print(f'{Fore.RED}[ERROR]{Style.RESET_ALL} {message}', file=sys.stderr)
+    _print(f'{Fore.RED}[ERROR]{Style.RESET_ALL} {message}', file=sys.stderr)
     write_to_file(f'ERROR: {message}')
 
 
 def debug(message: str) -> None:
     """Print debug message"""
     if USE_COLORS:
-        print(f'{Fore.CYAN}[DEBUG]{Style.RESET_ALL} {message}')
+        _print(f'{Fore.CYAN}[DEBUG]{Style.RESET_ALL} {message}')
     else:
-        print(f'[DEBUG] {message}')
+        _print(f'[DEBUG] {message}')
     write_to_file(f'DEBUG: {message}')
 
-__all__ = ['header', 'info', 'success', 'warning', 'error', 'trade_detect', 'debug']
+__all__ = ['header', 'info', 'success', 'warning', 'error', 'trade_detect', 'debug', 'event', 'shutdown_logging', 'configure_logging']
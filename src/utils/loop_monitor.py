@@ -0,0 +1,213 @@
+"""
+Event-loop health
+LoopMonitor: a heartbeat task measures how late the loop wakes it (lag) while
+a watchdog thread notices when a beat is overdue and captures the loop
+thread's stack *during* the stall - i.e. the blocking call itself.
+SamplingProfiler: on-demand statistical profiler (SIGUSR1 or GET
+/debug/profile on the metrics endpoint) that snapshots every thread's stack
+at a fixed rate and writes collapsed stacks ("folded" format, one
+`frame;frame;frame count` line per stack) for flamegraph.pl / speedscope.
+"""
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from ..config import Config
+from .logger import info, warning, error, event
+from .metrics import metrics
+
+LOOP_LAG = metrics.histogram("polybot_event_loop_lag_seconds", "How late the event loop ran the heartbeat")
+LOOP_STALLS = metrics.counter("polybot_event_loop_stalls_total", "Heartbeats late by more than LOOP_STALL_THRESHOLD_SECONDS")
+
+
+def _frame_label(code, cache: Dict) -> str:
+    label = cache.get(code)
+    if label is None:
+        path = code.co_filename.replace('\\', '/').split('/')
+        label = cache[code] = f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+    return label
+
+
+class SamplingProfiler:
+    """Daemon thread sampling sys._current_frames(); stacks are aggregated, never stored per sample"""
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict = {} # code object -> frame label
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self.stacks.clear()
+        self.samples = 0
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
+        return self.stacks
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(_frame_label(frame.f_code, self._labels))
+                    frame = frame.f_back
+                frames.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def save(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started_at or time.time()).strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(directory, f"profile-{stamp}.folded")
+        with open(path, 'w') as f:
+            f.write(self.folded())
+        return path
+
+
+class LoopMonitor:
+    def __init__(self, interval: Optional[float] = None, threshold: Optional[float] = None):
+        self.interval = interval or Config.LOOP_MONITOR_INTERVAL_SECONDS
+        self.threshold = threshold or Config.LOOP_STALL_THRESHOLD_SECONDS
+        self.profiler = SamplingProfiler(Config.PROFILE_SAMPLE_INTERVAL_SECONDS)
+        self.max_lag = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._deadline = 0.0 # monotonic time the current heartbeat is due
+        self._stall: Optional[Tuple[float, str]] = None # (deadline, loop stack) captured by the watchdog
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._profile_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Call from the loop thread; stalls are caught from this point on, even before the next await"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._deadline = time.monotonic() + self.interval
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        self._task = asyncio.create_task(self._heartbeat())
+        try:
+            self._loop.add_signal_handler(signal.SIGUSR1, self.request_profile)
+        except (NotImplementedError, AttributeError, RuntimeError, ValueError):
+            pass # No POSIX signals here (Windows) or not the main thread; the HTTP endpoint still works
+        info(f"Event loop monitor running (stall threshold {self.threshold * 1000:.0f}ms, SIGUSR1 = profile).")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+        if self._profile_task and not self._profile_task.done():
+            self._profile_task.cancel()
+        if self.profiler.running:
+            self.profiler.stop()
+        if self._loop:
+            try:
+                self._loop.remove_signal_handler(signal.SIGUSR1)
+            except (NotImplementedError, AttributeError, RuntimeError, ValueError):
+                pass
+        if self._watchdog:
+            self._watchdog.join(self.threshold * 2)
+
+    # --- Stall detection ------------------------------------------------
+
+    async def _heartbeat(self):
+        while True:
+            self._deadline = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._deadline)
+            LOOP_LAG.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag < self.threshold:
+                continue
+
+            LOOP_STALLS.inc()
+            stall, self._stall = self._stall, None
+            stack = stall[1] if stall else None
+            warning(f"Event loop stalled for {lag * 1000:.0f}ms")
+            event("loop_stall", seconds=lag, stack=stack)
+
+    def _watch(self):
+        """Watchdog thread: grab the loop thread's stack once per overdue heartbeat"""
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(poll):
+            deadline = self._deadline
+            overdue = time.monotonic() - deadline
+            if overdue < self.threshold or (self._stall and self._stall[0] == deadline):
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self._stall = (deadline, stack)
+            warning(f"Event loop blocked for {overdue * 1000:.0f}ms+, loop thread is at:\n{stack.rstrip()}")
+
+    # --- Profiling ------------------------------------------------------
+
+    async def profile(self, seconds: float) -> Optional[str]:
+        """Sample every thread for `seconds`, write the folded stacks under PROFILE_DIR and return the path"""
+        if self.profiler.running:
+            return None
+        seconds = max(0.1, min(seconds, Config.PROFILE_MAX_SECONDS))
+        info(f"Sampling profiler started for {seconds:g}s")
+        self.profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.profiler.stop()
+        path = self.profiler.save(Config.PROFILE_DIR)
+        info(f"Profile written to {path} ({self.profiler.samples} samples)")
+        return path
+
+    def request_profile(self):
+        """SIGUSR1 handler"""
+        if self.profiler.running:
+            warning("Profiler already running; ignoring request")
+            return
+        self._profile_task = asyncio.create_task(self._profile_logged(Config.PROFILE_DEFAULT_SECONDS))
+
+    async def _profile_logged(self, seconds: float):
+        try:
+            await self.profile(seconds)
+        except Exception as e:
+            error(f"Profiling failed: {e}")
+
+    async def profile_endpoint(self, query: Dict[str, str]) -> Tuple[str, str, bytes]:
+        """GET /debug/profile?seconds=N -> folded stacks (also saved under PROFILE_DIR)"""
+        try:
+            seconds = float(query.get("seconds", Config.PROFILE_DEFAULT_SECONDS))
+        except ValueError:
+            return "400 Bad Request", "text/plain", b"seconds must be a number\n"
+        path = await self.profile(seconds)
+        if path is None:
+            return "409 Conflict", "text/plain", b"a profile is already running\n"
+        return "200 OK", "text/plain; charset=utf-8", self.profiler.folded().encode()
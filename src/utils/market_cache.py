@@ -0,0 +1,219 @@
+"""
+Market metadata cache
+Gamma market objects indexed by both condition_id and CLOB token id,
+with TTL + LRU eviction, end-date expiry and optional on-disk persistence.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from ..config import Config
+from .logger import info, warning, error
+
+CACHE_VERSION = 1
+
+
+def normalize_condition_id(cid: Optional[str]) -> Optional[str]:
+    """One spelling for a condition id wherever it is compared or used as a key"""
+    return cid.strip().lower() if cid else None
+
+
+def market_condition_id(market: dict) -> Optional[str]:
+    """Gamma sometimes uses conditionId vs condition_id"""
+    return normalize_condition_id(market.get('condition_id') or market.get('conditionId'))
+
+
+def market_token_ids(market: dict) -> List[str]:
+    """Extract CLOB token ids from a Gamma market (clobTokenIds is a JSON-encoded string)"""
+    tokens = []
+    raw = market.get('clobTokenIds') or market.get('clob_token_ids')
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raw = [t.strip() for t in raw.split(',')]
+    if isinstance(raw, list):
+        tokens.extend(str(t) for t in raw if t)
+
+    for t in market.get('tokens') or []:
+        if isinstance(t, dict) and t.get('token_id'):
+            tokens.append(str(t['token_id']))
+    return list(dict.fromkeys(tokens))
+
+
+def market_end_timestamp(market: dict) -> Optional[float]:
+    """Parse end_date_iso (or Gamma's endDate) to epoch seconds; naive values are UTC"""
+    end_iso = market.get('end_date_iso') or market.get('endDate')
+    if not end_iso:
+        return None
+    try:
+        end_dt = datetime.fromisoformat(str(end_iso).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if end_dt.tzinfo is None:
+        end_dt = end_dt.replace(tzinfo=timezone.utc)
+    return end_dt.timestamp()
+
+
+class MarketCache:
+    def __init__(self, ttl_seconds: float, max_entries: int, path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path
+        # condition_id -> (stored_at, expires_at, market, token_ids); order = LRU
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._token_index: Dict[str, str] = {} # token_id -> condition_id
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expiry(self, market: dict, stored_at: float) -> float:
+        expires_at = stored_at + self.ttl_seconds
+        end_ts = market_end_timestamp(market)
+        if end_ts is not None:
+            expires_at = min(expires_at, end_ts)
+        return expires_at
+
+    def _lookup(self, condition_id: str, now: float) -> Optional[dict]:
+        entry = self._entries.get(condition_id)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            self._remove(condition_id)
+            return None
+        self._entries.move_to_end(condition_id)
+        return entry[2]
+
+    def _remove(self, condition_id: str):
+        entry = self._entries.pop(condition_id, None)
+        if entry is None:
+            return
+        for token_id in entry[3]:
+            if self._token_index.get(token_id) == condition_id:
+                del self._token_index[token_id]
+        self._dirty = True
+
+    def get_by_condition(self, condition_id: str) -> Optional[dict]:
+        if not condition_id:
+            return None
+        market = self._lookup(condition_id.lower(), time.time())
+        if market is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return market
+
+    def get_by_token(self, token_id: str) -> Optional[dict]:
+        condition_id = self._token_index.get(str(token_id)) if token_id else None
+        market = self._lookup(condition_id, time.time()) if condition_id else None
+        if market is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return market
+
+    def peek_condition_id(self, token_id: str) -> Optional[str]:
+        """token -> condition_id without touching hit/miss counters or LRU order (lane routing)"""
+        return self._token_index.get(str(token_id)) if token_id else None
+
+    def put(self, market: dict, token_id: Optional[str] = None):
+        """Insert/refresh a market. token_id is the id it was looked up by (indexed even if Gamma omits it)"""
+        tokens = market_token_ids(market)
+        if token_id and str(token_id) not in tokens:
+            tokens.append(str(token_id))
+        self._insert(market, tokens, time.time())
+
+    def _insert(self, market: dict, tokens: List[str], stored_at: float):
+        condition_id = market_condition_id(market)
+        if not condition_id:
+            return
+
+        expires_at = self._expiry(market, stored_at)
+        if expires_at <= time.time():
+            return
+
+        if condition_id in self._entries:
+            self._remove(condition_id)
+        self._entries[condition_id] = (stored_at, expires_at, market, tokens)
+        for t in tokens:
+            self._token_index[t] = condition_id
+        self._dirty = True
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def load(self) -> int:
+        """Warm the cache from disk. Returns number of entries restored"""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') != CACHE_VERSION:
+                return 0
+            for item in data.get('entries', []):
+                market = item['market']
+                tokens = item.get('tokens') or market_token_ids(market)
+                self._insert(market, tokens, item['stored_at'])
+        except Exception as e:
+            warning(f"Market cache file unreadable, starting cold: {e}")
+            return 0
+        self._dirty = False
+        info(f"Market cache warmed with {len(self._entries)} markets from {self.path}")
+        return len(self._entries)
+
+    def _snapshot(self) -> dict:
+        return {
+            'version': CACHE_VERSION,
+            'entries': [
+                {'stored_at': stored_at, 'market': market, 'tokens': tokens}
+                for stored_at, _, market, tokens in self._entries.values()
+            ]
+        }
+
+    @staticmethod
+    def _write(path: str, snapshot: dict):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def save(self):
+        """Persist synchronously (used on shutdown)"""
+        if not self.path or not self._dirty:
+            return
+        try:
+            self._write(self.path, self._snapshot())
+            self._dirty = False
+        except Exception as e:
+            error(f"Failed to persist market cache: {e}")
+
+    async def autosave(self, interval: float):
+        """Periodically persist in a worker thread so the event loop never blocks on disk"""
+        while True:
+            await asyncio.sleep(interval)
+            if not self.path or not self._dirty:
+                continue
+            # Snapshot on the loop thread (dicts must not change mid-dump), write off-thread
+            snapshot = self._snapshot()
+            self._dirty = False
+            try:
+                await asyncio.to_thread(self._write, self.path, snapshot)
+            except Exception as e:
+                self._dirty = True
+                error(f"Failed to persist market cache: {e}")
+
+
+market_cache = MarketCache(
+    ttl_seconds=Config.MARKET_CACHE_TTL_SECONDS,
+    max_entries=Config.MARKET_CACHE_MAX_ENTRIES,
+    path=Config.MARKET_CACHE_FILE,
+)
@@ -0,0 +1,284 @@
+"""
+In-process metrics
+Counters, gauges and histograms kept in plain dicts and rendered in the
+Prometheus text exposition format (0.0.4) by a small local HTTP endpoint.
+Recording is a dict lookup and an add, so instrumentation stays on in
+production; nothing is formatted until a scrape. Update metrics from the
+event-loop thread only.
+"""
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl
+
+from ..config import Config
+from .logger import info, warning
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+class Metric:
+    """
+    One named metric family. Values are keyed by label-value tuples.
+    callback: optional fn evaluated at scrape time instead of stored values;
+    returns a number (no labels) or a {label-values tuple: number} dict.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values: Dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _collect(self) -> Dict[tuple, float]:
+        if self.callback is None:
+            return self._values
+        result = self.callback()
+        return result if isinstance(result, dict) else {(): result}
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in self._collect().items()]
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Fixed upper bounds; per label set: [per-bucket counts (last = +Inf), sum, count]"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def value(self, **labels) -> dict:
+        state = self._values.get(self._key(labels))
+        return {"count": state[2], "sum": state[1]} if state else {"count": 0, "sum": 0.0}
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Re-registering a name replaces the old family (e.g. callbacks bound to a new run)"""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, callback))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def track_caches(self, caches: Dict[str, object]):
+        """Scrape-time hit/miss counters and hit ratio for objects exposing .hits / .misses"""
+        def collect(attr):
+            return lambda: {(name,): getattr(cache, attr) for name, cache in caches.items()}
+
+        def ratio():
+            result = {}
+            for name, cache in caches.items():
+                lookups = cache.hits + cache.misses
+                result[(name,)] = cache.hits / lookups if lookups else 0.0
+            return result
+
+        self.counter("polybot_cache_hits_total", "Cache lookups served from memory", ["cache"], collect("hits"))
+        self.counter("polybot_cache_misses_total", "Cache lookups that went to the network", ["cache"], collect("misses"))
+        self.gauge("polybot_cache_hit_ratio", "Lifetime hit ratio per cache", ["cache"], ratio)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # A broken callback must not take the whole scrape down
+                warning(f"Metric {metric.name} failed to render: {e}")
+        return "\n".join(lines) + "\n"
+
+
+# query params -> (status line, content type, body)
+RouteHandler = Callable[[Dict[str, str]], Awaitable[Tuple[str, str, bytes]]]
+
+
+class MetricsServer:
+    """
+    Minimal HTTP/1.0 responder: GET /metrics returns the registry as Prometheus
+    text. Extra local-only routes (e.g. /debug/profile) can be added.
+    """
+    def __init__(self, registry: "MetricsRegistry", host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.routes: Dict[str, RouteHandler] = {"/": self._metrics, "/metrics": self._metrics}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def add_route(self, path: str, handler: RouteHandler):
+        self.routes[path] = handler
+
+    async def _metrics(self, query: Dict[str, str]) -> Tuple[str, str, bytes]:
+        return "200 OK", CONTENT_TYPE, self.registry.render().encode()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        info(f"Metrics endpoint on http://{self.host}:{self.port}/metrics")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            while True: # Headers are ignored, but must be drained
+                line = await asyncio.wait_for(reader.readline(), 5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request_line.decode("latin-1").split()
+            method = parts[0] if parts else ""
+            path, _, query = (parts[1] if len(parts) > 1 else "").partition("?")
+            handler = self.routes.get(path)
+            if method in ("GET", "HEAD") and handler:
+                status, content_type, body = await handler(dict(parse_qsl(query)))
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode())
+            if method != "HEAD":
+                writer.write(body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        info("Metrics endpoint stopped.")
+
+
+metrics = MetricsRegistry()
+
+# Trade path
+STAGE_SECONDS = metrics.histogram("polybot_stage_seconds", "Wall time of each trade-processing stage", ["stage"])
+TRADES_SEEN = metrics.counter("polybot_trades_seen_total", "New trades detected per tracked trader", ["trader"])
+TRADES_SKIPPED = metrics.counter("polybot_trades_skipped_total", "Trades not mirrored, by stage and reason", ["stage", "reason"])
+TRADES_CLASSIFIED = metrics.counter("polybot_trades_classified_total", "Trades that matched a strategy", ["classification"])
+ORDERS = metrics.counter("polybot_orders_total", "Orders sent to the CLOB", ["classification", "result"])
+ACTIVITY_POLLS = metrics.counter("polybot_activity_polls_total", "Activity API polls per trader", ["trader", "result"])
+START_TIME = metrics.gauge("polybot_start_time_seconds", "Unix time the process started")
+START_TIME.set(time.time())
+
+
+async def start_metrics_server() -> Optional[MetricsServer]:
+    """Serve the global registry on Config.METRICS_HOST:METRICS_PORT (port 0 = disabled)"""
+    if not Config.METRICS_PORT:
+        return None
+    server = MetricsServer(metrics, Config.METRICS_HOST, Config.METRICS_PORT)
+    try:
+        await server.start()
+    except OSError as e:
+        warning(f"Metrics endpoint disabled, could not bind {Config.METRICS_HOST}:{Config.METRICS_PORT}: {e}")
+        return None
+    return server
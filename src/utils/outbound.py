@@ -0,0 +1,304 @@
+"""
+Outbound request governor (one per Polymarket host: data-api, gamma-api, CLOB)
+Every client takes a token from its host's bucket before calling it, so a burst
+in one subsystem cannot starve another and all of them back off together.
+
+- Priority classes: ORDER > TRADE (detection + enrichment) > BACKGROUND.
+  Waiters are served highest priority first, and background calls may not
+  dip into a reserve kept for the other two.
+- A 429 pauses the whole host (Retry-After, or a default) and halves its
+  rate; each success adds a little back until the configured rate is reached.
+- Circuit breaker: consecutive failures (429/5xx/network) open it and calls fail
+  fast with CircuitOpenError; after a cooldown one probe is let through
+  (half-open) and decides whether it closes or reopens with a longer cooldown.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..config import Config
+from .logger import warning, info
+from .metrics import metrics
+
+ORDER, TRADE, BACKGROUND = 0, 1, 2
+NO_PROBE = 0 # Circuit ticket of calls admitted while closed
+PRIORITY_NAMES = {ORDER: "order", TRADE: "trade", BACKGROUND: "background"}
+
+OUTBOUND_REQUESTS = metrics.counter("polybot_outbound_requests_total",
+                                    "Requests admitted per host and subsystem (budget usage)",
+                                    ["host", "subsystem", "priority"])
+OUTBOUND_WAIT = metrics.histogram("polybot_outbound_wait_seconds",
+                                  "Time spent waiting for a rate-limit token", ["host", "priority"])
+OUTBOUND_THROTTLED = metrics.counter("polybot_outbound_throttled_total", "429 responses per host", ["host"])
+OUTBOUND_RATE = metrics.gauge("polybot_outbound_rate_limit", "Current admitted requests/s per host", ["host"])
+CIRCUIT_STATE = metrics.gauge("polybot_circuit_state", "Circuit breaker per host: 0 closed, 1 half-open, 2 open",
+                              ["host"])
+CIRCUIT_REJECTED = metrics.counter("polybot_circuit_rejected_total",
+                                   "Calls failed fast by an open circuit", ["host", "subsystem"])
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} circuit open (retry in {retry_in:.1f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, name: str, failure_threshold: int, open_seconds: float, max_open_seconds: float,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.open_seconds = open_seconds
+        self.opened_until = 0.0
+        self._probe: Optional[int] = None # Ticket of the half-open probe in flight
+        self._tickets = itertools.count(1)
+        CIRCUIT_STATE.set(self.state, host=name)
+
+    def _set(self, state: int):
+        if state != self.state:
+            self.state = state
+            CIRCUIT_STATE.set(state, host=self.name)
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_until - self.clock())
+
+    def allow(self) -> Optional[int]:
+        """
+        None = fail fast. Otherwise a ticket to hand back to release()/on_success()/on_failure():
+        0 for ordinary calls; in half-open state exactly one caller gets a probe ticket
+        """
+        if self.state == self.CLOSED:
+            return NO_PROBE
+        if self.state == self.OPEN:
+            if self.clock() < self.opened_until:
+                return None
+            self._set(self.HALF_OPEN)
+        if self._probe is not None:
+            return None
+        self._probe = next(self._tickets)
+        return self._probe
+
+    def _is_probe(self, ticket: int) -> bool:
+        return ticket != NO_PROBE and ticket == self._probe
+
+    def release(self, ticket: int):
+        """The admitted call ended without a verdict (e.g. cancelled)"""
+        if self._is_probe(ticket):
+            self._probe = None
+
+    def on_success(self, ticket: int):
+        if self.state != self.CLOSED and not self._is_probe(ticket):
+            return # A call admitted before the circuit opened proves nothing about now
+        self._probe = None
+        self.failures = 0
+        if self.state != self.CLOSED:
+            info(f"{self.name} circuit closed")
+            self.open_seconds = self.base_open_seconds
+            self._set(self.CLOSED)
+
+    def on_failure(self, ticket: int, open_for: Optional[float] = None):
+        if self.state == self.HALF_OPEN:
+            if not self._is_probe(ticket):
+                return
+            # Probe failed: back off harder
+            self._probe = None
+            self.open_seconds = min(self.max_open_seconds, self.open_seconds * 2)
+        elif self.state == self.OPEN:
+            if open_for:
+                self.opened_until = max(self.opened_until, self.clock() + open_for)
+            return
+        else:
+            self.failures += 1
+            if self.failures < self.failure_threshold:
+                return
+        self.opened_until = self.clock() + max(self.open_seconds, open_for or 0.0)
+        warning(f"{self.name} circuit OPEN for {self.opened_until - self.clock():.1f}s "
+                f"after {self.failures} consecutive failures")
+        self._set(self.OPEN)
+
+
+class HostLimiter:
+    def __init__(self, name: str, rate: float, burst: float, clock=time.monotonic):
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated_at = clock()
+        self.paused_until = 0.0
+        self.breaker = CircuitBreaker(name, Config.CIRCUIT_FAILURE_THRESHOLD, Config.CIRCUIT_OPEN_SECONDS,
+                                      Config.CIRCUIT_MAX_OPEN_SECONDS, clock)
+        self._reserve = {BACKGROUND: burst * Config.OUTBOUND_BACKGROUND_RESERVE_RATIO}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = [] # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        OUTBOUND_RATE.set(rate, host=name)
+
+    # --- Token bucket -------------------------------------------------------
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _wait_time(self, priority: int) -> float:
+        """0 = a token was taken; otherwise seconds until one could be"""
+        now = self.clock()
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        needed = 1 + self._reserve.get(priority, 0.0)
+        if self.tokens >= needed:
+            self.tokens -= 1
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def _queued_ahead(self, priority: int) -> bool:
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters) # Cancelled waiters
+        return bool(self._waiters) and self._waiters[0][0] <= priority
+
+    def _dispatch(self):
+        self._timer = None
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = self._wait_time(priority)
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+
+    async def _take(self, priority: int):
+        if not self._queued_ahead(priority) and self._wait_time(priority) == 0:
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._timer is not None:
+            # The new waiter may outrank the one the timer was set for (and need a shorter wait)
+            self._timer.cancel()
+        self._dispatch()
+        await future
+
+    # --- Admission and outcomes ---------------------------------------------
+
+    def _admit(self, subsystem: str) -> int:
+        ticket = self.breaker.allow()
+        if ticket is None:
+            CIRCUIT_REJECTED.inc(host=self.name, subsystem=subsystem)
+            raise CircuitOpenError(self.name, self.breaker.retry_in())
+        return ticket
+
+    def _admitted(self, priority: int, subsystem: str, started: float):
+        OUTBOUND_REQUESTS.inc(host=self.name, subsystem=subsystem, priority=PRIORITY_NAMES[priority])
+        OUTBOUND_WAIT.observe(self.clock() - started, host=self.name, priority=PRIORITY_NAMES[priority])
+
+    def on_success(self, ticket: int = NO_PROBE):
+        self.breaker.on_success(ticket)
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * Config.OUTBOUND_RATE_RECOVERY_STEP)
+            OUTBOUND_RATE.set(self.rate, host=self.name)
+
+    def on_failure(self, ticket: int = NO_PROBE):
+        self.breaker.on_failure(ticket)
+
+    def on_throttled(self, retry_after: Optional[float] = None, ticket: int = NO_PROBE):
+        """429: every subsystem on this host pauses and the admitted rate is halved"""
+        pause = retry_after if retry_after else Config.OUTBOUND_THROTTLE_PAUSE_SECONDS
+        now = self.clock()
+        self._refill(now)
+        self.paused_until = max(self.paused_until, now + pause)
+        self.tokens = 0.0
+        self.rate = max(self.max_rate * Config.OUTBOUND_MIN_RATE_RATIO, self.rate / 2)
+        OUTBOUND_RATE.set(self.rate, host=self.name)
+        OUTBOUND_THROTTLED.inc(host=self.name)
+        self.breaker.on_failure(ticket, open_for=pause)
+
+    def stats(self) -> dict:
+        return {"rate": self.rate, "tokens": self.tokens, "waiters": len(self._waiters),
+                "circuit": self.breaker.state}
+
+
+class OutboundCall:
+    """
+    One admitted request. Report the HTTP status with record(); an exception
+    escaping the block counts as a failure unless a status was recorded (or the
+    exception carries status_code, like py-clob-client's PolyApiException).
+    Cancellation is neutral, so cancelled hedges never trip the breaker.
+    """
+    def __init__(self, limiter: HostLimiter, priority: int, subsystem: str):
+        self.limiter = limiter
+        self.priority = priority
+        self.subsystem = subsystem
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+        self.ticket = NO_PROBE # Circuit ticket from admission; only the half-open probe's one counts
+
+    def record(self, status: int, retry_after=None):
+        self.status = status
+        if retry_after is not None:
+            try:
+                self.retry_after = float(retry_after)
+            except (TypeError, ValueError):
+                pass # HTTP-date form: fall back to the default pause
+
+    async def __aenter__(self) -> "OutboundCall":
+        self.ticket = self.limiter._admit(self.subsystem)
+        started = self.limiter.clock()
+        try:
+            await self.limiter._take(self.priority)
+        except BaseException:
+            self.limiter.breaker.release(self.ticket)
+            raise
+        self.limiter._admitted(self.priority, self.subsystem, started)
+        return self
+
+    def _finish(self, exc: Optional[BaseException]):
+        status = self.status
+        if status is None and exc is not None:
+            status = getattr(exc, 'status_code', None)
+        if status == 429:
+            self.limiter.on_throttled(self.retry_after, self.ticket)
+        elif status is not None and status >= 500:
+            self.limiter.on_failure(self.ticket)
+        elif status is None and isinstance(exc, asyncio.CancelledError):
+            self.limiter.breaker.release(self.ticket)
+        elif status is None and exc is not None:
+            self.limiter.on_failure(self.ticket)
+        else:
+            self.limiter.on_success(self.ticket)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._finish(exc)
+        return False
+
+
+_limiters: Dict[str, HostLimiter] = {
+    host: HostLimiter(host, rate, burst) for host, (rate, burst) in Config.OUTBOUND_RATE_LIMITS.items()
+}
+
+
+def limiter(host: str) -> HostLimiter:
+    return _limiters[host]
+
+
+def call(host: str, priority: int, subsystem: str) -> OutboundCall:
+    """
+    async with outbound.call("gamma", outbound.TRADE, "market_lookup") as c:
+        async with session.get(...) as resp:
+            c.record(resp.status, resp.headers.get('Retry-After'))
+    """
+    return OutboundCall(_limiters[host], priority, subsystem)
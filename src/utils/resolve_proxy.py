@@ -1,22 +1,28 @@
-import requests
+import aiohttp
+from ..config import Config
 from .logger import info, error
+from .http_client import get_session
+from .json_codec import loads
+from . import outbound
 
-def resolve_to_proxy(address: str) -> str:
+async def resolve_to_proxy(address: str) -> str:
     """
     Resolves an input address (EOA or Proxy) to its Proxy Wallet Address.
     If the input is already a proxy or has no public profile, checks Gamma.
     """
     try:
-        url = f"https://gamma-api.polymarket.com/public-profile?address={address}"
-        response = requests.get(url, timeout=10)
-        
-        if response.status_code == 404:
-            # Maybe it's already a proxy or just has no profile? 
-            # We assume the user provided the correct address if 404.
-            info(f"Address {address} profile not found (404). Using as-is.")
-            return address
-            
-        data = response.json()
+        session = await get_session()
+        async with outbound.call("gamma", outbound.BACKGROUND, "resolve_proxy") as call:
+            async with session.get(f"{Config.GAMMA_API_URL}/public-profile", params={"address": address},
+                                   timeout=aiohttp.ClientTimeout(total=10)) as response:
+                call.record(response.status, response.headers.get('Retry-After'))
+                if response.status == 404:
+                    # Maybe it's already a proxy or just has no profile? 
+                    # We assume the user provided the correct address if 404.
+                    info(f"Address {address} profile not found (404). Using as-is.")
+                    return address
+                data = loads(await response.read())
+
         proxy = data.get("proxyWallet")
         
         if proxy and proxy.lower() != address.lower():
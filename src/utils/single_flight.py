@@ -0,0 +1,88 @@
+"""
+Request coalescing
+Concurrent callers asking for the same key share ONE in-flight upstream call
+and its outcome. Failures (an exception, or a None result) are remembered for
+a short negative TTL so a burst of trades on a missing market or a failing
+RPC does not retry once per trade.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .metrics import metrics
+
+COALESCED = metrics.counter("polybot_singleflight_calls_total",
+                            "Coalesced lookups: leader = upstream call made, shared = joined one in flight, "
+                            "negative = recent failure replayed", ["group", "result"])
+
+NEGATIVE_PRUNE_THRESHOLD = 1024
+
+
+class SingleFlight:
+    def __init__(self, name: str, negative_ttl: float = 0.0, clock=time.monotonic):
+        self.name = name
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._failures: Dict[Hashable, Tuple[float, Optional[Exception]]] = {} # key -> (expires_at, error or None)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """
+        Return fn()'s result, sharing it with every concurrent caller of the same key.
+        The call runs in its own task: a caller that is cancelled stops waiting
+        without cancelling the request the others are waiting on.
+        """
+        failure = self._failures.get(key)
+        if failure is not None:
+            expires_at, exc = failure
+            if expires_at > self.clock():
+                COALESCED.inc(group=self.name, result="negative")
+                if exc is not None:
+                    raise exc
+                return None
+            del self._failures[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, fn))
+            # Retrieve the outcome even if every waiter was cancelled (no "never retrieved" warnings)
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+            COALESCED.inc(group=self.name, result="leader")
+        else:
+            COALESCED.inc(group=self.name, result="shared")
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable]):
+        try:
+            result = await fn()
+        except Exception as e:
+            self._remember(key, e)
+            raise
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+        if result is None:
+            self._remember(key, None)
+        return result
+
+    def _remember(self, key: Hashable, exc: Optional[Exception]):
+        if self.negative_ttl <= 0:
+            return
+        now = self.clock()
+        if len(self._failures) >= NEGATIVE_PRUNE_THRESHOLD:
+            self._failures = {k: v for k, v in self._failures.items() if v[0] > now}
+        self._failures[key] = (now + self.negative_ttl, exc)
+
+    def forget(self, key: Optional[Hashable] = None):
+        """
+        Later callers start a fresh request instead of joining the current one
+        (e.g. a balance read that began before we posted an order). Also clears
+        the key's negative entry. key=None forgets everything.
+        """
+        if key is None:
+            self._inflight.clear()
+            self._failures.clear()
+            return
+        self._inflight.pop(key, None)
+        self._failures.pop(key, None)
@@ -0,0 +1,125 @@
+"""
+Crash-safe risk state store
+Embedded SQLite in WAL mode: every write is an atomic commit that appends to
+the write-ahead log (cost independent of history size), the WAL is compacted
+periodically, and per-market exposure lives in its own indexed table so cap
+checks are a primary-key lookup.
+"""
+import json
+import os
+import sqlite3
+from typing import Optional
+
+from .logger import info, warning
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS market_exposures (
+    market_id TEXT PRIMARY KEY,
+    amount    REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class StateStore:
+    def __init__(self, path: str, compact_every: int = 500):
+        self.path = path
+        self.compact_every = compact_every
+        self._writes_since_compact = 0
+        # Autocommit mode; transactions are explicit so each logical update is atomic
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL survives process crashes; only an OS crash can roll back the latest commits
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _commit(self, statements: list):
+        cur = self.conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                cur.execute(sql, params)
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        self._writes_since_compact += 1
+        if self._writes_since_compact >= self.compact_every:
+            self.compact()
+
+    def is_empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM state LIMIT 1").fetchone() is None
+
+    def load_state(self) -> dict:
+        """Scalar/pool state as a dict (market exposures stay in their table)"""
+        rows = self.conn.execute("SELECT key, value FROM state").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def save_state(self, state: dict):
+        self._commit([
+            ("INSERT INTO state (key, value) VALUES (?, ?) "
+             "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, json.dumps(value)))
+            for key, value in state.items()
+        ])
+
+    def get_market_exposure(self, market_id: str) -> float:
+        row = self.conn.execute(
+            "SELECT amount FROM market_exposures WHERE market_id = ?", (market_id,)
+        ).fetchone()
+        return row[0] if row else 0.0
+
+    def market_exposures(self) -> dict:
+        """market_id -> exposure for every market with a recorded position"""
+        return dict(self.conn.execute("SELECT market_id, amount FROM market_exposures").fetchall())
+
+    def record_exposure(self, amount: float, market_id: Optional[str], current_exposure: float):
+        """Total + per-market exposure in ONE transaction - never half-applied"""
+        statements = [(
+            "INSERT INTO state (key, value) VALUES ('current_exposure', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (json.dumps(current_exposure),)
+        )]
+        if market_id:
+            statements.append((
+                "INSERT INTO market_exposures (market_id, amount) VALUES (?, ?) "
+                "ON CONFLICT(market_id) DO UPDATE SET amount = amount + excluded.amount", (market_id, amount)
+            ))
+        self._commit(statements)
+
+    def import_json(self, json_path: str) -> bool:
+        """One-time migration from the legacy bot_state.json"""
+        if not os.path.exists(json_path) or not self.is_empty():
+            return False
+        try:
+            with open(json_path, 'r') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            warning(f"Legacy state {json_path} unreadable, not migrated: {e}")
+            return False
+
+        exposures = legacy.pop("market_exposures", {}) or {}
+        statements = [
+            ("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+            for key, value in legacy.items()
+        ]
+        statements += [
+            ("INSERT OR REPLACE INTO market_exposures (market_id, amount) VALUES (?, ?)", (mid, float(amt)))
+            for mid, amt in exposures.items()
+        ]
+        self._commit(statements)
+        os.replace(json_path, f"{json_path}.migrated")
+        info(f"Migrated {json_path} -> {self.path} ({len(exposures)} market exposures)")
+        return True
+
+    def compact(self):
+        """Fold the WAL back into the main DB file and truncate it"""
+        self._writes_since_compact = 0
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.compact()
+        self.conn.close()
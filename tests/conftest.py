@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# The bot writes logs/ (and cursor/state files) relative to the working directory
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+sys.path.insert(0, TESTS_DIR) # factories.py
+os.chdir(tempfile.mkdtemp(prefix="polybot-tests-"))
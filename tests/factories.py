@@ -0,0 +1,31 @@
+"""Market / trade builders shared by the tests (weather markets that pass the market filter)"""
+import json
+from datetime import datetime, timezone
+
+from src.config import Config
+
+TRADER = "0x" + "cd" * 20
+START = 1_700_000_000
+
+
+def weather_market(index: int, title: str = "15°C", end_ts: int = START + 2 * 86400) -> dict:
+    condition_id = f"0x{index:064x}"
+    end = datetime.fromtimestamp(end_ts, tz=timezone.utc).replace(tzinfo=None)
+    return {
+        "condition_id": condition_id,
+        "question": f"{Config.MARKET_TYPE_FILTER} in {Config.CITY_FILTER} on {end:%B %d}? {title}",
+        "category": Config.CATEGORY_FILTER,
+        "description": f"Resolves to the reading at {Config.RESOLUTION_SOURCE.title()}.",
+        "clobTokenIds": json.dumps([f"{index}1", f"{index}2"]),
+        "outcomes": json.dumps(["Yes", "No"]),
+        "end_date_iso": end.isoformat(),
+        "groupItemTitle": title,
+        "events": [{"slug": "highest-temperature-in-london"}],
+    }
+
+
+def buy(market: dict, ts: int, usdc: float = 25.0, price: float = 0.5) -> dict:
+    return {"type": "TRADE", "proxyWallet": TRADER, "timestamp": ts, "conditionId": market["condition_id"],
+            "asset": json.loads(market["clobTokenIds"])[0], "outcome": "Yes", "side": "BUY",
+            "price": price, "size": usdc / price, "usdcSize": usdc, "transactionHash": f"0x{ts:x}",
+            "title": market["question"]}
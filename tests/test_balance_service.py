@@ -0,0 +1,23 @@
+import asyncio
+
+from src.utils.balance_service import BalanceService
+
+ADDRESS = "0x" + "11" * 20
+
+
+def test_read_started_before_invalidate_is_not_cached():
+    async def scenario():
+        service = BalanceService("http://127.0.0.1:1", ttl_seconds=60)
+        balances = iter([100.0, 40.0]) # Before / after our order
+        async def fetch(address):
+            await asyncio.sleep(0.02)
+            return next(balances)
+        service._fetch = fetch
+
+        read = asyncio.create_task(service.get_balance(ADDRESS))
+        await asyncio.sleep(0.005)
+        service.invalidate(ADDRESS) # Another lane just posted an order
+        assert await read == 100.0
+        return await service.get_balance(ADDRESS)
+
+    assert asyncio.run(scenario()) == 40.0
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from src.batch_classifier import CLASSIFICATIONS, classify_batch, describe, verify_against_scalar
+from src.config import Config
+from src.models import MarketInfo, TradeEvent
+from src.strategy import Strategy
+
+from factories import weather_market
+
+NOW = datetime(2025, 1, 1)
+
+
+def scalar(price, size_usd, alloc, market):
+    trade = TradeEvent(trader="", proxy_wallet="", condition_id=None, asset=None, outcome=None, side="BUY",
+                       price=price, size=0.0, size_usd=size_usd, timestamp=0, tx=None)
+    return Strategy.classify_trade(trade, MarketInfo(market), alloc, now=NOW.replace(tzinfo=timezone.utc).timestamp())
+
+
+def test_randomized_inputs_match_scalar():
+    result = verify_against_scalar(n=2000, seed=1234)
+    assert result["mismatches"] == 0, result["examples"]
+
+
+def test_edge_rows_match_scalar():
+    end_soon = (NOW + timedelta(minutes=30)).isoformat()
+    end_later = (NOW + timedelta(days=1)).isoformat()
+    wrong_city = dict(weather_market(1), question=f"{Config.MARKET_TYPE_FILTER} in Paris?", end_date_iso=end_later)
+    assert not Strategy.is_valid_market(wrong_city) # Only the market filter looks at the city
+
+    certain_alloc = Config.CERTAINTY_PORTFOLIO_ALLOCATION_THRESHOLD
+    rows = [ # price, size_usd, alloc, market
+        (0.5, 50.0, 0.01, {}), # Missing end date: no resolution veto
+        (Config.CERTAINTY_PRICE_MAX_CENTS / 100, 500.0, certain_alloc, {}),
+        (Config.CERTAINTY_PRICE_MAX_CENTS / 100, 500.0, certain_alloc, {"end_date_iso": end_soon}),
+        (0.5, 50.0, 0.01, wrong_city),
+        (Config.NORMAL_PRICE_MIN_CENTS / 100, 50.0, 0.01, {"end_date_iso": end_later}),
+        (Config.NORMAL_PRICE_MAX_CENTS / 100, 50.0, 0.01, {"end_date_iso": end_later}),
+        (Config.CERTAINTY_PRICE_MIN_CENTS / 100, 500.0, certain_alloc, {"end_date_iso": end_later}),
+        (0.0, 50.0, 0.01, {}),
+        (1.0, 500.0, certain_alloc, {}),
+        (0.5, Config.IGNORE_MIN_NOTIONAL_USD, Config.NORMAL_MAX_PORTFOLIO_ALLOCATION, {}),
+    ]
+    price, size_usd, alloc = (np.array([row[i] for row in rows], dtype=np.float64) for i in range(3))
+    ttr = np.array([MarketInfo(row[3]).end_ts - NOW.replace(tzinfo=timezone.utc).timestamp()
+                    if row[3].get("end_date_iso") else np.nan for row in rows])
+
+    classes, reasons = classify_batch(price, size_usd, alloc, ttr)
+
+    for i, (p, s, a, market) in enumerate(rows):
+        expected = scalar(p, s, a, market)
+        assert (CLASSIFICATIONS[classes[i]], describe(int(classes[i]), int(reasons[i]), p, s, a)) == expected, i
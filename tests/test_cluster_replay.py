@@ -0,0 +1,19 @@
+import asyncio
+
+from src.config import Config
+from src.replay import replay
+
+from factories import START, buy, weather_market
+
+
+def test_qualifying_cluster_places_orders_within_market_cap(monkeypatch):
+    monkeypatch.setattr(Config, "STRATEGY_MODE", "CLUSTER")
+    low, high = weather_market(1, "15°C"), weather_market(2, "16°C")
+    # 2.5% of the trader's $1000 per trade: the second bucket takes the cluster past 4%
+    activity = [buy(low, START), buy(high, START + 60), buy(low, START + 120)]
+
+    report = asyncio.run(replay(activity, [low, high], starting_balance=1000.0, trader_portfolio_value=1000.0))
+
+    assert report["outcomes"].get("placed:CLUSTER") == 2
+    for order in report["orders"]:
+        assert order["size"] <= 1000.0 * Config.MAX_SINGLE_MARKET_RATIO + 1e-9
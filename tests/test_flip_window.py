@@ -0,0 +1,38 @@
+from src.manager import FlipWindow
+
+
+class Clock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_past_the_window_are_evicted_oldest_first():
+    clock = Clock()
+    window = FlipWindow(window_seconds=60, clock=clock)
+    for i in range(100): # One new market every 10s: the window holds the last six
+        clock.now = i * 10
+        assert window.check_and_record(("trader", f"market-{i}", "Yes"), "BUY") is False
+
+    assert window.size == 6
+    assert list(window._entries)[0] == ("trader", "market-94", "Yes")
+    # An evicted market is no flip any more; a recent one still is
+    assert window.check_and_record(("trader", "market-10", "Yes"), "SELL") is False
+    assert window.check_and_record(("trader", "market-99", "Yes"), "SELL") is True
+
+
+def test_flip_detected_only_inside_the_window():
+    clock = Clock()
+    window = FlipWindow(window_seconds=60, clock=clock)
+    key = ("trader", "market", "Yes")
+    window.check_and_record(key, "BUY")
+
+    clock.now = 59
+    assert window.check_and_record(key, "SELL") is True # Flip: not recorded
+    assert window.check_and_record(key, "BUY") is False # Same side refreshes the entry
+
+    clock.now = 59 + 60
+    assert window.check_and_record(key, "SELL") is False
+    assert window.size == 1
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from src.config import Config
+from src.utils.hedging import HedgeBudget, HedgedEndpoint
+
+
+def hedged_endpoint(monkeypatch) -> HedgedEndpoint:
+    monkeypatch.setattr(Config, "HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+    return HedgedEndpoint("test", budget_seconds=2.0, hedge_budget=HedgeBudget(ratio=0.0, burst=5))
+
+
+def attempts(*behaviours):
+    """fn() for HedgedEndpoint.call: the n-th attempt sleeps, then returns or raises; outcomes are logged"""
+    log = []
+
+    async def fn():
+        n = len(log)
+        log.append("started")
+        delay, outcome = behaviours[n]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log[n] = "cancelled"
+            raise
+        log[n] = "finished"
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return fn, log
+
+
+def test_fast_hedge_wins_and_slow_primary_is_cancelled(monkeypatch):
+    endpoint = hedged_endpoint(monkeypatch)
+    fn, log = attempts((1.0, "slow"), (0.01, "fast"))
+
+    async def run():
+        result = await endpoint.call(fn)
+        await asyncio.sleep(0) # Let the cancellation land
+        return result
+
+    assert asyncio.run(run()) == "fast"
+    assert log == ["cancelled", "finished"]
+
+
+def test_raises_only_after_both_attempts_failed(monkeypatch):
+    endpoint = hedged_endpoint(monkeypatch)
+    fn, log = attempts((0.1, ValueError("primary")), (0.3, ValueError("hedge")))
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(ValueError, match="hedge"):
+            await endpoint.call(fn)
+        return loop.time() - started
+
+    elapsed = asyncio.run(run())
+    assert log == ["finished", "finished"]
+    assert elapsed >= 0.3 # The primary's failure alone did not end the call
@@ -0,0 +1,22 @@
+import threading
+
+from src.utils.logger import _LogSink
+
+
+def test_dropped_lines_are_counted_exactly_across_threads():
+    sink = _LogSink(max_queue=1, batch_size=10, flush_interval=0.1, max_bytes=1 << 20, backups=1)
+    sink._thread = object() # No writer thread: the queue stays full after the first line
+    sink.put(lambda: None, "first\n")
+    threads_count, lines = 8, 5000
+
+    def spam():
+        for _ in range(lines):
+            sink.put(lambda: None, "line\n")
+
+    threads = [threading.Thread(target=spam) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sink.dropped == threads_count * lines
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+from src.utils import market_cache as market_cache_module
+from src.utils.market_cache import MarketCache
+
+from factories import START, weather_market
+
+
+class FakeTime:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+def install_clock(monkeypatch, now: float = START) -> FakeTime:
+    clock = FakeTime(now)
+    monkeypatch.setattr(market_cache_module, "time", clock)
+    return clock
+
+
+def token(market: dict) -> str:
+    return json.loads(market["clobTokenIds"])[0]
+
+
+def test_lru_evicts_least_recently_used(monkeypatch):
+    install_clock(monkeypatch)
+    cache = MarketCache(ttl_seconds=3600, max_entries=2)
+    first, second, third = (weather_market(i) for i in (1, 2, 3))
+    cache.put(first)
+    cache.put(second)
+    assert cache.get_by_token(token(first)) is first # first is now the most recent
+
+    cache.put(third)
+
+    assert cache.get_by_condition(second["condition_id"]) is None
+    assert cache.get_by_condition(first["condition_id"]) is first
+    assert cache.get_by_token(token(third)) is third
+    assert cache.peek_condition_id(token(second)) is None # Evicted tokens leave the index too
+
+
+def test_ttl_and_end_date_expiry(monkeypatch):
+    clock = install_clock(monkeypatch)
+    cache = MarketCache(ttl_seconds=600, max_entries=10)
+    long_lived = weather_market(1, end_ts=START + 86400)
+    ending = weather_market(2, end_ts=START + 300)
+    cache.put(long_lived)
+    cache.put(ending)
+
+    clock.now = START + 300 # Market end comes before the TTL
+    assert cache.get_by_condition(ending["condition_id"]) is None
+    assert cache.get_by_condition(long_lived["condition_id"]) is long_lived
+
+    clock.now = START + 600
+    assert cache.get_by_condition(long_lived["condition_id"]) is None
+    assert len(cache) == 0
+
+    cache.put(weather_market(3, end_ts=START)) # Already ended: never stored
+    assert len(cache) == 0
+
+
+def test_persistence_round_trip(monkeypatch, tmp_path):
+    clock = install_clock(monkeypatch)
+    path = str(tmp_path / "market_cache.json")
+    cache = MarketCache(ttl_seconds=600, max_entries=10, path=path)
+    market = weather_market(1)
+    cache.put(market, token_id="extra-token") # Indexed under a token Gamma omitted
+
+    async def autosave_once():
+        task = asyncio.create_task(cache.autosave(0.01))
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(autosave_once())
+
+    clock.now = START + 100
+    reloaded = MarketCache(ttl_seconds=600, max_entries=10, path=path)
+    assert reloaded.load() == 1
+    assert reloaded.get_by_token("extra-token") == market
+    assert reloaded.get_by_token(token(market)) == market
+
+    clock.now = START + 600 # Reload keeps the original stored_at, so the TTL is not reset
+    expired = MarketCache(ttl_seconds=600, max_entries=10, path=path)
+    assert expired.load() == 0
+
+
+def test_peek_is_uncounted_and_keeps_lru_order(monkeypatch):
+    install_clock(monkeypatch)
+    cache = MarketCache(ttl_seconds=3600, max_entries=2)
+    first, second, third = (weather_market(i) for i in (1, 2, 3))
+    cache.put(first)
+    cache.put(second)
+
+    assert cache.peek_condition_id(token(first)) == first["condition_id"]
+    assert cache.peek_condition_id("unknown") is None
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    cache.put(third) # The peek did not refresh first, so it is still the eviction candidate
+    assert cache.peek_condition_id(token(first)) is None
+    assert cache.peek_condition_id(token(second)) == second["condition_id"]
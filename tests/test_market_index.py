@@ -0,0 +1,34 @@
+import asyncio
+import json
+
+from src.clients.market_index import MarketIndex
+
+from factories import weather_market
+
+
+def token(market: dict) -> str:
+    return json.loads(market["clobTokenIds"])[0]
+
+
+def index_listing(markets: list) -> MarketIndex:
+    index = MarketIndex()
+
+    async def fetch_page(offset):
+        return markets if offset == 0 else []
+
+    index._fetch_page = fetch_page
+    asyncio.run(index.refresh())
+    return index
+
+
+def test_thin_listings_are_left_to_the_full_fetch():
+    valid = weather_market(1)
+    thin = weather_market(2)
+    del thin["category"]
+    rejected = dict(weather_market(3), description="Resolves to a forecast.")
+
+    index = index_listing([valid, thin, rejected])
+
+    assert index.lookup(token(valid))[1] is True
+    assert index.lookup(token(thin)) is None
+    assert index.lookup(token(rejected))[1] is False
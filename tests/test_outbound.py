@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from src.utils.outbound import CircuitBreaker, CircuitOpenError, HostLimiter, OutboundCall, TRADE
+
+
+def trip(limiter: HostLimiter):
+    for _ in range(limiter.breaker.failure_threshold):
+        limiter.on_failure()
+    assert limiter.breaker.state == CircuitBreaker.OPEN
+    limiter.breaker.opened_until = 0 # Cooldown over: the next call is the half-open probe
+
+
+def test_cancelled_non_probe_call_does_not_free_the_probe_slot():
+    async def scenario():
+        limiter = HostLimiter("test", rate=100, burst=100)
+
+        async def call(seconds):
+            async with OutboundCall(limiter, TRADE, "test"):
+                await asyncio.sleep(seconds)
+
+        straggler = asyncio.create_task(call(1)) # e.g. a hedge admitted while the circuit was closed
+        await asyncio.sleep(0)
+        trip(limiter)
+        probe = asyncio.create_task(call(0.02))
+        await asyncio.sleep(0)
+        assert limiter.breaker.state == CircuitBreaker.HALF_OPEN
+
+        straggler.cancel() # The hedge loser is cancelled while the probe is in flight
+        await asyncio.gather(straggler, return_exceptions=True)
+        with pytest.raises(CircuitOpenError):
+            async with OutboundCall(limiter, TRADE, "test"):
+                pass
+
+        await probe
+        return limiter.breaker.state
+
+    assert asyncio.run(scenario()) == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_with_longer_cooldown():
+    async def scenario():
+        limiter = HostLimiter("test", rate=100, burst=100)
+        trip(limiter)
+        cooldown = limiter.breaker.open_seconds
+        with pytest.raises(OSError):
+            async with OutboundCall(limiter, TRADE, "test"):
+                raise OSError("still down")
+        return limiter.breaker.state, limiter.breaker.open_seconds / cooldown
+
+    assert asyncio.run(scenario()) == (CircuitBreaker.OPEN, 2)
@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+from src.models import TradeEvent
+from src.replay import FakeClobClient, ReplayExecution, ReplayMarkets, ReplayPipeline
+from src.targets import TraderTarget
+
+from factories import START, TRADER, buy, weather_market
+
+
+class PartialIndex(ReplayMarkets):
+    """Knows only some of a market's tokens, like an index missing a freshly listed outcome"""
+    def __init__(self, markets, known_tokens):
+        super().__init__(markets)
+        self.tokens = {t: entry for t, entry in self.tokens.items() if t in known_tokens}
+
+
+class TracingPipeline(ReplayPipeline):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.trace = []
+
+    async def process(self, trade_data):
+        self.trace.append(("start", trade_data.asset))
+        await asyncio.sleep(0.01)
+        self.trace.append(("end", trade_data.asset))
+
+
+def test_resolved_and_unresolved_trades_of_one_market_share_a_lane():
+    market = weather_market(1)
+    resolved_token, unresolved_token = json.loads(market["clobTokenIds"])
+    target = TraderTarget(TRADER)
+    pipeline = TracingPipeline(None, PartialIndex([market], {resolved_token}),
+                               ReplayExecution(FakeClobClient()), [target], 1000.0)
+
+    resolved = buy(market, START)
+    unresolved = dict(buy(market, START + 1), asset=unresolved_token, outcome="No",
+                      conditionId=market["condition_id"].upper().replace("0X", "0x"))
+    keys = {pipeline._lane_key(TradeEvent.from_activity(r, target)) for r in (resolved, unresolved)}
+    assert keys == {market["condition_id"]}
+
+    async def run():
+        for record in (resolved, unresolved):
+            pipeline.queue.put_nowait(TradeEvent.from_activity(record, target))
+        dispatcher = asyncio.create_task(pipeline.run())
+        await asyncio.wait_for(pipeline.queue.join(), 5)
+        dispatcher.cancel()
+
+    asyncio.run(run())
+    assert pipeline.trace == [("start", resolved_token), ("end", resolved_token),
+                              ("start", unresolved_token), ("end", unresolved_token)]
@@ -0,0 +1,69 @@
+import asyncio
+
+from src.config import Config
+from src.manager import AccountManager
+from src.models import TradeEvent
+from src.replay import FakeClobClient, ReplayExecution, ReplayMarkets, ReplayPipeline, SimClock
+from src.targets import TraderTarget
+from src.utils.state_store import StateStore
+
+from factories import START, TRADER, buy, weather_market
+
+
+class TimeoutExecution(ReplayExecution):
+    def __init__(self, stage: str):
+        super().__init__(FakeClobClient())
+        self.stage = stage
+
+    async def sign(self, order_args, options):
+        if self.stage == "sign":
+            raise TimeoutError("sign timed out")
+        return await super().sign(order_args, options)
+
+    async def post(self, signed_order, order_type=None):
+        if self.stage == "post":
+            raise TimeoutError("post timed out")
+        return await super().post(signed_order, order_type)
+
+
+class CapturingPipeline(ReplayPipeline):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = []
+
+    def _event(self, kind, trade_data, **fields):
+        self.events.append((kind, fields))
+        super()._event(kind, trade_data, **fields)
+
+
+def run_timeout(stage: str):
+    market = weather_market(1)
+    target = TraderTarget(TRADER)
+    account_manager = AccountManager(store=StateStore(":memory:"), clock=SimClock(START), legacy_state_file=None)
+    account_manager.set_trader_portfolio_value(target.key, 1000.0)
+    pipeline = CapturingPipeline(account_manager, ReplayMarkets([market]), TimeoutExecution(stage), [target], 1000.0)
+
+    trade_data = TradeEvent.from_activity(buy(market, START), target)
+    assert pipeline.prefilter(trade_data)
+    asyncio.run(pipeline.process(trade_data))
+
+    failed = [fields for kind, fields in pipeline.events if kind == "order_failed"]
+    assert len(failed) == 1
+    return failed[0], account_manager, market["condition_id"]
+
+
+def test_sign_timeout_records_no_exposure():
+    failed, account_manager, market_id = run_timeout("sign")
+
+    assert failed["exposure_recorded"] is False
+    assert account_manager.get_market_exposure(market_id) == 0
+    assert account_manager.state["current_exposure"] == 0
+
+
+def test_post_timeout_records_exposure():
+    failed, account_manager, market_id = run_timeout("post")
+
+    expected = 1000.0 * Config.MAX_SINGLE_TRADE_RATIO
+    assert failed["exposure_recorded"] is True
+    assert account_manager.get_market_exposure(market_id) == expected
+    assert account_manager.state["current_exposure"] == expected
@@ -0,0 +1,94 @@
+import asyncio
+
+from src.config import Config
+from src.clients.poller import TradePoller
+from src.targets import TraderTarget
+
+TRADER = "0x" + "ab" * 20
+
+
+def activity(tx: str, ts: int) -> dict:
+    return {"type": "TRADE", "side": "BUY", "transactionHash": tx, "asset": "tok", "conditionId": "0xc",
+            "outcome": "Yes", "price": 0.4, "size": 10, "timestamp": ts, "proxyWallet": TRADER}
+
+
+class FakeActivityApi:
+    """Activity API stand-in: `start` is inclusive, results oldest first"""
+    def __init__(self):
+        self.history = []
+
+    def install(self, poller: TradePoller):
+        async def fetch_page(params):
+            start = int(params.get("start", 0))
+            if params.get("offset", "0") != "0":
+                return []
+            return [a for a in self.history if a["timestamp"] >= start]
+        poller._fetch_page = fetch_page
+
+
+def drain(queue: asyncio.Queue) -> list:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait().tx)
+    return items
+
+
+def test_stream_then_poll_then_restart_queues_each_trade_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "POLL_CURSOR_FILE", str(tmp_path / "cursor.json"))
+    monkeypatch.setattr(Config, "POLL_SEEN_MAX", 2) # Small enough that seen-set eviction happens
+    api = FakeActivityApi()
+    queued = []
+
+    async def scenario():
+        queue = asyncio.Queue()
+        poller = TradePoller(queue, TraderTarget(TRADER))
+        api.install(poller)
+
+        api.history.append(activity("0x1", 100))
+        await poller._poll(initial=True) # Cold start snapshot: nothing queued
+        poller.primed = True
+
+        for tx, ts in (("0x2", 110), ("0x3", 120), ("0x4", 120)):
+            api.history.append(activity(tx, ts))
+            assert await poller.ingest(activity(tx, ts))
+
+        assert await poller._poll() == 0 # Backstop poll confirms the streamed trades
+        assert poller.cursor_ts == 120
+
+        api.history.append(activity("0x5", 130))
+        assert await poller.ingest(activity("0x5", 130)) # Streamed after the last poll
+        queued.extend(drain(queue))
+
+        # Restart: a fresh poller resumes from the persisted cursor
+        queue = asyncio.Queue()
+        restarted = TradePoller(queue, TraderTarget(TRADER))
+        api.install(restarted)
+        api.history.append(activity("0x6", 140))
+        task = asyncio.create_task(restarted.start())
+        await asyncio.sleep(0.05)
+        await restarted.stop()
+        await task
+        queued.extend(drain(queue))
+
+    asyncio.run(scenario())
+    assert sorted(queued) == ["0x2", "0x3", "0x4", "0x5", "0x6"]
+
+
+def test_stream_redelivery_after_seen_eviction_is_not_queued(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "POLL_CURSOR_FILE", str(tmp_path / "cursor.json"))
+    monkeypatch.setattr(Config, "POLL_SEEN_MAX", 1)
+    api = FakeActivityApi()
+
+    async def scenario():
+        queue = asyncio.Queue()
+        poller = TradePoller(queue, TraderTarget(TRADER))
+        api.install(poller)
+        await poller._poll(initial=True)
+        poller.primed = True
+        api.history += [activity("0x1", 100), activity("0x2", 110)]
+        assert await poller._poll() == 2
+        # 0x1 is evicted from the seen set by now; the stream replays it after a reconnect
+        assert not await poller.ingest(activity("0x1", 100))
+        return drain(queue)
+
+    assert asyncio.run(scenario()) == ["0x1", "0x2"]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from src.utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"market": 1}
+
+    async def run():
+        return await asyncio.gather(*(flight.do("token", fetch) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight._inflight == {}
+
+
+def test_exception_reaches_every_waiter_and_clears_the_key():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ConnectionError("gamma down")
+
+    async def run():
+        outcomes = await asyncio.gather(*(flight.do("token", failing) for _ in range(3)), return_exceptions=True)
+        assert flight._inflight == {}
+        with pytest.raises(ConnectionError): # Next caller starts a fresh request
+            await flight.do("token", failing)
+        return outcomes
+
+    outcomes = asyncio.run(run())
+    assert all(isinstance(outcome, ConnectionError) for outcome in outcomes)
+    assert len(calls) == 2
+
+
+def test_negative_ttl_replays_the_failure_until_it_expires():
+    now = [0.0]
+    flight = SingleFlight("test", negative_ttl=5.0, clock=lambda: now[0])
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise ConnectionError("gamma down")
+
+    async def run():
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                await flight.do("token", failing)
+        now[0] = 5.0
+        with pytest.raises(ConnectionError):
+            await flight.do("token", failing)
+
+    asyncio.run(run())
+    assert len(calls) == 2
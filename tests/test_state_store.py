@@ -0,0 +1,42 @@
+import threading
+
+from src.utils.state_store import StateStore
+
+
+def test_exposure_and_state_survive_reopen(tmp_path):
+    path = str(tmp_path / "bot_state.db")
+    store = StateStore(path)
+    store.record_exposure(12.5, "0xabc", current_exposure=12.5)
+    store.record_exposure(2.5, "0xabc", current_exposure=15.0)
+    store.save_state({"poll_cursor": {"ts": 1_700_000_000, "keys": ["0x1:asset"]}, "daily_pnl": -3.0})
+    store.close()
+
+    reopened = StateStore(path)
+    assert reopened.get_market_exposure("0xabc") == 15.0
+    assert reopened.load_state() == {"current_exposure": 15.0, "daily_pnl": -3.0,
+                                     "poll_cursor": {"ts": 1_700_000_000, "keys": ["0x1:asset"]}}
+    reopened.close()
+
+
+def test_concurrent_writers_do_not_lose_or_corrupt_rows(tmp_path):
+    path = str(tmp_path / "bot_state.db")
+    StateStore(path).close() # Create the schema once
+    writes = 200
+
+    def writer(market_id):
+        store = StateStore(path, compact_every=50)
+        for i in range(writes):
+            store.record_exposure(1.0, "0xshared", current_exposure=float(i))
+            store.record_exposure(1.0, market_id, current_exposure=float(i))
+        store.close()
+
+    threads = [threading.Thread(target=writer, args=(f"0x{n}",)) for n in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store = StateStore(path)
+    assert store.market_exposures() == {"0xshared": 2.0 * writes, "0x0": float(writes), "0x1": float(writes)}
+    assert store.conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    store.close()
@@ -0,0 +1,23 @@
+import asyncio
+
+from src.replay import replay
+from src.sweep import ColumnarActivity, write_columnar_activity
+
+from factories import START, buy, weather_market
+
+
+def test_columnar_history_round_trips(tmp_path):
+    low, high = weather_market(1, "15°C"), weather_market(2, "16°C")
+    activity = [buy(low, START), buy(high, START + 60, price=0.97), buy(low, START + 120)]
+    activity[1].pop("title") # Absent fields stay absent
+    activity[2]["slug"] = "héat-wave" # Non-ASCII survives the string table
+
+    write_columnar_activity(activity, str(tmp_path))
+    columnar = ColumnarActivity(str(tmp_path))
+
+    assert len(columnar) == 3
+    assert list(columnar) == activity
+    expected = asyncio.run(replay(activity, [low, high], 1000.0, 1000.0))
+    replayed = asyncio.run(replay(columnar, [low, high], 1000.0, 1000.0))
+    assert replayed["orders"] == expected["orders"]
+    assert replayed["outcomes"] == expected["outcomes"]
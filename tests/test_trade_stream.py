@@ -0,0 +1,28 @@
+import asyncio
+import socket
+
+from src.clients import stream
+from src.clients.stream import TradeStream
+
+
+def closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_stop_interrupts_the_reconnect_backoff(monkeypatch):
+    monkeypatch.setattr(stream.random, "uniform", lambda low, high: 60.0)
+
+    async def run():
+        async def on_activity(activity):
+            pass
+
+        trade_stream = TradeStream(on_activity, lambda connected: None, url=f"ws://127.0.0.1:{closed_port()}")
+        task = asyncio.create_task(trade_stream.start())
+        while trade_stream.reconnects == 0: # First connect refused, now backing off
+            await asyncio.sleep(0.01)
+        await trade_stream.stop()
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(run())